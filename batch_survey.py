@@ -0,0 +1,178 @@
+"""
+Procesamiento por lotes de archivos de coordenadas
+Compatible con Qt5/Qt6 y QGIS 3.x/4.x
+
+Este módulo no importa QGIS: sus funciones se ejecutan en los procesos del
+pool. Las capas y los layouts se crean después en el hilo principal.
+"""
+import csv
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from .coordinate_reader import (
+    sniff_csv, read_csv_columns, has_excel_streaming, excel_columns,
+    read_excel_columns, guess_xy_columns
+)
+from .parallel import create_process_pool, default_workers
+from .topographic_calculator import TopographicCalculator
+
+
+SURVEY_EXTENSIONS = ('.csv', '.txt', '.xlsx', '.xls')
+
+REPORT_FIELDS = ['archivo', 'estado', 'vertices', 'area_m2', 'perimetro_m', 'segundos', 'mensaje']
+
+
+def list_survey_files(folder):
+    """Archivos de coordenadas (CSV/TXT/XLSX/XLS) de una carpeta, ordenados por nombre."""
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.lower().endswith(SURVEY_EXTENSIONS) and os.path.isfile(os.path.join(folder, name))
+    )
+
+
+def _read_columns(path, x_col, y_col):
+    """Lee X/Y de un archivo; si no tiene esas columnas se detectan por nombre."""
+    lower = path.lower()
+    if has_excel_streaming(path):
+        names = excel_columns(path)
+        reader = lambda cols: read_excel_columns(path, cols)
+    elif lower.endswith(('.xlsx', '.xls')):
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError("La librería 'pandas' no está instalada.")
+        names = [str(c) for c in pd.read_excel(path, nrows=0).columns]
+
+        def reader(cols):
+            df = pd.read_excel(path, usecols=cols)
+            return {c: df[c].to_numpy(dtype=float) for c in cols}
+    else:
+        dialect = sniff_csv(path)
+        names = dialect['columns']
+        reader = lambda cols: read_csv_columns(path, cols, dialect)
+
+    if x_col not in names or y_col not in names:
+        x_col, y_col = guess_xy_columns(names)
+        if x_col is None or y_col is None or x_col == y_col:
+            raise ValueError("No se encontraron columnas X/Y (Este/Norte).")
+    columns = reader([x_col, y_col])
+    return columns[x_col], columns[y_col], x_col, y_col
+
+
+def load_and_compute(path, x_col=None, y_col=None):
+    """
+    Lee un archivo y calcula su tabla de levantamiento (se ejecuta en el pool).
+
+    Args:
+        path: Ruta del archivo de coordenadas
+        x_col, y_col: Columnas preferidas; si el archivo no las tiene se
+            detectan por nombre ('x'/'este', 'y'/'norte')
+
+    Returns:
+        dict: path, x_col, y_col, arrays (resultado de compute_survey_arrays)
+            y seconds
+    """
+    start = time.perf_counter()
+    x, y, x_col, y_col = _read_columns(path, x_col, y_col)
+    if len(x) < 3:
+        raise ValueError(f"Se requieren al menos 3 vértices (hay {len(x)}).")
+    arrays = TopographicCalculator.compute_survey_arrays(x, y)
+    return {
+        'path': path,
+        'x_col': x_col,
+        'y_col': y_col,
+        'arrays': arrays,
+        'seconds': time.perf_counter() - start
+    }
+
+
+def iter_batch_results(paths, x_col=None, y_col=None, workers=None, poll=None, poll_interval=0.1):
+    """
+    Procesa los archivos en un pool de procesos y entrega los resultados a
+    medida que terminan.
+
+    Un archivo con errores no detiene el lote: se entrega con su excepción.
+    Si el pool no puede arrancar o se rompe (un proceso muere), los archivos
+    que aún no tienen resultado se procesan en este proceso.
+
+    Args:
+        paths: Rutas de los archivos
+        x_col, y_col: Columnas preferidas (ver load_and_compute)
+        workers: Número de procesos (None = default_workers(); 1 = sin pool)
+        poll: Función llamada mientras se espera (p. ej. processEvents)
+        poll_interval: Segundos máximos entre llamadas a poll
+
+    Yields:
+        tuple: (path, resultado o None, excepción o None)
+    """
+    workers = min(workers or default_workers(), len(paths))
+    if workers <= 1:
+        yield from _iter_in_process(paths, x_col, y_col, poll)
+        return
+
+    reported = set()
+    try:
+        with create_process_pool(workers) as pool:
+            futures = {pool.submit(load_and_compute, path, x_col, y_col): path for path in paths}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        yield futures[future], None, e
+                    else:
+                        yield futures[future], result, None
+                    reported.add(futures[future])
+                if poll is not None:
+                    poll()
+    except (BrokenProcessPool, OSError):
+        yield from _iter_in_process([path for path in paths if path not in reported], x_col, y_col, poll)
+
+
+def _iter_in_process(paths, x_col, y_col, poll):
+    """Como iter_batch_results, uno a uno y sin pool."""
+    for path in paths:
+        try:
+            yield path, load_and_compute(path, x_col, y_col), None
+        except Exception as e:
+            yield path, None, e
+        if poll is not None:
+            poll()
+
+
+def batch_summary(statuses, seconds):
+    """
+    Totales del lote.
+
+    Args:
+        statuses: Lista de diccionarios con las claves de REPORT_FIELDS
+        seconds: Duración total del lote
+
+    Returns:
+        dict: files, ok, errors, vertices, seconds, files_per_second, vertices_per_second
+    """
+    ok = [s for s in statuses if s['estado'] == 'ok']
+    vertices = sum(s['vertices'] or 0 for s in ok)
+    return {
+        'files': len(statuses),
+        'ok': len(ok),
+        'errors': len(statuses) - len(ok),
+        'vertices': vertices,
+        'seconds': seconds,
+        'files_per_second': len(statuses) / seconds if seconds > 0 else 0.0,
+        'vertices_per_second': vertices / seconds if seconds > 0 else 0.0
+    }
+
+
+def write_batch_report(path, statuses):
+    """Escribe el estado de cada archivo del lote en un CSV (UTF-8 con BOM, ';')."""
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS, delimiter=';')
+        writer.writeheader()
+        writer.writerows(statuses)
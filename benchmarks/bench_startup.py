@@ -0,0 +1,161 @@
+"""
+Presupuesto de arranque del plugin ArcGeek Topo
+
+Mide, en un intérprete nuevo con 'python -X importtime', lo que QGIS ejecuta
+al cargar el plugin: classFactory(iface) + initGui() y los eventos pendientes
+que deja initGui. Comprueba además que en ese momento no se hayan importado
+los módulos que deben cargarse al usarlos (pandas, processing y el diálogo).
+
+Uso:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget-ms 50 --output startup.json
+
+Termina con código 1 si se supera el presupuesto o si algún módulo perezoso
+se importó durante el arranque. Requiere PyQGIS; sin él no mide nada.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "arcgeek_topo_bench"
+
+DEFAULT_BUDGET_MS = 50.0
+
+# Módulos que no deben importarse al arrancar QGIS. Los algoritmos no están:
+# al registrar el proveedor de Processing, QGIS los instancia para listarlos
+# en la Caja de Herramientas y su importación cuenta en el presupuesto.
+LAZY_MODULES = [
+    "pandas",
+    "processing",
+    f"{PACKAGE}.topographic_survey_dialog",
+]
+
+START_MARKER = "--arcgeek-start--"
+END_MARKER = "--arcgeek-end--"
+
+# Se ejecuta en el intérprete hijo: argv[1] = carpeta del plugin
+CHILD_SCRIPT = f"""
+import importlib.util, json, os, sys, time
+from qgis.PyQt.QtCore import QCoreApplication
+from qgis.testing import start_app
+from qgis.testing.mocked import get_iface
+
+start_app()
+iface = get_iface()
+
+sys.stderr.write({START_MARKER!r} + "\\n")
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location(
+    {PACKAGE!r}, os.path.join(sys.argv[1], "__init__.py"),
+    submodule_search_locations=[sys.argv[1]]
+)
+package = importlib.util.module_from_spec(spec)
+sys.modules[{PACKAGE!r}] = package
+spec.loader.exec_module(package)
+plugin = package.classFactory(iface)
+plugin.initGui()
+# Lo que initGui deja en la cola de eventos también se ejecuta al arrancar
+QCoreApplication.processEvents()
+elapsed = time.perf_counter() - start
+sys.stderr.write({END_MARKER!r} + "\\n")
+
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def parse_importtime(stderr):
+    """
+    Extrae de la salida de -X importtime los imports entre los marcadores.
+
+    Returns:
+        list: Diccionarios module, self_us, cumulative_us
+    """
+    imports = []
+    inside = False
+    for line in stderr.splitlines():
+        if line.strip() == START_MARKER:
+            inside = True
+            continue
+        if line.strip() == END_MARKER:
+            break
+        if not inside or not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # Encabezado de la tabla
+        imports.append({
+            "module": parts[2].strip(),
+            "self_us": int(parts[0]),
+            "cumulative_us": int(parts[1]),
+        })
+    return imports
+
+
+def measure_startup(python=None):
+    """
+    Ejecuta classFactory + initGui (y los eventos pendientes) en un proceso nuevo.
+
+    Returns:
+        dict: seconds, import_ms, imports (los más costosos) y lazy_violations;
+            None si PyQGIS no está disponible
+    """
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    proc = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", CHILD_SCRIPT, PLUGIN_DIR],
+        capture_output=True, text=True, env=env
+    )
+    if proc.returncode != 0:
+        if "No module named 'qgis'" in proc.stderr:
+            return None
+        raise RuntimeError(f"Falló el arranque del plugin:\n{proc.stderr[-2000:]}")
+
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    imports = parse_importtime(proc.stderr)
+    modules = set(result["modules"])
+    return {
+        "seconds": round(result["seconds"], 6),
+        "import_ms": round(sum(i["self_us"] for i in imports) / 1000.0, 3),
+        "imports": sorted(imports, key=lambda i: i["cumulative_us"], reverse=True)[:15],
+        "lazy_violations": [m for m in LAZY_MODULES if m in modules],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Presupuesto de arranque de ArcGeek Topo")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Tiempo máximo de classFactory + initGui (con sus eventos) en milisegundos")
+    parser.add_argument("--output", help="Ruta del informe JSON")
+    args = parser.parse_args(argv)
+
+    report = measure_startup()
+    if report is None:
+        print("PyQGIS no disponible: no se puede medir el arranque.", file=sys.stderr)
+        return 0
+
+    elapsed_ms = report["seconds"] * 1000.0
+    report["budget_ms"] = args.budget_ms
+    print(f"classFactory + initGui: {elapsed_ms:.1f} ms (presupuesto {args.budget_ms:.0f} ms), "
+          f"imports {report['import_ms']:.1f} ms")
+    for item in report["imports"]:
+        print(f"  {item['cumulative_us'] / 1000.0:>8.2f} ms  {item['module']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    failed = False
+    if elapsed_ms > args.budget_ms:
+        print(f"Arranque por encima del presupuesto: {elapsed_ms:.1f} ms", file=sys.stderr)
+        failed = True
+    if report["lazy_violations"]:
+        print(f"Importados al arrancar: {', '.join(report['lazy_violations'])}", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,411 @@
+"""
+Suite de benchmarks del plugin ArcGeek Topo
+
+Genera polígonos sintéticos (de 10 a 1M de vértices, simples, multiparte y
+muchas parcelas) y mide, sin interfaz gráfica:
+
+    - TopographicCalculator.generate_survey_table
+    - TopographicCalculator.generate_batch_survey
+    - CreatePolygonFromTableAlgorithm
+    - PolygonToPointsAlgorithm
+    - ExportToCSVAlgorithm
+
+Para cada caso registra tiempo, throughput (vértices/s), pico de memoria
+(tracemalloc) y la pendiente de escalado (log-log) en un informe JSON.
+
+Uso:
+    python benchmarks/bench_survey.py --output bench.json
+    python benchmarks/bench_survey.py --baseline bench.json --threshold 0.2
+
+Con --baseline compara contra un informe anterior y termina con código 1
+si algún caso es más lento que el umbral indicado.
+
+Los algoritmos de Processing se omiten si PyQGIS no está disponible (o con
+--skip-qgis).
+"""
+import argparse
+import gc
+import importlib
+import importlib.util
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "arcgeek_topo_bench"
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000, 1000000]
+DEFAULT_QGIS_MAX_SIZE = 100000
+
+# Origen UTM de los datos sintéticos (zona 17S, como los ejemplos)
+ORIGIN_X = 696000.0
+ORIGIN_Y = 9535000.0
+
+
+# --- Carga del plugin ---
+
+def load_plugin_module(name):
+    """
+    Importa un módulo del plugin como parte de un paquete sintético.
+
+    La carpeta del plugin puede tener cualquier nombre (p. ej. 'arcgeek_topo-main'),
+    así que se registra con un nombre de paquete fijo para que funcionen los
+    imports relativos.
+    """
+    if PACKAGE not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            PACKAGE, os.path.join(PLUGIN_DIR, "__init__.py"),
+            submodule_search_locations=[PLUGIN_DIR]
+        )
+        package = importlib.util.module_from_spec(spec)
+        sys.modules[PACKAGE] = package
+        spec.loader.exec_module(package)
+    return importlib.import_module(f"{PACKAGE}.{name}")
+
+
+# --- Datos sintéticos ---
+
+def make_ring(n, seed=0, radius=500.0, cx=ORIGIN_X, cy=ORIGIN_Y):
+    """
+    Anillo simple (estrellado, sin autointersecciones) de n vértices.
+
+    Returns:
+        tuple: (x, y) como arreglos float64
+    """
+    rng = np.random.default_rng(seed)
+    angles = np.sort(rng.uniform(0, 2 * np.pi, n))
+    radii = radius * rng.uniform(0.6, 1.0, n)
+    # Sentido horario, como los levantamientos de ejemplo
+    return cx + radii * np.sin(angles), cy + radii * np.cos(angles)
+
+
+def make_parcels(n_parcels, vertices_per_parcel, seed=0):
+    """
+    Tabla larga de muchas parcelas en una malla regular.
+
+    Returns:
+        tuple: (x, y, ids) como arreglos
+    """
+    side = int(math.ceil(math.sqrt(n_parcels)))
+    xs, ys, ids = [], [], []
+    for k in range(n_parcels):
+        cx = ORIGIN_X + (k % side) * 100.0
+        cy = ORIGIN_Y + (k // side) * 100.0
+        x, y = make_ring(vertices_per_parcel, seed + k, radius=40.0, cx=cx, cy=cy)
+        xs.append(x)
+        ys.append(y)
+        ids.append(np.full(vertices_per_parcel, k + 1, dtype=np.int64))
+    return np.concatenate(xs), np.concatenate(ys), np.concatenate(ids)
+
+
+def make_multipart(n_parts, vertices_per_part, seed=0):
+    """
+    Partes de un multipolígono, separadas entre sí.
+
+    Returns:
+        list: Lista de anillos [(x, y), ...]
+    """
+    return [
+        make_ring(vertices_per_part, seed + k, radius=40.0, cx=ORIGIN_X + k * 100.0)
+        for k in range(n_parts)
+    ]
+
+
+# --- Medición ---
+
+def measure(func, repeat=1):
+    """
+    Ejecuta func() 'repeat' veces y devuelve el mejor tiempo y el pico de memoria.
+
+    Las repeticiones cronometradas se hacen sin tracemalloc (trazar cada
+    reserva ralentiza mucho más el código Python que el de NumPy) y el pico
+    de memoria se toma de una ejecución aparte con tracemalloc activo.
+    tracemalloc solo ve la memoria reservada desde Python (incluye NumPy, no
+    las estructuras C++ de QGIS).
+
+    Returns:
+        dict: seconds, peak_kb
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best, "peak_kb": round(peak / 1024.0, 1)}
+
+
+def scaling_exponent(points):
+    """
+    Pendiente log-log de tiempo frente a tamaño (1.0 = lineal).
+
+    Args:
+        points: Lista de tuplas (tamaño, segundos)
+    """
+    points = [(s, t) for s, t in points if s > 0 and t > 0]
+    if len(points) < 2:
+        return None
+    sizes = np.log([s for s, _ in points])
+    times = np.log([t for _, t in points])
+    return round(float(np.polyfit(sizes, times, 1)[0]), 3)
+
+
+# --- Casos de benchmark ---
+
+def bench_calculator(sizes, repeat):
+    calc = load_plugin_module("topographic_calculator").TopographicCalculator
+    results = []
+    for n in sizes:
+        x, y = make_ring(n, seed=n)
+        coordinates = list(zip(x.tolist(), y.tolist()))
+        stats = measure(lambda: calc.generate_survey_table(coordinates), repeat)
+        results.append(("generate_survey_table", n, n, stats))
+
+        stats = measure(lambda: calc.compute_survey_arrays(x, y), repeat)
+        results.append(("compute_survey_arrays", n, n, stats))
+    return results
+
+
+def bench_batch(sizes, repeat, vertices_per_parcel=20):
+    calc = load_plugin_module("topographic_calculator").TopographicCalculator
+    results = []
+    for n in sizes:
+        n_parcels = max(1, n // vertices_per_parcel)
+        x, y, ids = make_parcels(n_parcels, vertices_per_parcel, seed=n)
+        stats = measure(lambda: calc.generate_batch_survey(x, y, ids), repeat)
+        results.append(("generate_batch_survey", len(x), len(x), stats))
+    return results
+
+
+def init_qgis():
+    """Inicializa QGIS sin interfaz. Devuelve None si PyQGIS no está disponible."""
+    try:
+        from qgis.core import QgsApplication
+    except ImportError:
+        return None
+    app = QgsApplication([], False)
+    app.initQgis()
+    return app
+
+
+def _point_table_layer(x, y, ids=None):
+    from qgis.core import QgsVectorLayer, QgsFeature
+    layer = QgsVectorLayer("None?field=id:integer&field=X:double&field=Y:double", "tabla", "memory")
+    ids = ids if ids is not None else np.ones(len(x), dtype=np.int64)
+    features = []
+    for i, (xi, yi, pid) in enumerate(zip(x.tolist(), y.tolist(), ids.tolist())):
+        f = QgsFeature(layer.fields())
+        f.setAttributes([pid, xi, yi])
+        features.append(f)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+
+def _polygon_layer(rings_per_feature):
+    from qgis.core import QgsVectorLayer, QgsFeature, QgsGeometry, QgsPointXY
+    layer = QgsVectorLayer("MultiPolygon?crs=EPSG:32717&field=id:integer", "poligonos", "memory")
+    features = []
+    for k, rings in enumerate(rings_per_feature):
+        parts = [[[QgsPointXY(a, b) for a, b in zip(x.tolist(), y.tolist())]] for x, y in rings]
+        f = QgsFeature(layer.fields())
+        f.setGeometry(QgsGeometry.fromMultiPolygonXY(parts))
+        f.setAttributes([k + 1])
+        features.append(f)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+
+def _run_algorithm(alg, parameters):
+    from qgis.core import QgsProcessingContext, QgsProcessingFeedback
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+    results, ok = alg.run(parameters, context, feedback)
+    if not ok:
+        raise RuntimeError(f"Falló el algoritmo {alg.name()}")
+    return results
+
+
+def bench_algorithms(sizes, repeat, workdir):
+    create_mod = load_plugin_module("create_polygon_from_csv")
+    points_mod = load_plugin_module("from_polygon_to_points")
+    export_mod = load_plugin_module("export_to_csv")
+    results = []
+
+    for n in sizes:
+        x, y = make_ring(n, seed=n)
+
+        table = _point_table_layer(x, y)
+        alg = create_mod.CreatePolygonFromTableAlgorithm().create()
+        params = {
+            "INPUT": table, "X_FIELD": "X", "Y_FIELD": "Y", "CRS": "EPSG:32717",
+            "OUTPUT_POLYGON": "TEMPORARY_OUTPUT", "OUTPUT_POINTS": "TEMPORARY_OUTPUT"
+        }
+        stats = measure(lambda: _run_algorithm(alg, params), repeat)
+        results.append(("CreatePolygonFromTableAlgorithm", n, n, stats))
+
+        # Polígono simple y multiparte (10 partes) con el mismo total de vértices
+        for label, rings in (("single", [[(x, y)]]),
+                             ("multipart", [make_multipart(10, max(3, n // 10), seed=n)])):
+            polygons = _polygon_layer(rings)
+            alg = points_mod.PolygonToPointsAlgorithm().create()
+            params = {"INPUT": polygons, "POLYGON_ID_FIELD": "id", "OUTPUT": "TEMPORARY_OUTPUT"}
+            stats = measure(lambda: _run_algorithm(alg, params), repeat)
+            total = sum(len(rx) for rx, _ in rings[0])
+            results.append((f"PolygonToPointsAlgorithm[{label}]", n, total, stats))
+
+        alg = export_mod.ExportToCSVAlgorithm().create()
+        params = {"INPUT": table, "FORMAT": 0, "OUTPUT": os.path.join(workdir, f"export_{n}.csv")}
+        stats = measure(lambda: _run_algorithm(alg, params), repeat)
+        results.append(("ExportToCSVAlgorithm", n, n, stats))
+
+    # Muchas parcelas: 1 000 polígonos de 20 vértices
+    rings = [[make_ring(20, seed=k, radius=40.0, cx=ORIGIN_X + (k % 32) * 100.0,
+                        cy=ORIGIN_Y + (k // 32) * 100.0)] for k in range(1000)]
+    polygons = _polygon_layer(rings)
+    alg = points_mod.PolygonToPointsAlgorithm().create()
+    params = {"INPUT": polygons, "POLYGON_ID_FIELD": "id", "OUTPUT": "TEMPORARY_OUTPUT"}
+    stats = measure(lambda: _run_algorithm(alg, params), repeat)
+    results.append(("PolygonToPointsAlgorithm[parcels]", 1000, 20000, stats))
+    return results
+
+
+# --- Informe ---
+
+def build_report(raw_results):
+    cases = []
+    curves = {}
+    for name, size, vertices, stats in raw_results:
+        seconds = stats["seconds"]
+        cases.append({
+            "name": name,
+            "size": size,
+            "vertices": vertices,
+            "seconds": round(seconds, 6),
+            "throughput": round(vertices / seconds, 1) if seconds > 0 else None,
+            "peak_kb": stats["peak_kb"],
+        })
+        curves.setdefault(name, []).append((vertices, seconds))
+
+    try:
+        from qgis.core import Qgis
+        qgis_version = Qgis.QGIS_VERSION
+    except ImportError:
+        qgis_version = None
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "qgis": qgis_version,
+        "machine": platform.platform(),
+        "cases": cases,
+        "scaling": {name: scaling_exponent(points) for name, points in curves.items()},
+    }
+
+
+def compare_with_baseline(report, baseline, threshold):
+    """
+    Compara cada caso con el mismo caso (nombre y tamaño) del informe base.
+
+    Returns:
+        list: Regresiones (diccionarios con name, size, seconds, baseline, ratio)
+    """
+    previous = {(c["name"], c["size"]): c for c in baseline.get("cases", [])}
+    regressions = []
+    for case in report["cases"]:
+        base = previous.get((case["name"], case["size"]))
+        if not base or not base["seconds"]:
+            continue
+        ratio = case["seconds"] / base["seconds"]
+        case["baseline_seconds"] = base["seconds"]
+        case["ratio"] = round(ratio, 3)
+        if ratio > 1.0 + threshold:
+            regressions.append({
+                "name": case["name"], "size": case["size"],
+                "seconds": case["seconds"], "baseline": base["seconds"], "ratio": round(ratio, 3)
+            })
+    report["regressions"] = regressions
+    return regressions
+
+
+def print_summary(report):
+    print(f"{'caso':<40} {'tamaño':>9} {'seg':>10} {'vért/s':>14} {'pico KB':>10}")
+    for case in report["cases"]:
+        throughput = f"{case['throughput']:,.0f}" if case["throughput"] else "-"
+        ratio = f"  x{case['ratio']}" if "ratio" in case else ""
+        print(f"{case['name']:<40} {case['size']:>9} {case['seconds']:>10.4f} "
+              f"{throughput:>14} {case['peak_kb']:>10}{ratio}")
+    for name, slope in report["scaling"].items():
+        if slope is not None:
+            print(f"escalado {name}: O(n^{slope})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de ArcGeek Topo")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Número de vértices de cada caso")
+    parser.add_argument("--qgis-max-size", type=int, default=DEFAULT_QGIS_MAX_SIZE,
+                        help="Tamaño máximo para los algoritmos de Processing")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones (se toma el mejor tiempo)")
+    parser.add_argument("--output", help="Ruta del informe JSON")
+    parser.add_argument("--baseline", help="Informe JSON anterior para detectar regresiones")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Tolerancia de regresión (0.2 = 20%% más lento)")
+    parser.add_argument("--skip-qgis", action="store_true", help="No medir los algoritmos de Processing")
+    args = parser.parse_args(argv)
+
+    raw = []
+    raw += bench_calculator(args.sizes, args.repeat)
+    raw += bench_batch(args.sizes, args.repeat)
+
+    app = None if args.skip_qgis else init_qgis()
+    if app is not None:
+        qgis_sizes = [n for n in args.sizes if n <= args.qgis_max_size]
+        with tempfile.TemporaryDirectory() as workdir:
+            raw += bench_algorithms(qgis_sizes, args.repeat, workdir)
+    elif not args.skip_qgis:
+        print("PyQGIS no disponible: se omiten los algoritmos de Processing.", file=sys.stderr)
+
+    report = build_report(raw)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_with_baseline(report, json.load(f), args.threshold)
+
+    print_summary(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if app is not None:
+        app.exitQgis()
+
+    if regressions:
+        print(f"\n{len(regressions)} regresiones (> {args.threshold:.0%}):", file=sys.stderr)
+        for r in regressions:
+            print(f"  {r['name']} [{r['size']}]: {r['baseline']:.4f}s -> {r['seconds']:.4f}s (x{r['ratio']})",
+                  file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
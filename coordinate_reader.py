@@ -0,0 +1,722 @@
+"""
+Lectura de archivos de coordenadas (CSV/TXT/XLSX)
+Compatible con Qt5/Qt6 y QGIS 3.x/4.x
+"""
+import csv
+import mmap
+import os
+import re
+from array import array
+from collections import OrderedDict
+from operator import itemgetter
+
+import numpy as np
+
+
+SAMPLE_SIZE = 65536
+
+# Bytes del archivo mapeado que se analizan por bloque en los TXT
+TXT_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Filas entre llamadas al callback de progreso al leer Excel
+EXCEL_PROGRESS_STEP = 5000
+
+# Memoria máxima de la caché de columnas leídas
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Delimitadores candidatos, en orden de preferencia si el Sniffer falla
+DELIMITERS = [';', ',', '\t', '|', ' ']
+
+_DECIMAL_COMMA = re.compile(r'^\s*[+-]?\d+,\d+\s*$')
+
+
+def _is_number(text, decimal='.'):
+    text = text.strip()
+    if decimal == ',':
+        text = text.replace(',', '.')
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def _split_row(line, delimiter):
+    if delimiter == ' ':
+        return line.split()
+    return next(csv.reader([line], delimiter=delimiter))
+
+
+def sniff_csv(path, sample_size=SAMPLE_SIZE):
+    """
+    Detecta en una sola lectura de la cabecera del archivo el delimitador,
+    el separador decimal, si hay fila de encabezado y los nombres de columna.
+
+    Args:
+        path: Ruta del archivo CSV/TXT
+        sample_size: Bytes a leer para la detección
+
+    Returns:
+        dict: 'delimiter', 'decimal', 'header' (bool), 'columns' (lista de nombres)
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        sample = f.read(sample_size)
+
+    lines = [line for line in sample.splitlines() if line.strip()]
+    # La última línea de la muestra puede estar cortada
+    if len(sample) >= sample_size and len(lines) > 1:
+        lines = lines[:-1]
+    if not lines:
+        raise ValueError("El archivo está vacío.")
+
+    try:
+        delimiter = csv.Sniffer().sniff("\n".join(lines[:50]), delimiters=''.join(DELIMITERS)).delimiter
+    except csv.Error:
+        delimiter = next((d for d in DELIMITERS if d in lines[0]), ';')
+
+    # Espacios y tabuladores mezclados (típico de estaciones totales): si al
+    # separar por cualquier blanco todas las líneas tienen los mismos campos,
+    # el archivo se trata como separado por espacios
+    if delimiter == '\t':
+        counts = {len(line.split()) for line in lines[:50]}
+        if len(counts) == 1 and counts.pop() > len(_split_row(lines[0], delimiter)):
+            delimiter = ' '
+
+    first = _split_row(lines[0], delimiter)
+    data = [_split_row(line, delimiter) for line in lines[1:50]] or [first]
+
+    # Coma decimal: solo posible si no es también el delimitador
+    decimal = '.'
+    if delimiter != ',' and any(_DECIMAL_COMMA.match(v) for row in data for v in row):
+        decimal = ','
+
+    # Hay encabezado si algún campo de la primera fila no es numérico
+    header = any(v.strip() and not _is_number(v, decimal) for v in first)
+    if header:
+        columns = [v.strip() for v in first]
+    else:
+        columns = [f"Columna {i + 1}" for i in range(len(first))]
+
+    return {
+        'delimiter': delimiter,
+        'decimal': decimal,
+        'header': header,
+        'columns': columns
+    }
+
+
+def guess_xy_columns(columns):
+    """
+    Detecta las columnas X/Y por su nombre ('x'/'este' y 'y'/'norte').
+
+    Si varias coinciden se toma la última, como en la selección automática
+    del diálogo.
+
+    Returns:
+        tuple: (columna_x, columna_y); None en la que no se encuentre
+    """
+    x_col = y_col = None
+    for col in columns:
+        col_lower = col.lower()
+        if 'x' in col_lower or 'este' in col_lower:
+            x_col = col
+        if 'y' in col_lower or 'norte' in col_lower:
+            y_col = col
+    return x_col, y_col
+
+
+def read_csv_columns(path, columns, dialect=None):
+    """
+    Lee solo las columnas indicadas como arreglos float64 en una sola pasada.
+
+    Se usa np.loadtxt (lector en C) con usecols, de modo que solo se
+    convierten los campos pedidos. Si el archivo tiene celdas vacías o
+    valores irregulares se repite la lectura con el lector csv, que omite
+    las filas incompletas e informa la fila del primer valor no numérico.
+
+    Args:
+        path: Ruta del archivo CSV/TXT
+        columns: Nombres de las columnas a leer (p. ej. [x_col, y_col])
+        dialect: Resultado de sniff_csv (se detecta si es None)
+
+    Returns:
+        dict: Nombre de columna -> np.ndarray float64
+
+    Raises:
+        ValueError: Si falta una columna o un valor no es numérico
+    """
+    if dialect is None:
+        dialect = sniff_csv(path)
+
+    names = dialect['columns']
+    missing = [c for c in columns if c not in names]
+    if missing:
+        raise ValueError(f"Columnas no encontradas en el archivo: {', '.join(missing)}")
+    indices = [names.index(c) for c in columns]
+
+    if dialect['delimiter'] == ' ':
+        # TXT separado por espacios: lector sobre el archivo mapeado en memoria
+        data = read_txt_columns(path, indices, skip_lines=1 if dialect['header'] else 0)
+        return dict(zip(columns, data))
+
+    try:
+        data = _load_fast(path, indices, dialect)
+    except ValueError:
+        return _load_rows(path, columns, indices, dialect)
+    return {name: data[:, k] for k, name in enumerate(columns)}
+
+
+def _load_fast(path, indices, dialect):
+    delimiter = None if dialect['delimiter'] == ' ' else dialect['delimiter']
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        lines = f
+        if dialect['decimal'] == ',':
+            # El delimitador nunca es ',' en este caso
+            lines = (line.replace(',', '.') for line in f)
+        return np.loadtxt(
+            lines, dtype=np.float64, delimiter=delimiter, usecols=indices,
+            skiprows=1 if dialect['header'] else 0, ndmin=2
+        )
+
+
+def _load_rows(path, columns, indices, dialect):
+    """Lectura fila a fila con csv.reader, tolerante a filas vacías o incompletas."""
+    getter = itemgetter(*indices)
+    last_index = max(indices)
+    buffers = [array('d') for _ in columns]
+    appends = [b.append for b in buffers]
+    comma = dialect['decimal'] == ','
+    delimiter = dialect['delimiter']
+
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if delimiter == ' ':
+            rows = (line.split() for line in f)
+        else:
+            rows = csv.reader(f, delimiter=delimiter)
+
+        if dialect['header']:
+            next(rows, None)
+
+        for line_no, row in enumerate(rows, start=2 if dialect['header'] else 1):
+            if len(row) <= last_index:
+                if any(v.strip() for v in row):
+                    raise ValueError(f"Fila {line_no}: faltan columnas.")
+                continue
+            values = getter(row) if len(indices) > 1 else (getter(row),)
+            if not all(v.strip() for v in values):
+                continue
+            try:
+                if comma:
+                    for append, v in zip(appends, values):
+                        append(float(v.replace(',', '.')))
+                else:
+                    for append, v in zip(appends, values):
+                        append(float(v))
+            except ValueError:
+                raise ValueError(f"Fila {line_no}: valor no numérico en {values}.")
+
+    # array('d') -> NumPy sin copiar
+    return {name: np.frombuffer(buf, dtype=np.float64) for name, buf in zip(columns, buffers)}
+
+
+
+# --- TXT de ancho fijo o separados por espacios (archivo mapeado) ---
+
+# Longitud máxima de un valor que se convierte en bloque; los más largos
+# (o con exponente) se convierten uno a uno con float()
+_MAX_TOKEN = 24
+_MAX_EXACT_DIGITS = 15
+_POW10 = 10.0 ** np.arange(23)
+
+_SPACE, _TAB, _CR, _LF = 32, 9, 13, 10
+
+# Clase de cada byte: 0-9 dígito, 10 separador decimal, 11 '-', 12 '+',
+# 13 blanco, 14 otro carácter
+_DIGIT_MAX, _POINT, _MINUS, _PLUS, _BLANK, _OTHER = 9, 10, 11, 12, 13, 14
+_CHAR_CLASS = np.full(256, _OTHER, dtype=np.uint8)
+_CHAR_CLASS[48:58] = np.arange(10)
+_CHAR_CLASS[[46, 44]] = _POINT
+_CHAR_CLASS[45] = _MINUS
+_CHAR_CLASS[43] = _PLUS
+_CHAR_CLASS[[_SPACE, _TAB, _CR]] = _BLANK
+
+
+def _parse_numbers(buf, starts, ends, line_numbers, trimmed=False):
+    """
+    Convierte a float64 los campos buf[starts:ends] sin crear cadenas.
+
+    Se recorre el campo columna a columna (carácter j de todos los campos a la
+    vez) acumulando la mantisa entera y los decimales. Con hasta 15 dígitos la
+    mantisa es exacta en float64 y mantisa / 10**decimales queda correctamente
+    redondeado, igual que float(). Se acepta '.' o ',' como separador decimal
+    y blancos alrededor del número (trimmed=True indica que los campos ya
+    vienen sin blancos, como al separar por espacios).
+    """
+    n = len(starts)
+    if n == 0:
+        return np.empty(0, dtype=np.float64)
+
+    lengths = ends - starts
+    width = int(min(lengths.max(), _MAX_TOKEN))
+    shortest = int(lengths.min())
+    last = len(buf) - 1
+
+    mantissa = np.zeros(n, dtype=np.int64)
+    n_digits = np.zeros(n, dtype=np.int64)
+    frac = np.zeros(n, dtype=np.int64)
+    n_points = np.zeros(n, dtype=np.int64)
+    negative = np.zeros(n, dtype=bool)
+    started = np.zeros(n, dtype=bool)
+    ended = np.zeros(n, dtype=bool)
+    bad = lengths > width
+
+    for j in range(width):
+        if j < shortest:
+            cls = _CHAR_CLASS[buf[starts + j]]
+        else:
+            cls = _CHAR_CLASS[buf[np.minimum(starts + j, last)]]
+            cls[lengths <= j] = _BLANK
+        digit = cls <= _DIGIT_MAX
+        minus = cls == _MINUS
+        sign = minus | (cls == _PLUS)
+
+        # Solo blancos alrededor del número y signo solo al principio
+        bad |= cls == _OTHER
+        if trimmed:
+            if j:
+                bad |= sign
+        else:
+            filled = cls != _BLANK
+            bad |= (filled & ended) | (sign & started)
+            ended |= started & ~filled
+            started |= filled
+
+        np.copyto(mantissa, mantissa * 10 + cls, where=digit)
+        n_digits += digit
+        frac += digit & (n_points > 0)
+        n_points += cls == _POINT
+        negative |= minus
+
+    ok = ~bad & (n_digits > 0) & (n_digits <= _MAX_EXACT_DIGITS) & (n_points <= 1)
+    result = mantissa / _POW10[np.minimum(frac, len(_POW10) - 1)]
+    np.negative(result, out=result, where=negative)
+
+    for k in np.flatnonzero(~ok):
+        text = bytes(buf[starts[k]:ends[k]]).decode('latin-1').strip().replace(',', '.')
+        try:
+            result[k] = float(text)
+        except ValueError:
+            raise ValueError(f"Fila {line_numbers[k]}: valor no numérico '{text}'.")
+    return result
+
+
+def _whitespace_fields(buf, line_starts, indices):
+    """Inicio y fin de los campos pedidos en cada línea, separando por espacios."""
+    blank = (buf == _SPACE) | (buf == _TAB) | (buf == _CR) | (buf == _LF)
+    before = np.empty_like(blank)
+    before[0] = True
+    before[1:] = blank[:-1]
+    after = np.empty_like(blank)
+    after[-1] = True
+    after[:-1] = blank[1:]
+    starts = np.flatnonzero(~blank & before)
+    ends = np.flatnonzero(~blank & after) + 1
+    del blank, before, after
+
+    # Línea de cada campo y posición del campo dentro de la línea
+    line = np.searchsorted(line_starts, starts, side='right') - 1
+    order = np.arange(len(starts))
+    new_line = np.ones(len(starts), dtype=bool)
+    new_line[1:] = line[1:] != line[:-1]
+    field = order - np.maximum.accumulate(np.where(new_line, order, 0))
+
+    n_lines = len(line_starts)
+    counts = np.bincount(line, minlength=n_lines)
+    used = counts > 0
+    short = used & (counts <= max(indices))
+    if short.any():
+        raise ValueError("faltan columnas", int(np.flatnonzero(short)[0]))
+
+    selected = []
+    for index in indices:
+        mask = field == index
+        selected.append((starts[mask], ends[mask]))
+    return selected, np.flatnonzero(used)
+
+
+def _fixed_width_fields(buf, line_starts, line_ends, indices, colspecs):
+    """Inicio y fin de los campos pedidos en cada línea según colspecs."""
+    lengths = line_ends - line_starts
+    used = lengths > 0
+    selected = []
+    for index in indices:
+        begin, end = colspecs[index]
+        s = line_starts + begin
+        e = np.minimum(line_starts + end, line_ends)
+        empty = e <= s
+        if empty.any():
+            # Campo en blanco o fuera de la línea: la fila se omite
+            used &= ~empty
+        selected.append((s, np.maximum(e, s)))
+
+    # Campos formados solo por espacios: también se omiten
+    for s, e in selected:
+        width = int(min((e - s).max(initial=0), _MAX_TOKEN))
+        if width == 0:
+            continue
+        cols = np.arange(width)
+        chars = np.where(cols < (e - s)[:, None], buf[np.minimum(s[:, None] + cols, len(buf) - 1)], _SPACE)
+        used &= (chars != _SPACE).any(axis=1) | ((e - s) > width)
+
+    rows = np.flatnonzero(used)
+    return [(s[rows], e[rows]) for s, e in selected], rows
+
+
+def _skip_lines(mm, count):
+    pos = 0
+    for _ in range(count):
+        nl = mm.find(b'\n', pos)
+        if nl < 0:
+            return len(mm)
+        pos = nl + 1
+    return pos
+
+
+def read_txt_columns(path, columns, colspecs=None, skip_lines=0, block_size=TXT_BLOCK_SIZE):
+    """
+    Lee columnas numéricas de un TXT de estación total o GNSS mapeándolo en memoria.
+
+    El archivo se recorre en bloques de block_size bytes terminados en salto
+    de línea; cada bloque se ve como un arreglo uint8 sobre el mapa (sin
+    copia) y los campos se localizan y convierten con NumPy, sin crear una
+    cadena por línea. Los arreglos de salida se reservan según los bytes por
+    línea del primer bloque, así que la memoria es la de la salida más la de
+    un bloque, independientemente del tamaño del archivo.
+
+    Args:
+        path: Ruta del archivo
+        columns: Índices (base 0) de las columnas a leer
+        colspecs: Lista de (inicio, fin) en bytes de cada columna para archivos
+            de ancho fijo; si es None las columnas se separan por espacios
+        skip_lines: Líneas de encabezado a omitir
+        block_size: Bytes por bloque
+
+    Returns:
+        list: Un np.ndarray float64 por columna pedida
+
+    Raises:
+        ValueError: Si una línea no tiene las columnas pedidas o un valor no es numérico
+    """
+    columns = list(columns)
+    if colspecs is not None and max(columns) >= len(colspecs):
+        raise ValueError("Hay columnas pedidas sin definición de ancho fijo.")
+
+    outputs = [np.empty(0, dtype=np.float64) for _ in columns]
+    filled = 0
+    if os.path.getsize(path) == 0:
+        return outputs
+
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            size = len(mm)
+            pos = _skip_lines(mm, skip_lines)
+            if mm[:3] == b'\xef\xbb\xbf' and pos == 0:
+                pos = 3
+            first_line = skip_lines + 1
+
+            while pos < size:
+                # El bloque termina en el último salto de línea antes del límite
+                limit = pos + block_size
+                if limit >= size:
+                    end = size
+                else:
+                    end = mm.rfind(b'\n', pos, limit)
+                    if end < 0:
+                        # Línea más larga que el bloque
+                        end = mm.find(b'\n', limit)
+                        end = size if end < 0 else end
+                block = np.frombuffer(mm, dtype=np.uint8, count=end - pos, offset=pos)
+
+                newlines = np.flatnonzero(block == _LF)
+                line_starts = np.concatenate(([0], newlines + 1))
+                line_ends = np.concatenate((newlines, [len(block)]))
+                if line_starts[-1] >= len(block):
+                    line_starts, line_ends = line_starts[:-1], line_ends[:-1]
+                # Fin de línea Windows
+                has_cr = (line_ends > line_starts) & (block[np.maximum(line_ends - 1, 0)] == _CR)
+                line_ends = line_ends - has_cr
+
+                try:
+                    if colspecs is None:
+                        fields, rows = _whitespace_fields(block, line_starts, columns)
+                    else:
+                        fields, rows = _fixed_width_fields(block, line_starts, line_ends, columns, colspecs)
+                except ValueError as e:
+                    if len(e.args) == 2:
+                        raise ValueError(f"Fila {first_line + e.args[1]}: {e.args[0]}.")
+                    raise
+
+                line_numbers = first_line + rows
+                count = len(rows)
+                if filled + count > len(outputs[0]):
+                    # Capacidad estimada con los bytes por línea de lo leído
+                    per_line = (end - pos) / max(len(line_starts), 1)
+                    estimate = int((size - pos) / max(per_line, 1.0) * 1.05)
+                    capacity = max(filled + count, filled + estimate, int(len(outputs[0]) * 1.5))
+                    outputs = [_grow(out, filled, capacity) for out in outputs]
+                for out, (starts, ends) in zip(outputs, fields):
+                    out[filled:filled + count] = _parse_numbers(block, starts, ends, line_numbers, trimmed=colspecs is None)
+                filled += count
+
+                first_line += len(line_starts)
+                del block, newlines, line_starts, line_ends, has_cr, fields
+                pos = end + 1
+        finally:
+            try:
+                mm.close()
+            except BufferError:
+                # Aún hay vistas vivas (p. ej. en el traceback de un error)
+                pass
+
+    return [out[:filled] for out in outputs]
+
+
+def _grow(values, filled, capacity):
+    grown = np.empty(capacity, dtype=values.dtype)
+    grown[:filled] = values[:filled]
+    return grown
+
+def _import_openpyxl():
+    """openpyxl es opcional: sin él los Excel se leen con pandas."""
+    try:
+        import openpyxl
+    except ImportError:
+        return None
+    return openpyxl
+
+
+def has_excel_streaming(path):
+    """True si el archivo puede leerse en streaming (.xlsx con openpyxl)."""
+    return path.lower().endswith('.xlsx') and _import_openpyxl() is not None
+
+
+def _excel_header(sheet):
+    first = next(sheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+    return ["" if v is None else str(v).strip() for v in first]
+
+
+def excel_columns(path, sheet=None):
+    """
+    Nombres de columna (primera fila) de una hoja Excel, sin leer el resto.
+
+    Args:
+        path: Ruta del archivo .xlsx
+        sheet: Nombre de la hoja (por defecto la activa)
+
+    Returns:
+        list: Nombres de columna
+    """
+    openpyxl = _import_openpyxl()
+    if openpyxl is None:
+        raise ImportError("La librería 'openpyxl' no está instalada.")
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        return _excel_header(workbook[sheet] if sheet else workbook.active)
+    finally:
+        workbook.close()
+
+
+def _excel_float(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float(str(value).strip().replace(',', '.'))
+
+
+def read_excel_columns(path, columns, id_column=None, sheet=None, progress=None):
+    """
+    Lee en streaming (modo solo lectura de openpyxl) las columnas indicadas.
+
+    Solo se recorre el rango de columnas entre la primera y la última pedida
+    y cada valor va directo a un array('d'); el resto de la hoja nunca se
+    materializa. Las filas con alguna coordenada vacía se omiten.
+
+    Args:
+        path: Ruta del archivo .xlsx
+        columns: Columnas numéricas a leer (p. ej. [x_col, y_col])
+        id_column: Columna opcional de identificadores (se conserva el valor)
+        sheet: Nombre de la hoja (por defecto la activa)
+        progress: Función progress(fracción 0-1) llamada cada
+            EXCEL_PROGRESS_STEP filas; recibe None si la hoja no declara
+            su tamaño (archivos no generados por Excel)
+
+    Returns:
+        dict: Nombre de columna -> np.ndarray (float64; object para id_column)
+
+    Raises:
+        ImportError: Si openpyxl no está instalado
+        ValueError: Si falta una columna o un valor no es numérico
+    """
+    openpyxl = _import_openpyxl()
+    if openpyxl is None:
+        raise ImportError("La librería 'openpyxl' no está instalada.")
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = workbook[sheet] if sheet else workbook.active
+        names = _excel_header(ws)
+        wanted = list(columns) + ([id_column] if id_column else [])
+        missing = [c for c in wanted if c not in names]
+        if missing:
+            raise ValueError(f"Columnas no encontradas en el archivo: {', '.join(missing)}")
+
+        indices = [names.index(c) for c in wanted]
+        first_col = min(indices)
+        offsets = [i - first_col for i in indices]
+        n_numeric = len(columns)
+        last_offset = max(offsets)
+
+        buffers = [array('d') for _ in columns]
+        appends = [b.append for b in buffers]
+        ids = []
+        # En modo solo lectura max_row sale de la dimensión declarada (puede faltar)
+        total_rows = ws.max_row or 0
+
+        rows = ws.iter_rows(
+            min_row=2, min_col=first_col + 1, max_col=first_col + last_offset + 1,
+            values_only=True
+        )
+        for row_no, row in enumerate(rows, start=2):
+            if progress is not None and row_no % EXCEL_PROGRESS_STEP == 0:
+                progress(min(row_no / total_rows, 1.0) if total_rows else None)
+            if len(row) <= last_offset:
+                row = tuple(row) + (None,) * (last_offset + 1 - len(row))
+            values = [row[k] for k in offsets]
+            if any(v is None or v == '' for v in values[:n_numeric]):
+                continue
+            try:
+                for append, v in zip(appends, values):
+                    append(_excel_float(v))
+            except ValueError:
+                raise ValueError(f"Fila {row_no}: valor no numérico en {values[:n_numeric]}.")
+            if id_column:
+                ids.append(values[-1])
+    finally:
+        workbook.close()
+
+    if progress is not None:
+        progress(1.0)
+
+    result = {name: np.frombuffer(buf, dtype=np.float64) for name, buf in zip(columns, buffers)}
+    if id_column:
+        result[id_column] = np.array(ids, dtype=object)
+    return result
+
+class ParsedInputCache:
+    """
+    Caché LRU en memoria de columnas ya leídas, acotada por bytes.
+
+    La clave es (ruta absoluta, tamaño, mtime_ns): al modificar el archivo en
+    disco cambia la clave y la entrada anterior de esa ruta se descarta. Cada
+    entrada guarda el dialecto detectado y las combinaciones de columnas
+    pedidas hasta ahora; las columnas se devuelven de solo lectura porque se
+    comparten entre llamadas.
+    """
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._keys_by_path = {}
+        self._nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def clear(self):
+        self._entries.clear()
+        self._keys_by_path.clear()
+        self._nbytes = 0
+
+    def get_dialect(self, path):
+        """Dialecto de sniff_csv para el archivo, detectado una sola vez."""
+        entry = self._entry(path)
+        if entry['dialect'] is None:
+            entry['dialect'] = sniff_csv(path)
+        return entry['dialect']
+
+    def get_columns(self, path, columns, loader=None):
+        """
+        Devuelve las columnas pedidas, leyéndolas del disco solo la primera vez.
+
+        Las columnas se guardan por combinación pedida: los lectores omiten las
+        filas con algún valor vacío, así que una columna solo está alineada con
+        las que se leyeron junto a ella.
+
+        Args:
+            path: Ruta del archivo
+            columns: Nombres de columna
+            loader: Función loader(columnas) -> dict nombre -> arreglo.
+                Por defecto read_csv_columns con el dialecto en caché.
+
+        Returns:
+            dict: Nombre de columna -> np.ndarray float64 (solo lectura)
+        """
+        entry = self._entry(path)
+        key = tuple(columns)
+        data = entry['columns'].get(key)
+        if data is None:
+            self.misses += 1
+            if loader is None:
+                dialect = self.get_dialect(path)
+                loader = lambda names: read_csv_columns(path, names, dialect)
+            data = loader(list(columns))
+            for values in data.values():
+                values.setflags(write=False)
+                entry['nbytes'] += values.nbytes
+                self._nbytes += values.nbytes
+            entry['columns'][key] = data
+            self._evict()
+        else:
+            self.hits += 1
+        return {c: data[c] for c in columns}
+
+    def _entry(self, path):
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+
+        # Archivo modificado: la versión anterior ya no sirve
+        old_key = self._keys_by_path.pop(path, None)
+        if old_key is not None:
+            self._drop(old_key)
+
+        entry = {'dialect': None, 'columns': {}, 'nbytes': 0}
+        self._entries[key] = entry
+        self._keys_by_path[path] = key
+        return entry
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._nbytes -= entry['nbytes']
+        if self._keys_by_path.get(key[0]) == key:
+            del self._keys_by_path[key[0]]
+
+    def _evict(self):
+        # Se conserva siempre la entrada más reciente aunque supere el límite
+        while self._nbytes > self.max_bytes and len(self._entries) > 1:
+            self._drop(next(iter(self._entries)))
+
+
+# Caché compartida por el diálogo durante la sesión de QGIS
+INPUT_CACHE = ParsedInputCache()
@@ -2,23 +2,54 @@
 Algoritmo para crear Polígono y Puntos desde CSV/Tabla
 Compatible con Qt5/Qt6 y QGIS 3.x/4.x
 """
+import os
+from array import array
+from itertools import repeat
+from operator import itemgetter
+
+import numpy as np
 from qgis.PyQt.QtCore import QCoreApplication, QVariant
 from qgis.core import (
     QgsProcessing,
-    QgsFeatureSink,
     QgsProcessingAlgorithm,
     QgsProcessingParameterFeatureSource,
     QgsProcessingParameterFeatureSink,
     QgsProcessingParameterField,
     QgsProcessingParameterCrs,
+    QgsProcessingParameterBoolean,
+    QgsProcessingParameterExpression,
+    QgsProcessingFeatureSourceDefinition,
+    QgsProviderRegistry,
     QgsFeature,
     QgsGeometry,
     QgsPointXY,
     QgsFields,
     QgsField,
-    QgsWkbTypes
+    QgsWkbTypes,
+    NULL
 )
 
+from .feature_buffer import BufferedFeatureWriter
+from .feature_request import build_request
+from .sidecar_cache import file_hash, load_sidecar, write_sidecar
+
+# Lector que escribe las cachés binarias de este algoritmo
+SIDECAR_READER = "qgis_feature_source"
+ROW_COLUMN = "_fila"
+GROUP_COLUMN = "_grupo"
+ORDER_COLUMN = "_orden"
+
+# Filas entre actualizaciones de la barra de progreso
+PROGRESS_ROWS = 5000
+
+
+def _to_float(value):
+    """Convierte un valor de la tabla a número (acepta texto con coma decimal)."""
+    if isinstance(value, str):
+        value = value.replace(',', '.')
+    return float(value)
+
+
 class CreatePolygonFromTableAlgorithm(QgsProcessingAlgorithm):
     """
     Crea un polígono y sus vértices a partir de una tabla de coordenadas secuenciales.
@@ -27,7 +58,12 @@ class CreatePolygonFromTableAlgorithm(QgsProcessingAlgorithm):
     INPUT = 'INPUT'
     X_FIELD = 'X_FIELD'
     Y_FIELD = 'Y_FIELD'
+    GROUP_FIELD = 'GROUP_FIELD'
+    ORDER_FIELD = 'ORDER_FIELD'
+    SORTED_INPUT = 'SORTED_INPUT'
+    FILTER = 'FILTER'
     CRS = 'CRS'
+    USE_SIDECAR = 'USE_SIDECAR'
     OUTPUT_POLYGON = 'OUTPUT_POLYGON'
     OUTPUT_POINTS = 'OUTPUT_POINTS'
 
@@ -58,6 +94,43 @@ class CreatePolygonFromTableAlgorithm(QgsProcessingAlgorithm):
             )
         )
         
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.GROUP_FIELD,
+                self.tr('Campo de agrupación (un polígono por valor)'),
+                parentLayerParameterName=self.INPUT,
+                type=QgsProcessingParameterField.Any,
+                optional=True
+            )
+        )
+        
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.ORDER_FIELD,
+                self.tr('Campo de orden de los vértices'),
+                parentLayerParameterName=self.INPUT,
+                type=QgsProcessingParameterField.Any,
+                optional=True
+            )
+        )
+        
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                self.SORTED_INPUT,
+                self.tr('La tabla ya está ordenada por el campo de agrupación'),
+                defaultValue=False
+            )
+        )
+        
+        self.addParameter(
+            QgsProcessingParameterExpression(
+                self.FILTER,
+                self.tr('Filtro de filas (expresión, opcional)'),
+                parentLayerParameterName=self.INPUT,
+                optional=True
+            )
+        )
+        
         self.addParameter(
             QgsProcessingParameterCrs(
                 self.CRS,
@@ -66,6 +139,14 @@ class CreatePolygonFromTableAlgorithm(QgsProcessingAlgorithm):
             )
         )
         
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                self.USE_SIDECAR,
+                self.tr('Usar caché binaria junto al archivo (.arcgeek)'),
+                defaultValue=False
+            )
+        )
+        
         self.addParameter(
             QgsProcessingParameterFeatureSink(
                 self.OUTPUT_POLYGON,
@@ -86,6 +167,10 @@ class CreatePolygonFromTableAlgorithm(QgsProcessingAlgorithm):
         source = self.parameterAsSource(parameters, self.INPUT, context)
         x_field = self.parameterAsString(parameters, self.X_FIELD, context)
         y_field = self.parameterAsString(parameters, self.Y_FIELD, context)
+        group_field = self.parameterAsString(parameters, self.GROUP_FIELD, context)
+        order_field = self.parameterAsString(parameters, self.ORDER_FIELD, context)
+        sorted_input = self.parameterAsBool(parameters, self.SORTED_INPUT, context)
+        expression = self.parameterAsExpression(parameters, self.FILTER, context)
         crs = self.parameterAsCrs(parameters, self.CRS, context)
         
         # DEFINIR CAMPOS DE SALIDA (POINTS)
@@ -99,6 +184,14 @@ class CreatePolygonFromTableAlgorithm(QgsProcessingAlgorithm):
         fields_poly.append(QgsField('id', QVariant.Int))
         fields_poly.append(QgsField('num_vertices', QVariant.Int))
         
+        # El campo de agrupación se copia a ambas capas para enlazar vértices y polígonos
+        if group_field:
+            group_def = QgsField(source.fields().field(group_field))
+            if group_def.name() in ('id', 'x', 'y', 'num_vertices'):
+                group_def.setName(f"{group_def.name()}_grupo")
+            fields_points.append(group_def)
+            fields_poly.append(QgsField(group_def))
+        
         # CREAR SINKS
         (sink_poly, dest_id_poly) = self.parameterAsSink(
             parameters, self.OUTPUT_POLYGON, context,
@@ -112,71 +205,265 @@ class CreatePolygonFromTableAlgorithm(QgsProcessingAlgorithm):
         
         if sink_poly is None or sink_pts is None:
             return {}
+        
+        # Escritura por bloques (addFeatures) en lugar de una llamada por entidad
+        points_writer = BufferedFeatureWriter(sink_pts, feedback=feedback)
+        polygons_writer = BufferedFeatureWriter(sink_poly, feedback=feedback)
 
-        features = source.getFeatures()
-        points = []
+        # Caché binaria: solo para tablas leídas completas desde un archivo
+        source_path = None
+        source_hash = None
+        cached = None
+        if self.parameterAsBool(parameters, self.USE_SIDECAR, context) and not expression:
+            source_path, dialect = self._source_file(parameters, context)
+            if source_path:
+                # Los campos de grupo y orden cambian las filas válidas: forman parte de la caché
+                dialect['group_field'] = group_field or None
+                dialect['order_field'] = order_field or None
+                names = [x_field, y_field, ROW_COLUMN]
+                if group_field:
+                    names.append(GROUP_COLUMN)
+                if order_field:
+                    names.append(ORDER_COLUMN)
+                source_hash = file_hash(source_path)
+                cached = load_sidecar(source_path, names, SIDECAR_READER, source_hash)
+                # La caché de otra configuración de la capa (hoja, delimitador...) no sirve
+                if cached is not None and {k: cached[1].get(k) for k in dialect} != dialect:
+                    cached = None
+        
+        if cached is not None:
+            feedback.pushInfo("Leyendo coordenadas desde la caché binaria...")
+            records = self._cached_records(cached[0], cached[1], x_field, y_field, group_field, order_field)
+            total = len(cached[0][x_field])
+            collect = None
+        else:
+            feedback.pushInfo("Leyendo coordenadas...")
+            records = self._read_records(source, x_field, y_field, group_field, order_field, expression, feedback)
+            total = source.featureCount()
+            # Columnas para la caché: X, Y, fila, índice del grupo y orden
+            collect = (array('d'), array('d'), array('q'), array('q'), array('d'), {}) if source_path else None
         
-        # Recorrer features para extraer puntos
-        feedback.pushInfo("Leyendo coordenadas...")
+        total = max(total, 1)
+        counts = {'polygons': 0, 'points': 0}
         
-        count = 0
-        total = source.featureCount() if source.featureCount() > 0 else 100
+        def write_group(key, group):
+            counts['points'] += len(group)
+            if self._write_group(key, group, polygon_id=counts['polygons'] + 1,
+                                 points_writer=points_writer, polygons_writer=polygons_writer,
+                                 grouped=bool(group_field), sort=bool(order_field), feedback=feedback):
+                counts['polygons'] += 1
         
-        for i, feature in enumerate(features):
+        # Una sola pasada: con la tabla ordenada por grupo solo se guarda en
+        # memoria el grupo actual; si no, cada grupo se acumula hasta el final
+        groups = {}
+        current_key = None
+        current = []
+        finished = set()
+        for k, (key, order, row, x, y) in enumerate(records):
             if feedback.isCanceled():
                 break
-                
-            try:
-                # Intentar obtener como número, si falla es None
-                val_x = feature[x_field]
-                val_y = feature[y_field]
-                
-                # Manejo de valores string que puedan venir del CSV
-                if isinstance(val_x, str): val_x = float(val_x.replace(',', '.'))
-                if isinstance(val_y, str): val_y = float(val_y.replace(',', '.'))
-                
-                x = float(val_x)
-                y = float(val_y)
-                
-                pt = QgsPointXY(x, y)
-                points.append(pt)
-                
-                # Crear Feature de Punto
-                f_pt = QgsFeature()
-                f_pt.setGeometry(QgsGeometry.fromPointXY(pt))
-                f_pt.setAttributes([i + 1, x, y])
-                sink_pts.addFeature(f_pt, QgsFeatureSink.FastInsert)
-                
-                count += 1
-            except (ValueError, TypeError):
-                feedback.reportError(f"Fila {i+1}: Valor inválido en coordenadas (se omite).")
-                continue
-                
-            feedback.setProgress(int(i / total * 50))
-
-        if len(points) < 3:
-            feedback.reportError("Se requieren al menos 3 puntos válidos para crear un polígono.")
+            
+            if collect is not None:
+                xs, ys, rows, group_ids, orders, keys = collect
+                xs.append(x)
+                ys.append(y)
+                rows.append(row)
+                group_ids.append(keys.setdefault(key, len(keys)))
+                orders.append(order)
+            
+            if not sorted_input:
+                groups.setdefault(key, []).append((order, row, x, y))
+            else:
+                if key != current_key or not current:
+                    if current:
+                        write_group(current_key, current)
+                        finished.add(current_key)
+                        current = []
+                    if key in finished:
+                        feedback.reportError(
+                            f"Fila {row + 1}: el grupo {key} aparece de nuevo; la tabla no está "
+                            f"ordenada por '{group_field}' y se creará otro polígono para este grupo."
+                        )
+                    current_key = key
+                current.append((order, row, x, y))
+            
+            if k % PROGRESS_ROWS == 0:
+                feedback.setProgress(int(k / total * 90))
+        
+        if feedback.isCanceled():
             return {}
+        
+        if current:
+            write_group(current_key, current)
+        for key, group in groups.items():
+            if feedback.isCanceled():
+                return {}
+            write_group(key, group)
+        if not (points_writer.flush() and polygons_writer.flush()):
+            return {}
+        
+        if collect is not None:
+            self._write_cache(source_path, dialect, source_hash, x_field, y_field,
+                              group_field, order_field, collect, feedback)
+        
+        if not group_field and counts['polygons'] == 0:
+            return {}
+        if group_field:
+            feedback.pushInfo(f"Se crearon {counts['polygons']} polígonos con {counts['points']} vértices.")
+        
+        feedback.setProgress(100)
+        
+        return {
+            self.OUTPUT_POLYGON: dest_id_poly,
+            self.OUTPUT_POINTS: dest_id_pts
+        }
+
+    def _write_group(self, key, group, polygon_id, points_writer, polygons_writer, grouped, sort, feedback):
+        """
+        Escribe los vértices de un grupo y su polígono.
+        
+        Args:
+            key: Valor del campo de agrupación (None sin agrupación)
+            group: Lista de tuplas (orden, fila, x, y)
+            polygon_id: Identificador del polígono
+            points_writer, polygons_writer: BufferedFeatureWriter de cada capa
+            grouped: Si es True se añade el valor del grupo a los atributos
+            sort: Ordenar los vértices por el campo de orden
+        
+        Returns:
+            bool: True si se creó el polígono
+        """
+        if sort:
+            # Orden estable: los empates conservan el orden de la tabla
+            group.sort(key=itemgetter(0))
+        extra = [key] if grouped else []
+        
+        points = []
+        for _, row, x, y in group:
+            pt = QgsPointXY(x, y)
+            points.append(pt)
             
+            # Crear Feature de Punto
+            f_pt = QgsFeature()
+            f_pt.setGeometry(QgsGeometry.fromPointXY(pt))
+            f_pt.setAttributes([row + 1, x, y] + extra)
+            points_writer.add(f_pt)
+
+        if len(points) < 3:
+            if grouped:
+                feedback.reportError(f"Grupo {key}: se requieren al menos 3 puntos válidos (se omite el polígono).")
+            else:
+                feedback.reportError("Se requieren al menos 3 puntos válidos para crear un polígono.")
+            return False
+        
         # Crear Polígono
-        feedback.pushInfo(f"Creando polígono con {len(points)} vértices...")
+        if not grouped:
+            feedback.pushInfo(f"Creando polígono con {len(points)} vértices...")
         
         # Cerrar el polígono si es necesario
-        poly_points = points[:]
-        if poly_points[0] != poly_points[-1]:
-            poly_points.append(poly_points[0])
+        if points[0] != points[-1]:
+            points.append(points[0])
             
         f_poly = QgsFeature()
-        f_poly.setGeometry(QgsGeometry.fromPolygonXY([poly_points]))
-        f_poly.setAttributes([1, count])
-        sink_poly.addFeature(f_poly, QgsFeatureSink.FastInsert)
+        f_poly.setGeometry(QgsGeometry.fromPolygonXY([points]))
+        f_poly.setAttributes([polygon_id, len(group)] + extra)
+        polygons_writer.add(f_poly)
+        return True
+
+    def _read_records(self, source, x_field, y_field, group_field, order_field, expression, feedback):
+        """
+        Recorre las entidades de la tabla.
         
-        feedback.setProgress(100)
+        Solo se piden al proveedor los campos usados, sin geometría, y el
+        filtro se resuelve en el proveedor cuando es posible.
         
-        return {
-            self.OUTPUT_POLYGON: dest_id_poly,
-            self.OUTPUT_POINTS: dest_id_pts
+        Yields:
+            tuple: (grupo, orden, fila, x, y) de cada fila válida; fila es el
+                índice en la tabla, grupo es None sin campo de agrupación y
+                orden es la fila sin campo de orden
+        """
+        request = build_request(
+            source.fields(), [x_field, y_field, group_field, order_field],
+            geometry=False, expression=expression
+        )
+        for i, feature in enumerate(source.getFeatures(request)):
+            if feedback.isCanceled():
+                return
+                
+            try:
+                # Manejo de valores string que puedan venir del CSV
+                x = _to_float(feature[x_field])
+                y = _to_float(feature[y_field])
+            except (ValueError, TypeError):
+                feedback.reportError(f"Fila {i+1}: Valor inválido en coordenadas (se omite).")
+                continue
+            
+            order = i
+            if order_field:
+                try:
+                    order = _to_float(feature[order_field])
+                except (ValueError, TypeError):
+                    feedback.reportError(f"Fila {i+1}: Valor inválido en el campo de orden (se omite).")
+                    continue
+            
+            key = None
+            if group_field:
+                key = feature[group_field]
+                if key is None or key == NULL:
+                    feedback.reportError(f"Fila {i+1}: Sin valor en el campo de agrupación (se omite).")
+                    continue
+            
+            yield key, order, i, x, y
+
+    def _cached_records(self, columns, dialect, x_field, y_field, group_field, order_field):
+        """Filas de la caché binaria con la misma forma que _read_records."""
+        xs, ys, rows = columns[x_field].tolist(), columns[y_field].tolist(), columns[ROW_COLUMN].tolist()
+        if group_field:
+            keys = dialect['group_keys']
+            group_values = map(keys.__getitem__, columns[GROUP_COLUMN].tolist())
+        else:
+            group_values = repeat(None)
+        orders = columns[ORDER_COLUMN].tolist() if order_field else rows
+        return zip(group_values, orders, rows, xs, ys)
+
+    def _write_cache(self, source_path, dialect, source_hash, x_field, y_field,
+                     group_field, order_field, collect, feedback):
+        """Guarda las columnas leídas en la caché binaria junto al archivo."""
+        xs, ys, rows, group_ids, orders, keys = collect
+        columns = {
+            x_field: np.frombuffer(xs, dtype=np.float64),
+            y_field: np.frombuffer(ys, dtype=np.float64),
+            ROW_COLUMN: np.frombuffer(rows, dtype=np.int64)
         }
+        if group_field:
+            # Los valores del grupo se guardan una vez en la cabecera JSON
+            if not all(isinstance(key, (int, float, str)) for key in keys):
+                feedback.pushInfo("El tipo del campo de agrupación no admite caché binaria.")
+                return
+            dialect = dict(dialect, group_keys=list(keys))
+            columns[GROUP_COLUMN] = np.frombuffer(group_ids, dtype=np.int64)
+        if order_field:
+            columns[ORDER_COLUMN] = np.frombuffer(orders, dtype=np.float64)
+        write_sidecar(source_path, columns, dialect, SIDECAR_READER, source_hash)
+
+    def _source_file(self, parameters, context):
+        """
+        Archivo de la tabla de entrada y configuración de la capa.
+        
+        Returns:
+            tuple: (ruta, {'provider', 'uri'}), o (None, None) si la tabla no
+                se lee completa desde un archivo (capa en memoria, selección o filtro)
+        """
+        definition = parameters.get(self.INPUT)
+        if isinstance(definition, QgsProcessingFeatureSourceDefinition) and definition.selectedFeaturesOnly:
+            return None, None
+        layer = self.parameterAsVectorLayer(parameters, self.INPUT, context)
+        if layer is None or layer.subsetString():
+            return None, None
+        path = QgsProviderRegistry.instance().decodeUri(layer.providerType(), layer.source()).get('path')
+        if not path or not os.path.isfile(path):
+            return None, None
+        return path, {'provider': layer.providerType(), 'uri': layer.source()}
 
     def name(self):
         return 'create_polygon_from_table'
@@ -204,6 +491,19 @@ class CreatePolygonFromTableAlgorithm(QgsProcessingAlgorithm):
         
         <p><b>Nota:</b> El orden de los puntos en la tabla determina la forma del polígono. 
         Asegúrese de que estén ordenados (horario o antihorario) para evitar geometrías cruzadas.</p>
+        
+        <p><b>Varios polígonos:</b> con un <i>campo de agrupación</i> (p. ej. <i>Poligono_ID</i>) se crea
+        un polígono por cada valor, y el <i>campo de orden</i> (p. ej. <i>Punto_ID_H</i>) ordena los
+        vértices de cada grupo. Si la tabla ya está ordenada por el campo de agrupación, marque la
+        opción correspondiente: cada polígono se escribe en cuanto termina su grupo y solo se mantiene
+        un grupo en memoria.</p>
+        
+        <p><b>Caché binaria:</b> si se activa, las coordenadas leídas se guardan junto al archivo
+        (<i>archivo.csv.arcgeek</i>) y las siguientes ejecuciones las cargan directamente mientras
+        el archivo no cambie. No se usa con un filtro de filas.</p>
+        
+        <p><b>Filtro:</b> expresión opcional para procesar solo algunas filas (p. ej.
+        <i>"Poligono_ID" &lt; 100</i>); se evalúa en el proveedor de datos cuando es posible.</p>
         """)
 
     def tr(self, string):
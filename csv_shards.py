@@ -0,0 +1,216 @@
+"""
+Escritura de CSV en partes (shards) con compresión opcional
+Compatible con Qt5/Qt6 y QGIS 3.x/4.x
+"""
+import csv
+import gzip
+import io
+import json
+import os
+
+
+COMPRESSIONS = ('none', 'gzip', 'zstd')
+COMPRESSION_SUFFIX = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
+
+# Tamaño del búfer de escritura de cada archivo
+WRITE_BUFFER = 1024 * 1024
+
+
+def _import_zstandard():
+    """zstandard es opcional: sin él solo hay compresión gzip."""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def has_zstd():
+    """True si está disponible la compresión zstd."""
+    return _import_zstandard() is not None
+
+
+def _open_binary(path, compression):
+    """
+    Abre 'path' para escribir, comprimiendo al vuelo.
+
+    Returns:
+        tuple: (flujo binario con búfer, archivo en disco)
+    """
+    raw = open(path, 'wb')
+    try:
+        if compression == 'gzip':
+            # Nivel 6: casi la compresión del 9 con bastante menos CPU
+            stream = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6)
+        elif compression == 'zstd':
+            zstandard = _import_zstandard()
+            if zstandard is None:
+                raise ImportError("La compresión zstd requiere la librería 'zstandard'.")
+            stream = zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=False)
+        else:
+            return io.BufferedWriter(raw, WRITE_BUFFER), raw
+        return io.BufferedWriter(stream, WRITE_BUFFER), raw
+    except Exception:
+        raw.close()
+        raise
+
+
+class ShardedCsvWriter:
+    """
+    Escribe filas CSV repartidas en varios archivos.
+
+    Se pasa a un archivo nuevo cada 'max_rows' filas o cuando el archivo en
+    disco supera 'max_bytes' (se comprueba tras cada bloque, así que una parte
+    puede pasarse del límite en un bloque). Cada parte lleva la cabecera.
+
+    Nombres (salida 'parcelas.csv'):
+        sin partes:      parcelas.csv[.gz|.zst]
+        con partes:      parcelas_0001.csv, parcelas_0002.csv, ...
+        con partición:   parcelas_p01_0001.csv, ... (exportación concurrente)
+
+    Uso:
+        with ShardedCsvWriter('parcelas.csv', header, 'gzip', max_rows=500000) as writer:
+            writer.write_rows(rows)
+        writer.shards  # [{'file', 'rows', 'bytes', 'partition'}, ...]
+    """
+
+    def __init__(self, path, header, compression='none', max_rows=0, max_bytes=0,
+                 partition=None, dialect='excel', encoding='utf-8-sig'):
+        """
+        Args:
+            path: Ruta de salida indicada por el usuario
+            header: Nombres de las columnas
+            compression: 'none', 'gzip' o 'zstd'
+            max_rows: Filas por parte (0 = sin límite)
+            max_bytes: Bytes en disco por parte (0 = sin límite)
+            partition: Número de partición (exportación concurrente) o None
+            dialect: Dialecto de csv.writer
+            encoding: Codificación del texto
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Compresión desconocida: {compression}")
+        self.header = header
+        self.compression = compression
+        self.max_rows = max(int(max_rows or 0), 0)
+        self.max_bytes = max(int(max_bytes or 0), 0)
+        self.partition = partition
+        self.dialect = dialect
+        self.encoding = encoding
+        self.shards = []
+
+        suffix = COMPRESSION_SUFFIX[compression]
+        if suffix and path.lower().endswith(suffix):
+            path = path[:-len(suffix)]
+        self._stem, self._ext = os.path.splitext(path)
+        self._suffix = suffix
+        self._text = None
+        self._raw = None
+        self._writer = None
+
+    @property
+    def sharded(self):
+        return bool(self.max_rows or self.max_bytes or self.partition is not None)
+
+    def _shard_path(self, number):
+        if not self.sharded:
+            return self._stem + self._ext + self._suffix
+        part = f"_p{self.partition:02d}" if self.partition is not None else ""
+        return f"{self._stem}{part}_{number:04d}{self._ext}{self._suffix}"
+
+    def _open_shard(self):
+        path = self._shard_path(len(self.shards) + 1)
+        binary, self._raw = _open_binary(path, self.compression)
+        self._text = io.TextIOWrapper(binary, encoding=self.encoding, newline='')
+        self._writer = csv.writer(self._text, dialect=self.dialect)
+        self._writer.writerow(self.header)
+        self.shards.append({'file': path, 'rows': 0, 'bytes': 0, 'partition': self.partition})
+
+    def _close_shard(self):
+        if self._text is None:
+            return
+        self._text.close()
+        shard = self.shards[-1]
+        self._raw.close()
+        shard['bytes'] = os.path.getsize(shard['file'])
+        self._text = self._raw = self._writer = None
+
+    def _disk_bytes(self):
+        # Lo que ya llegó al archivo; el compresor puede retener un poco más
+        self._text.flush()
+        return self._raw.tell()
+
+    def write_rows(self, rows):
+        """Escribe una lista de filas, cambiando de parte cuando toca."""
+        start = 0
+        while start < len(rows):
+            if self._text is None:
+                self._open_shard()
+            shard = self.shards[-1]
+            end = len(rows)
+            if self.max_rows:
+                end = min(end, start + self.max_rows - shard['rows'])
+            self._writer.writerows(rows[start:end] if start or end < len(rows) else rows)
+            shard['rows'] += end - start
+            start = end
+
+            full = self.max_rows and shard['rows'] >= self.max_rows
+            if not full and self.max_bytes:
+                full = self._disk_bytes() >= self.max_bytes
+            if full:
+                self._close_shard()
+
+    def close(self):
+        """Cierra la parte abierta. Sin filas se escribe igualmente un archivo con la cabecera."""
+        if not self.shards:
+            self._open_shard()
+        self._close_shard()
+        return self.shards
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._close_shard()
+        return False
+
+
+def manifest_path(path, compression='none'):
+    """Ruta del manifiesto de una exportación: 'parcelas.csv' -> 'parcelas.manifest.json'."""
+    suffix = COMPRESSION_SUFFIX.get(compression, '')
+    if suffix and path.lower().endswith(suffix):
+        path = path[:-len(suffix)]
+    return os.path.splitext(path)[0] + '.manifest.json'
+
+
+def write_manifest(path, shards, header, compression, seconds=None):
+    """
+    Escribe el manifiesto JSON con las partes de una exportación.
+
+    Args:
+        path: Ruta del manifiesto
+        shards: Lista de ShardedCsvWriter.shards (de todas las particiones)
+        header: Columnas de los archivos
+        compression: Compresión usada
+        seconds: Duración de la exportación
+
+    Returns:
+        str: Ruta del manifiesto
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+    manifest = {
+        'columns': list(header),
+        'compression': compression,
+        'rows': sum(shard['rows'] for shard in shards),
+        'files': [
+            dict(shard, file=os.path.relpath(shard['file'], folder).replace(os.sep, '/'))
+            for shard in shards
+        ]
+    }
+    if seconds is not None:
+        manifest['seconds'] = round(seconds, 3)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return path
@@ -16,15 +16,43 @@ except ImportError:
 from qgis.core import (QgsProcessing, QgsProcessingAlgorithm,
                        QgsProcessingParameterFeatureSource,
                        QgsProcessingParameterFileDestination,
-                       QgsProcessingParameterEnum, QgsProcessingException)
+                       QgsProcessingParameterEnum, QgsProcessingException,
+                       QgsProcessingParameterExpression,
+                       QgsProcessingParameterField, QgsWkbTypes,
+                       QgsProcessingParameterNumber, QgsProcessingOutputFile)
+
+from .csv_shards import COMPRESSIONS, ShardedCsvWriter, has_zstd, manifest_path, write_manifest
+from .feature_request import build_request
+from .parallel import split_ranges
+from .xlsx_writer import EXCEL_MAX_ROWS, XlsxStreamWriter
+
+import os
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor, wait
+from operator import itemgetter
+
+# Rows handed to writerows() at a time
+CHUNK_ROWS = 10000
+# Minimum seconds between progress updates
+PROGRESS_INTERVAL = 0.25
+
+GEOMETRY_NONE, GEOMETRY_XY, GEOMETRY_WKT = 0, 1, 2
+FORMAT_XLSX = 2
 
-import csv
-import io
 
 class ExportToCSVAlgorithm(QgsProcessingAlgorithm):
     INPUT = 'INPUT'
     OUTPUT = 'OUTPUT'
     FORMAT = 'FORMAT'
+    FILTER = 'FILTER'
+    FIELDS = 'FIELDS'
+    GEOMETRY = 'GEOMETRY'
+    COMPRESSION = 'COMPRESSION'
+    SHARD_ROWS = 'SHARD_ROWS'
+    SHARD_MB = 'SHARD_MB'
+    PARTITIONS = 'PARTITIONS'
+    MANIFEST = 'MANIFEST'
 
     def initAlgorithm(self, config=None):
         self.addParameter(
@@ -34,66 +62,311 @@ class ExportToCSVAlgorithm(QgsProcessingAlgorithm):
                 [QgsProcessing.TypeVector]
             )
         )
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.FIELDS,
+                self.tr('Fields to export (all if none selected)'),
+                parentLayerParameterName=self.INPUT,
+                allowMultiple=True,
+                optional=True
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterExpression(
+                self.FILTER,
+                self.tr('Filter expression'),
+                parentLayerParameterName=self.INPUT,
+                optional=True
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.GEOMETRY,
+                self.tr('Geometry columns'),
+                options=['None', 'X/Y', 'WKT'],
+                defaultValue=GEOMETRY_NONE
+            )
+        )
         self.addParameter(
             QgsProcessingParameterEnum(
                 self.FORMAT,
                 self.tr('Output format'),
-                options=['CSV', 'Excel compatible CSV'],
+                options=['CSV', 'Excel compatible CSV', 'Excel workbook (.xlsx)'],
+                defaultValue=0
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.COMPRESSION,
+                self.tr('Compression'),
+                options=['None', 'gzip (.gz)', 'zstd (.zst, needs the zstandard package)'],
                 defaultValue=0
             )
         )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.SHARD_ROWS,
+                self.tr('Start a new file every N rows (0 = no limit)'),
+                type=QgsProcessingParameterNumber.Integer,
+                defaultValue=0,
+                minValue=0
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.SHARD_MB,
+                self.tr('Start a new file every N MB on disk (0 = no limit)'),
+                type=QgsProcessingParameterNumber.Double,
+                defaultValue=0,
+                minValue=0
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.PARTITIONS,
+                self.tr('Concurrent partitions (1 = single sequential export)'),
+                type=QgsProcessingParameterNumber.Integer,
+                defaultValue=1,
+                minValue=1
+            )
+        )
         self.addParameter(
             QgsProcessingParameterFileDestination(
                 self.OUTPUT,
                 self.tr('Output file'),
-                self.tr('CSV files (*.csv)'),
+                self.tr('CSV files (*.csv);;Excel workbooks (*.xlsx)'),
             )
         )
+        self.addOutput(QgsProcessingOutputFile(self.MANIFEST, self.tr('Manifest of the exported files')))
 
     def processAlgorithm(self, parameters, context, feedback):
         source = self.parameterAsSource(parameters, self.INPUT, context)
         output_format = self.parameterAsEnum(parameters, self.FORMAT, context)
         output_file = self.parameterAsFileOutput(parameters, self.OUTPUT, context)
+        expression = self.parameterAsExpression(parameters, self.FILTER, context)
+        geometry_mode = self.parameterAsEnum(parameters, self.GEOMETRY, context)
 
         if source is None:
             raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT))
 
-        total = 100.0 / source.featureCount() if source.featureCount() else 0
         fields = source.fields()
-        field_names = [field.name() for field in fields]
+        selected = self.parameterAsFields(parameters, self.FIELDS, context)
+        field_names = selected or [field.name() for field in fields]
+        indices = [fields.indexOf(name) for name in selected] if selected else None
+
+        header = list(field_names)
+        if geometry_mode == GEOMETRY_XY:
+            header += ['X', 'Y']
+        elif geometry_mode == GEOMETRY_WKT:
+            header.append('WKT')
+
+        compression = COMPRESSIONS[self.parameterAsEnum(parameters, self.COMPRESSION, context)]
+        if compression == 'zstd' and not has_zstd():
+            raise QgsProcessingException('zstd compression needs the "zstandard" Python package.')
+        partitions = self.parameterAsInt(parameters, self.PARTITIONS, context)
+        options = {
+            'header': header,
+            'compression': compression,
+            'max_rows': self.parameterAsInt(parameters, self.SHARD_ROWS, context),
+            'max_bytes': int(self.parameterAsDouble(parameters, self.SHARD_MB, context) * 1024 * 1024),
+            'dialect': 'excel'  # Standard and Excel compatible CSV share the dialect
+        }
+
+        # Only the exported columns are read; geometry only when it is written
+        read = {
+            'attributes': selected or None,
+            'geometry': geometry_mode != GEOMETRY_NONE,
+            'indices': indices,
+            'geometry_mode': geometry_mode
+        }
+        start = time.perf_counter()
+
+        if output_format == FORMAT_XLSX:
+            return self._export_xlsx(source, read, expression, output_file, options, feedback, start)
 
         try:
-            with io.open(output_file, 'w', encoding='utf-8-sig', newline='') as f:
-                if output_format == 0:  # Standard CSV
-                    writer = csv.writer(f)
-                else:  # Excel compatible CSV
-                    writer = csv.writer(f, dialect='excel')
-                
-                # Write header
-                writer.writerow(field_names)
-                
-                # Write data
-                for current, feature in enumerate(source.getFeatures()):
-                    if feedback.isCanceled():
-                        break
-                    
-                    # Handle null values properly
-                    attributes = []
-                    for attr in feature.attributes():
-                        if attr is None:
-                            attributes.append('')
-                        else:
-                            attributes.append(attr)
-                    
-                    writer.writerow(attributes)
-                    feedback.setProgress(int(current * total))
+            if partitions > 1:
+                shards = self._export_partitions(source, read, expression, partitions, output_file, options, feedback)
+            else:
+                request = build_request(fields, read['attributes'], geometry=read['geometry'],
+                                        expression=expression)
+                with ShardedCsvWriter(output_file, **options) as writer:
+                    # csv writes None as an empty cell
+                    for chunk in self._row_chunks(source, request, indices, geometry_mode, feedback):
+                        writer.write_rows(chunk)
+                shards = writer.shards
 
-            feedback.pushInfo(f'Successfully exported {source.featureCount()} features to {output_file}')
-            
         except Exception as e:
             raise QgsProcessingException(f'Error writing CSV file: {str(e)}')
 
-        return {self.OUTPUT: output_file}
+        seconds = time.perf_counter() - start
+        exported = sum(shard['rows'] for shard in shards)
+        self._report_throughput(feedback, exported, seconds, shards)
+
+        manifest = None
+        if len(shards) > 1 or partitions > 1 or options['max_rows'] or options['max_bytes']:
+            manifest = write_manifest(manifest_path(output_file, compression), shards, header, compression, seconds)
+            feedback.pushInfo(f'Manifest: {manifest}')
+
+        return {self.OUTPUT: shards[0]['file'] if len(shards) == 1 else manifest, self.MANIFEST: manifest}
+
+    def _export_xlsx(self, source, read, expression, output_file, options, feedback, start):
+        """
+        Writes a single .xlsx workbook in streaming mode.
+
+        The workbook is already compressed, so compression and partitions do
+        not apply; the row limit starts a new sheet instead of a new file.
+        """
+        if not output_file.lower().endswith('.xlsx'):
+            output_file = os.path.splitext(output_file)[0] + '.xlsx'
+        if options['compression'] != 'none' or options['max_bytes']:
+            feedback.pushInfo('Compression and size limits do not apply to .xlsx output')
+        max_rows = EXCEL_MAX_ROWS
+        if options['max_rows']:
+            max_rows = min(options['max_rows'] + 1, EXCEL_MAX_ROWS)
+
+        request = build_request(source.fields(), read['attributes'], geometry=read['geometry'],
+                                expression=expression)
+        try:
+            with XlsxStreamWriter(output_file, options['header'], max_rows=max_rows) as writer:
+                for chunk in self._row_chunks(source, request, read['indices'], read['geometry_mode'], feedback):
+                    writer.write_rows(chunk)
+        except Exception as e:
+            raise QgsProcessingException(f'Error writing XLSX file: {str(e)}')
+
+        sheets = writer.shards
+        self._report_throughput(feedback, sum(sheet['rows'] for sheet in sheets),
+                                time.perf_counter() - start, sheets)
+        if len(sheets) > 1:
+            feedback.pushInfo(f'{len(sheets)} sheets: ' + ', '.join(sheet['sheet'] for sheet in sheets))
+        return {self.OUTPUT: output_file, self.MANIFEST: None}
+
+    def _export_partitions(self, source, read, expression, partitions, output_file, options, feedback):
+        """
+        Splits the matching feature ids into contiguous batches and writes
+        each batch to its own series of files from a worker thread.
+
+        One pass over the ids (no attributes or geometry) collects them in a
+        compact array; each partition then reads only its own features with
+        setFilterFids, so the layer is read twice in total (the id pass and
+        the partitions together), whatever the number of partitions and
+        whether or not the provider can filter on ids.
+
+        The source is not thread-safe, so every partition gets its own
+        iterator (with its own copy of the provider source), opened here
+        before the threads start; the threads only read from it. Compression
+        and disk writes run concurrently; progress is reported from this thread.
+
+        Returns:
+            list: Shards of all partitions, in partition order
+        """
+        fields = source.fields()
+        # 8 bytes per id, in the provider's order (usually the storage order)
+        ids = array('q')
+        for feature in source.getFeatures(build_request(fields, [], geometry=False, expression=expression)):
+            ids.append(feature.id())
+            if len(ids) % CHUNK_ROWS == 0 and feedback.isCanceled():
+                break
+        count = len(ids)
+
+        ranges = [] if feedback.isCanceled() else split_ranges(count, partitions)
+        iterators = []
+        for first, last in ranges:
+            # The filter is already applied: the batch only holds matching ids
+            request = build_request(fields, read['attributes'], geometry=read['geometry'])
+            request.setFilterFids(ids[first:last].tolist())
+            iterators.append(source.getFeatures(request))
+        del ids
+        counts = [0] * len(ranges)
+
+        def export(part, features):
+            with ShardedCsvWriter(output_file, partition=part + 1, **options) as writer:
+                for chunk in self._row_chunks(source, None, read['indices'], read['geometry_mode'],
+                                              feedback, progress=False, features=features):
+                    writer.write_rows(chunk)
+                    counts[part] += len(chunk)
+            return writer.shards
+
+        feedback.pushInfo(f'Exporting {count} features in {len(ranges)} partitions')
+        with ThreadPoolExecutor(max_workers=max(len(ranges), 1)) as pool:
+            futures = [pool.submit(export, part, features) for part, features in enumerate(iterators)]
+            pending = set(futures)
+            while pending:
+                _, pending = wait(pending, timeout=PROGRESS_INTERVAL)
+                if count:
+                    feedback.setProgress(int(sum(counts) * 100.0 / count))
+            shards = [shard for future in futures for shard in future.result()]
+
+        if not shards:
+            # Empty layer: still write one file with the header
+            with ShardedCsvWriter(output_file, partition=1, **options) as writer:
+                pass
+            shards = writer.shards
+        return shards
+
+    def _row_chunks(self, source, request, indices, geometry_mode, feedback, progress=True, features=None):
+        """
+        Yields lists of up to CHUNK_ROWS rows.
+
+        Cancellation is checked and progress reported once per chunk, and
+        progress at most every PROGRESS_INTERVAL seconds (never when
+        progress is False). An already opened iterator can be passed as
+        features instead of a request.
+        """
+        total = 100.0 / source.featureCount() if progress and source.featureCount() else 0
+        if indices is None:
+            pick = None
+        elif len(indices) == 1:
+            index = indices[0]
+            pick = lambda attributes: [attributes[index]]
+        else:
+            pick = itemgetter(*indices)
+
+        chunk = []
+        current = 0
+        last_progress = time.monotonic()
+        if features is None:
+            features = source.getFeatures(request)
+        for current, feature in enumerate(features, 1):
+            row = feature.attributes() if pick is None else pick(feature.attributes())
+            if geometry_mode != GEOMETRY_NONE:
+                row = list(row) + self._geometry_columns(feature.geometry(), geometry_mode)
+            chunk.append(row)
+
+            if len(chunk) >= CHUNK_ROWS:
+                yield chunk
+                chunk = []
+                if feedback.isCanceled():
+                    return
+                now = time.monotonic()
+                if progress and now - last_progress >= PROGRESS_INTERVAL:
+                    feedback.setProgress(int(current * total))
+                    last_progress = now
+
+        if chunk:
+            yield chunk
+        if progress:
+            feedback.setProgress(100)
+
+    def _geometry_columns(self, geometry, geometry_mode):
+        """X/Y (the point, or the centroid for lines and polygons) or WKT."""
+        if geometry is None or geometry.isNull():
+            return [None, None] if geometry_mode == GEOMETRY_XY else [None]
+        if geometry_mode == GEOMETRY_WKT:
+            return [geometry.asWkt()]
+        if geometry.type() != QgsWkbTypes.PointGeometry or geometry.isMultipart():
+            geometry = geometry.centroid()
+        point = geometry.asPoint()
+        return [point.x(), point.y()]
+
+    def _report_throughput(self, feedback, exported, seconds, shards):
+        rate = exported / seconds if seconds > 0 else 0.0
+        files = list(dict.fromkeys(shard['file'] for shard in shards))
+        if len(files) == 1:
+            feedback.pushInfo(f'Successfully exported {exported} features to {files[0]}')
+        else:
+            feedback.pushInfo(f'Successfully exported {exported} features to {len(files)} files')
+        feedback.pushInfo(f'Throughput: {seconds:.2f} s, {rate:,.0f} rows/s ({rate * 60:,.0f} rows/min)')
 
     def name(self):
         return 'exporttocsv'
@@ -111,12 +384,28 @@ class ExportToCSVAlgorithm(QgsProcessingAlgorithm):
         return self.tr("""
         This algorithm exports the attributes of a vector layer to CSV format.
         
-        It offers two output options:
+        It offers three output options:
         1. Standard CSV: A regular comma-separated values file.
         2. Excel compatible CSV: A CSV file formatted to be easily opened in Excel.
+        3. Excel workbook (.xlsx): A native workbook with numeric cells, written
+           row by row with constant memory. Past Excel's limit of 1,048,576 rows
+           (or the row limit below) the export continues on a new sheet.
         
-        The tool will export all attributes of the input layer, including the feature ID.
-        Geometry information is not included in the output.
+        The tool exports the selected fields (all attributes of the input layer
+        if none are selected). Geometry can optionally be added as X/Y columns
+        (the point, or the centroid of lines and polygons) or as a WKT column.
+        An optional filter expression exports only the matching features; it is
+        evaluated by the data provider when possible.
+    
+        Large exports can be split into several files every N rows or N MB, and
+        compressed while writing (gzip, or zstd when the zstandard package is
+        installed). With more than one concurrent partition the ids of the
+        matching features are read first and split into batches that are
+        written at the same time, each to its own files (name_p01_0001.csv,
+        ...). This adds one quick pass over the ids (8 bytes of memory per
+        feature); partitions pay off when compression or disk writes, not
+        reading, are the bottleneck. Whenever the output is split, a
+        name.manifest.json file lists every file with its row count.
     
         Note: This export uses UTF-8 encoding with BOM for better compatibility with Excel.
         """)
@@ -0,0 +1,48 @@
+"""
+Peticiones de entidades con solo los datos necesarios
+Compatible con Qt5/Qt6 y QGIS 3.x/4.x
+"""
+from qgis.core import Qgis, QgsExpression, QgsFeatureRequest
+
+try:
+    NO_GEOMETRY = Qgis.FeatureRequestFlag.NoGeometry
+except AttributeError:
+    NO_GEOMETRY = QgsFeatureRequest.NoGeometry
+
+
+def build_request(fields, attributes=None, geometry=True, expression=''):
+    """
+    Crea un QgsFeatureRequest que solo pide al proveedor lo que se usa.
+
+    El filtro se entrega al proveedor, que lo traduce a su consulta cuando
+    puede (SQL en GeoPackage/PostGIS, ...). Los campos y la geometría que
+    necesita la expresión se piden aunque no se indiquen.
+
+    Args:
+        fields: QgsFields de la fuente
+        attributes: Nombres de los campos a leer (None = todos)
+        geometry: Si es False no se lee la geometría
+        expression: Expresión de filtro (vacía = sin filtro)
+
+    Returns:
+        QgsFeatureRequest
+    """
+    request = QgsFeatureRequest()
+    names = None if attributes is None else set(name for name in attributes if name)
+
+    if expression:
+        request.setFilterExpression(expression)
+        parsed = QgsExpression(expression)
+        geometry = geometry or parsed.needsGeometry()
+        if names is not None:
+            referenced = parsed.referencedColumns()
+            if QgsFeatureRequest.ALL_ATTRIBUTES in referenced:
+                names = None
+            else:
+                names |= set(referenced)
+
+    if names is not None:
+        request.setSubsetOfAttributes([name for name in names if fields.indexOf(name) >= 0], fields)
+    if not geometry:
+        request.setFlags(request.flags() | NO_GEOMETRY)
+    return request
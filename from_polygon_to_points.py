@@ -5,7 +5,6 @@ Compatible con Qt5/Qt6 y QGIS 3.x/4.x
 from qgis.PyQt.QtCore import QCoreApplication, QVariant
 from qgis.core import (
     QgsProcessing,
-    QgsFeatureSink,
     QgsProcessingAlgorithm,
     QgsProcessingParameterFeatureSource,
     QgsProcessingParameterFeatureSink,
@@ -18,9 +17,23 @@ from qgis.core import (
     QgsWkbTypes,
     QgsProcessingParameterPoint,
     QgsCoordinateTransform,
-    QgsProject
+    QgsProject,
+    QgsSpatialIndex,
+    QgsProcessingParameterNumber,
+    QgsProcessingParameterExpression
 )
-import math
+from collections import deque
+from itertools import chain, repeat
+
+import numpy as np
+
+from .feature_buffer import BufferedFeatureWriter
+from .feature_request import build_request
+from .parallel import create_process_pool, default_workers
+from .ring_order import order_chunk
+
+# Polígonos por bloque de trabajo en modo paralelo
+CHUNK_FEATURES = 2000
 
 
 class PolygonToPointsAlgorithm(QgsProcessingAlgorithm):
@@ -33,6 +46,10 @@ class PolygonToPointsAlgorithm(QgsProcessingAlgorithm):
     OUTPUT = 'OUTPUT'
     POLYGON_ID_FIELD = 'POLYGON_ID_FIELD'
     START_POINT = 'START_POINT'
+    START_POINTS = 'START_POINTS'
+    START_ID_FIELD = 'START_ID_FIELD'
+    WORKERS = 'WORKERS'
+    FILTER = 'FILTER'
 
     def initAlgorithm(self, config=None):
         self.addParameter(
@@ -52,6 +69,15 @@ class PolygonToPointsAlgorithm(QgsProcessingAlgorithm):
             )
         )
         
+        self.addParameter(
+            QgsProcessingParameterExpression(
+                self.FILTER,
+                self.tr('Filtro de polígonos (expresión, opcional)'),
+                parentLayerParameterName=self.INPUT,
+                optional=True
+            )
+        )
+        
         self.addParameter(
             QgsProcessingParameterPoint(
                 self.START_POINT,
@@ -60,6 +86,35 @@ class PolygonToPointsAlgorithm(QgsProcessingAlgorithm):
             )
         )
         
+        self.addParameter(
+            QgsProcessingParameterFeatureSource(
+                self.START_POINTS,
+                self.tr('Capa de puntos de inicio (opcional, uno por polígono)'),
+                [QgsProcessing.TypeVectorPoint],
+                optional=True
+            )
+        )
+        
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.START_ID_FIELD,
+                self.tr('Campo ID en los puntos de inicio (vacío = punto dentro del polígono)'),
+                parentLayerParameterName=self.START_POINTS,
+                type=QgsProcessingParameterField.Any,
+                optional=True
+            )
+        )
+        
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.WORKERS,
+                self.tr('Procesos en paralelo (1 = sin paralelismo, 0 = automático)'),
+                type=QgsProcessingParameterNumber.Integer,
+                defaultValue=1,
+                minValue=0
+            )
+        )
+        
         self.addParameter(
             QgsProcessingParameterFeatureSink(
                 self.OUTPUT,
@@ -94,6 +149,11 @@ class PolygonToPointsAlgorithm(QgsProcessingAlgorithm):
             if start_point:
                 feedback.pushInfo(f'Punto de inicio (CRS capa): {start_point.x()}, {start_point.y()}')
 
+        # Puntos de inicio por polígono: por ID o por contención
+        start_by_id, start_index_tree, start_points = self._load_start_points(parameters, context, source, feedback)
+        per_polygon = start_by_id is not None or start_index_tree is not None
+        unmatched = 0
+
         # Campos de salida
         fields = QgsFields()
         fields.append(QgsField('Punto_ID_H', QVariant.Int))   # Point_ID_CW
@@ -114,85 +174,189 @@ class PolygonToPointsAlgorithm(QgsProcessingAlgorithm):
         if sink is None:
             return {}
 
+        # Escritura por bloques (addFeatures) en lugar de una llamada por entidad
+        writer = BufferedFeatureWriter(sink, feedback=feedback)
+
+        workers = self.parameterAsInt(parameters, self.WORKERS, context)
+        if workers == 0:
+            workers = default_workers()
+        log_start = start_point is not None and not per_polygon
+
+        def write_chunk(polygon_ids, result):
+            ring_ids = list(chain.from_iterable(
+                repeat(pid, n) for pid, n in zip(polygon_ids, result['rings'].tolist())
+            ))
+            if log_start:
+                for pid, start_index, distance in zip(ring_ids, result['start_index'].tolist(), result['distance'].tolist()):
+                    feedback.pushInfo(f'Polígono {pid}: Iniciando desde vértice {start_index} a distancia {distance:.2f}')
+            vertex_ids = chain.from_iterable(repeat(pid, n) for pid, n in zip(ring_ids, result['counts'].tolist()))
+            for pid, cw_id, ccw_id, x, y, x_round, y_round in zip(
+                    vertex_ids, result['id_h'].tolist(), result['id_ah'].tolist(),
+                    result['x'].tolist(), result['y'].tolist(),
+                    result['x_round'].tolist(), result['y_round'].tolist()):
+                f = QgsFeature()
+                f.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(x, y)))
+                # El vértice 1 es siempre el 1 en ambos sentidos
+                f.setAttributes([
+                    cw_id,   # Punto_ID_H (CW)
+                    ccw_id,  # Punto_ID_AH (CCW)
+                    pid,
+                    x_round,
+                    y_round
+                ])
+                writer.add(f)
+
+        # Las geometrías se envían como WKB y el orden de los anillos se
+        # calcula por bloques, en el pool si hay varios procesos. Los bloques
+        # se escriben en el orden de lectura: la salida es la misma que en serie.
+        pool = create_process_pool(workers) if workers > 1 else None
+        pending = deque()
+        polygon_ids, items = [], []
+
+        def submit():
+            if pool is None:
+                write_chunk(polygon_ids, order_chunk(items))
+                return
+            pending.append((polygon_ids, pool.submit(order_chunk, items)))
+            # Pocos bloques en vuelo para acotar la memoria
+            while len(pending) > workers * 2:
+                ids, future = pending.popleft()
+                write_chunk(ids, future.result())
+
         total = 100.0 / source.featureCount() if source.featureCount() else 0
-        features = source.getFeatures()
+        # Solo el campo ID y la geometría; el filtro se resuelve en el proveedor
+        request = build_request(
+            source.fields(), [polygon_id_field],
+            expression=self.parameterAsExpression(parameters, self.FILTER, context)
+        )
+        features = source.getFeatures(request)
 
-        for current, feature in enumerate(features):
-            if feedback.isCanceled():
-                break
+        try:
+            for current, feature in enumerate(features):
+                if feedback.isCanceled():
+                    break
 
-            try:
-                polygon_id = feature[polygon_id_field]
-            except KeyError:
-                polygon_id = str(feature.id()) # Fallback si falla el campo
+                try:
+                    polygon_id = feature[polygon_id_field]
+                except KeyError:
+                    polygon_id = str(feature.id()) # Fallback si falla el campo
 
-            polygon_geom = feature.geometry()
+                polygon_geom = feature.geometry()
 
-            if polygon_geom.isMultipart():
-                polygons = polygon_geom.asMultiPolygon()
-            else:
-                polygons = [polygon_geom.asPolygon()]
-
-            for polygon in polygons:
-                exterior_ring = polygon[0]
-                
-                if len(exterior_ring) > 0 and exterior_ring[0] == exterior_ring[-1]:
-                    exterior_ring = exterior_ring[:-1]
-                
-                if start_point is not None:
-                    # Lógica exacta del script para encontrar inicio
-                    min_distance = float('inf')
-                    start_index = 0
-                    
-                    for i, pt in enumerate(exterior_ring):
-                        dx = pt.x() - start_point.x()
-                        dy = pt.y() - start_point.y()
-                        distance = math.sqrt(dx * dx + dy * dy)
-                        if distance < min_distance:
-                            min_distance = distance
-                            start_index = i
-                    
-                    feedback.pushInfo(f'Polígono {polygon_id}: Iniciando desde vértice {start_index} a distancia {min_distance:.2f}')
-                else:
-                    # Lógica por defecto: punto más al norte (Max Y)
-                    if not exterior_ring: continue
-                    max_y = max(pt.y() for pt in exterior_ring)
-                    start_index = next(i for i, pt in enumerate(exterior_ring) if pt.y() == max_y)
-                
-                num_points = len(exterior_ring)
-                unique_points = set()
-                point_counter = 0
-
-                for i in range(num_points):
-                    index = (start_index + i) % num_points
-                    point = exterior_ring[index]
-                    
-                    point_tuple = (point.x(), point.y())
-                    if point_tuple in unique_points:
-                        continue
-                    unique_points.add(point_tuple)
-                    
-                    point_counter += 1
-                    
-                    f = QgsFeature()
-                    f.setGeometry(QgsGeometry.fromPointXY(point))
-                    
-                    # Corrección: El vértice 1 es siempre el 1 en ambos sentidos
-                    ccw_id = 1 if point_counter == 1 else (num_points - point_counter + 2)
-
-                    f.setAttributes([
-                        point_counter,  # Punto_ID_H (CW)
-                        ccw_id,         # Punto_ID_AH (CCW)
-                        str(polygon_id),
-                        round(point.x(), 3),
-                        round(point.y(), 3)
-                    ])
-                    sink.addFeature(f, QgsFeatureSink.FastInsert)
-
-            feedback.setProgress(int(current * total))
+                feature_start = start_point
+                if per_polygon:
+                    if start_by_id is not None:
+                        match = start_by_id.get(str(polygon_id))
+                    else:
+                        match = self._containing_point(polygon_geom, start_index_tree, start_points)
+                    if match is None:
+                        unmatched += 1
+                    else:
+                        feature_start = match
+                # Sin punto de inicio se parte del punto más al norte (Max Y)
+                start = None if feature_start is None else (feature_start.x(), feature_start.y())
+
+                polygon_ids.append(str(polygon_id))
+                items.append((self._polygon_geometry(polygon_geom), start))
+                if len(items) >= CHUNK_FEATURES:
+                    submit()
+                    polygon_ids, items = [], []
+
+                feedback.setProgress(int(current * total))
+
+            if items and not feedback.isCanceled():
+                submit()
+            while pending and not feedback.isCanceled():
+                ids, future = pending.popleft()
+                write_chunk(ids, future.result())
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+        writer.flush()
+
+        if per_polygon and unmatched:
+            fallback = 'la coordenada de inicio' if start_point is not None else 'el punto más al norte'
+            feedback.pushInfo(f'{unmatched} polígonos sin punto de inicio propio: se usó {fallback}.')
 
         return {self.OUTPUT: dest_id}
 
+    def _polygon_geometry(self, polygon_geom):
+        """
+        Geometría para order_chunk: el WKB de polígonos y multipolígonos o,
+        para otros tipos (curvas...), los anillos exteriores ya leídos.
+        """
+        if QgsWkbTypes.flatType(polygon_geom.wkbType()) in (QgsWkbTypes.Polygon, QgsWkbTypes.MultiPolygon):
+            return bytes(polygon_geom.asWkb())
+
+        if polygon_geom.isMultipart():
+            polygons = polygon_geom.asMultiPolygon()
+        else:
+            polygons = [polygon_geom.asPolygon()]
+
+        rings = []
+        for polygon in polygons:
+            if not polygon:
+                continue
+            exterior_ring = polygon[0]
+            
+            if len(exterior_ring) > 0 and exterior_ring[0] == exterior_ring[-1]:
+                exterior_ring = exterior_ring[:-1]
+            if exterior_ring:
+                rings.append((
+                    np.array([pt.x() for pt in exterior_ring]),
+                    np.array([pt.y() for pt in exterior_ring])
+                ))
+        return rings
+
+    def _load_start_points(self, parameters, context, source, feedback):
+        """
+        Lee la capa de puntos de inicio en el CRS de los polígonos.
+        
+        Returns:
+            tuple: (dict ID -> QgsPointXY, None, None) si se indicó el campo ID;
+                (None, QgsSpatialIndex, dict id de entidad -> QgsPointXY) para
+                buscar por contención; (None, None, None) sin capa de puntos
+        """
+        points_source = self.parameterAsSource(parameters, self.START_POINTS, context)
+        if points_source is None:
+            return None, None, None
+        id_field = self.parameterAsString(parameters, self.START_ID_FIELD, context)
+        
+        transform = None
+        if points_source.sourceCrs().isValid() and points_source.sourceCrs() != source.sourceCrs():
+            transform = QgsCoordinateTransform(points_source.sourceCrs(), source.sourceCrs(), QgsProject.instance())
+        
+        by_id = {}
+        index = QgsSpatialIndex()
+        points = {}
+        request = build_request(points_source.fields(), [id_field] if id_field else [])
+        for feature in points_source.getFeatures(request):
+            geom = feature.geometry()
+            if geom.isEmpty():
+                continue
+            if transform is not None:
+                geom.transform(transform)
+            point = geom.asMultiPoint()[0] if geom.isMultipart() else geom.asPoint()
+            if id_field:
+                # El primer punto de cada ID es el que se usa
+                by_id.setdefault(str(feature[id_field]), point)
+            else:
+                index.addFeature(feature.id(), geom.boundingBox())
+                points[feature.id()] = point
+        
+        feedback.pushInfo(f'Puntos de inicio cargados: {len(by_id) if id_field else len(points)}')
+        if id_field:
+            return by_id, None, None
+        return None, index, points
+
+    def _containing_point(self, polygon_geom, index, points):
+        """Punto de inicio dentro del polígono (el de menor id de entidad), o None."""
+        for fid in sorted(index.intersects(polygon_geom.boundingBox())):
+            if polygon_geom.contains(QgsGeometry.fromPointXY(points[fid])):
+                return points[fid]
+        return None
+
     def name(self):
         return 'polygon_to_ordered_points'
 
@@ -217,6 +381,12 @@ class PolygonToPointsAlgorithm(QgsProcessingAlgorithm):
         <li><b>Campo ID:</b> Campo que identifica cada polígono.</li>
         <li><b>Coordenada de inicio:</b> (Opcional) Clic en el mapa para seleccionar. 
         El vértice más cercano será el punto de inicio. Si no se especifica, usa el punto más al norte.</li>
+        <li><b>Filtro:</b> (Opcional) Expresión para procesar solo algunos polígonos.</li>
+        <li><b>Procesos en paralelo:</b> Reparte los polígonos en bloques entre varios procesos;
+        la numeración es idéntica a la de la ejecución en serie.</li>
+        <li><b>Capa de puntos de inicio:</b> (Opcional) Un punto de inicio por polígono. Con <i>Campo ID</i>
+        se enlaza con el polígono del mismo ID; sin él, se usa el punto que cae dentro del polígono.
+        Los polígonos sin punto propio usan la coordenada de inicio o el punto más al norte.</li>
         </ul>
         
         <h4>Salida:</h4>
@@ -0,0 +1,443 @@
+"""
+Algoritmo para generar los planos de muchas parcelas con un atlas
+Compatible con Qt5/Qt6 y QGIS 3.x/4.x
+"""
+import time
+from datetime import date
+
+import numpy as np
+from qgis.PyQt.QtCore import QCoreApplication
+from qgis.core import (
+    Qgis,
+    QgsProject,
+    QgsProcessing,
+    QgsProcessingAlgorithm,
+    QgsProcessingException,
+    QgsProcessingUtils,
+    QgsProcessingParameterFeatureSource,
+    QgsProcessingParameterFeatureSink,
+    QgsProcessingParameterField,
+    QgsProcessingParameterExpression,
+    QgsProcessingParameterCrs,
+    QgsProcessingParameterString,
+    QgsProcessingParameterEnum,
+    QgsProcessingParameterFile,
+    QgsProcessingParameterNumber,
+    QgsProcessingParameterFileDestination,
+    QgsProcessingOutputNumber
+)
+
+from .topographic_calculator import TopographicCalculator
+from .feature_buffer import BufferedFeatureWriter
+from .feature_request import build_request
+from .create_polygon_from_csv import _to_float
+from .parallel import default_workers
+from .survey_plan_service import (
+    SurveyPlanService, PAPER_SIZES, ORIENTATIONS, parse_info, layout_from_template
+)
+from .survey_atlas import (
+    create_atlas_layers, configure_atlas, export_atlas_pdf, export_atlas_parallel, has_pdf_merge
+)
+
+try:
+    NO_THREADING = Qgis.ProcessingAlgorithmFlag.NoThreading
+except AttributeError:
+    NO_THREADING = QgsProcessingAlgorithm.FlagNoThreading
+
+# Con menos páginas por proceso no compensa abrir el proyecto en cada uno
+MIN_PAGES_PER_WORKER = 20
+
+
+def _is_null(value):
+    """True para None y para el NULL de QGIS (QVariant nulo)."""
+    return value is None or (hasattr(value, 'isNull') and value.isNull())
+
+
+def _parcel_key(value):
+    """ID de parcela comparable: los números enteros leídos como real pasan a int."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (int, str)):
+        return value
+    return str(value)
+
+
+class GenerateSurveyAtlasAlgorithm(QgsProcessingAlgorithm):
+    """
+    Genera un atlas con un plano por parcela a partir de una tabla larga de coordenadas.
+    """
+
+    INPUT = 'INPUT'
+    X_FIELD = 'X_FIELD'
+    Y_FIELD = 'Y_FIELD'
+    GROUP_FIELD = 'GROUP_FIELD'
+    INFO_FIELDS = 'INFO_FIELDS'
+    FILTER = 'FILTER'
+    CRS = 'CRS'
+    INFO = 'INFO'
+    PAPER_SIZE = 'PAPER_SIZE'
+    ORIENTATION = 'ORIENTATION'
+    TEMPLATE = 'TEMPLATE'
+    DECIMALS = 'DECIMALS'
+    WORKERS = 'WORKERS'
+    OUTPUT_PARCELS = 'OUTPUT_PARCELS'
+    OUTPUT_VERTICES = 'OUTPUT_VERTICES'
+    OUTPUT_MEASURES = 'OUTPUT_MEASURES'
+    OUTPUT_PDF = 'OUTPUT_PDF'
+    PAGES = 'PAGES'
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(
+            QgsProcessingParameterFeatureSource(
+                self.INPUT,
+                self.tr('Tabla de Coordenadas (CSV/Excel/Capa)'),
+                [QgsProcessing.TypeVector]
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.X_FIELD,
+                self.tr('Campo X (Este)'),
+                parentLayerParameterName=self.INPUT,
+                type=QgsProcessingParameterField.Any
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.Y_FIELD,
+                self.tr('Campo Y (Norte)'),
+                parentLayerParameterName=self.INPUT,
+                type=QgsProcessingParameterField.Any
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.GROUP_FIELD,
+                self.tr('Campo de parcela (una página por valor)'),
+                parentLayerParameterName=self.INPUT,
+                type=QgsProcessingParameterField.Any
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.INFO_FIELDS,
+                self.tr('Campos con datos de cada parcela para las etiquetas (opcional)'),
+                parentLayerParameterName=self.INPUT,
+                type=QgsProcessingParameterField.Any,
+                allowMultiple=True,
+                optional=True
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterExpression(
+                self.FILTER,
+                self.tr('Filtro de filas (expresión, opcional)'),
+                parentLayerParameterName=self.INPUT,
+                optional=True
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterCrs(
+                self.CRS,
+                self.tr('Sistema de Referencia de Coordenadas (CRS)'),
+                defaultValue='EPSG:32717'
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterString(
+                self.INFO,
+                self.tr('Datos del proyecto (ID=valor separados por ";"; =expresión)'),
+                defaultValue='TITULO=LEVANTAMIENTO PLANIMÉTRICO;PROPIETARIO=;UBICACION=',
+                multiLine=True,
+                optional=True
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.PAPER_SIZE,
+                self.tr('Tamaño de papel'),
+                options=PAPER_SIZES,
+                defaultValue=0
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.ORIENTATION,
+                self.tr('Orientación'),
+                options=ORIENTATIONS,
+                defaultValue=0
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterFile(
+                self.TEMPLATE,
+                self.tr('Plantilla personalizada (.qpt, opcional)'),
+                extension='qpt',
+                optional=True
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.DECIMALS,
+                self.tr('Decimales en coordenadas'),
+                type=QgsProcessingParameterNumber.Integer,
+                defaultValue=2,
+                minValue=0,
+                maxValue=4
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.WORKERS,
+                self.tr('Procesos para exportar el PDF (1 = sin paralelismo, 0 = automático)'),
+                type=QgsProcessingParameterNumber.Integer,
+                defaultValue=1,
+                minValue=0
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.OUTPUT_PARCELS,
+                self.tr('Parcelas'),
+                QgsProcessing.TypeVectorPolygon
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.OUTPUT_VERTICES,
+                self.tr('Vértices'),
+                QgsProcessing.TypeVectorPoint
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.OUTPUT_MEASURES,
+                self.tr('Medidas'),
+                QgsProcessing.TypeVectorLine
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterFileDestination(
+                self.OUTPUT_PDF,
+                self.tr('Planos (PDF)'),
+                'PDF (*.pdf)'
+            )
+        )
+
+        self.addOutput(QgsProcessingOutputNumber(self.PAGES, self.tr('Páginas')))
+
+    def flags(self):
+        # Layouts y exportación a PDF trabajan con objetos gráficos de Qt: hilo principal
+        return super().flags() | NO_THREADING
+
+    def processAlgorithm(self, parameters, context, feedback):
+        source = self.parameterAsSource(parameters, self.INPUT, context)
+        if source is None:
+            raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT))
+
+        x_field = self.parameterAsString(parameters, self.X_FIELD, context)
+        y_field = self.parameterAsString(parameters, self.Y_FIELD, context)
+        group_field = self.parameterAsString(parameters, self.GROUP_FIELD, context)
+        info_fields = [name for name in self.parameterAsFields(parameters, self.INFO_FIELDS, context)
+                       if name not in (x_field, y_field, group_field)]
+        expression = self.parameterAsExpression(parameters, self.FILTER, context)
+        crs = self.parameterAsCrs(parameters, self.CRS, context)
+        if not crs.isValid():
+            raise QgsProcessingException(self.tr('Sistema de coordenadas no válido.'))
+
+        info = parse_info(self.parameterAsString(parameters, self.INFO, context))
+        info.setdefault('FECHA', date.today().strftime('%Y-%m-%d'))
+        paper_size = PAPER_SIZES[self.parameterAsEnum(parameters, self.PAPER_SIZE, context)]
+        orientation = ORIENTATIONS[self.parameterAsEnum(parameters, self.ORIENTATION, context)]
+        template = self.parameterAsFile(parameters, self.TEMPLATE, context) or None
+        decimals = self.parameterAsInt(parameters, self.DECIMALS, context)
+        workers = self.parameterAsInt(parameters, self.WORKERS, context)
+        if workers == 0:
+            workers = default_workers()
+        pdf_path = self.parameterAsFileOutput(parameters, self.OUTPUT_PDF, context)
+
+        feedback.pushInfo("Leyendo coordenadas...")
+        xs, ys, ids, attributes = self._read_table(source, x_field, y_field, group_field, info_fields,
+                                                   expression, feedback)
+        if feedback.isCanceled():
+            return {}
+        if not len(xs):
+            raise QgsProcessingException(self.tr('La tabla no tiene coordenadas válidas.'))
+
+        batch = TopographicCalculator.generate_batch_survey(xs, ys, ids)
+        feedback.setProgress(40)
+
+        feedback.pushInfo(f"Creando capas ({len(batch['ids'])} parcelas, {len(xs)} vértices)...")
+        parcels, vertices, measures, skipped = create_atlas_layers(
+            batch, crs, decimals, (info_fields, attributes), feedback
+        )
+        for parcel_id in skipped:
+            feedback.reportError(f"Parcela {parcel_id}: se requieren al menos 3 vértices (se omite).")
+        pages = parcels.featureCount()
+        if feedback.isCanceled():
+            return {}
+        if not pages:
+            raise QgsProcessingException(self.tr('Ninguna parcela tiene al menos 3 vértices.'))
+
+        results = {}
+        for key, layer in zip((self.OUTPUT_PARCELS, self.OUTPUT_VERTICES, self.OUTPUT_MEASURES),
+                              (parcels, vertices, measures)):
+            sink, dest_id = self.parameterAsSink(parameters, key, context, layer.fields(), layer.wkbType(), crs)
+            if sink is None:
+                raise QgsProcessingException(self.invalidSinkError(parameters, key))
+            with BufferedFeatureWriter(sink, feedback=feedback) as writer:
+                writer.extend(layer.getFeatures())
+            results[key] = dest_id
+        if feedback.isCanceled():
+            return {}
+
+        workers = min(workers, max(1, pages // MIN_PAGES_PER_WORKER))
+        if workers > 1 and not has_pdf_merge():
+            feedback.reportError("Para exportar en paralelo se necesita la librería 'pypdf'; se exporta en un solo proceso.")
+            workers = 1
+
+        # Proyecto propio: el atlas no depende del proyecto abierto ni lo modifica
+        project = QgsProject()
+        project.setCrs(crs)
+        service = SurveyPlanService(project, warn=lambda title, message: feedback.reportError(f"{title}: {message}"))
+        layers = (parcels, vertices, measures)
+        if workers > 1:
+            # Cada proceso abre el proyecto guardado: las capas tienen que estar en disco
+            layers = tuple(
+                service.save_and_load_layer(layer, QgsProcessingUtils.generateTempFilename(f"atlas_{name}.gpkg"))
+                for layer, name in zip(layers, ('parcelas', 'vertices', 'medidas'))
+            )
+            if any(layer.providerType() == 'memory' for layer in layers):
+                # Una capa en memoria no existe en los otros procesos: páginas vacías
+                feedback.reportError("No se pudieron guardar las capas en disco; se exporta en un solo proceso.")
+                workers = 1
+        for layer in layers:
+            project.addMapLayer(layer)
+
+        feedback.pushInfo("Configurando atlas...")
+        try:
+            template_path, layout_suffix = service.resolve_template(paper_size, orientation, template)
+        except FileNotFoundError as e:
+            raise QgsProcessingException(str(e))
+        feedback.pushInfo(f"Plantilla: {service.last_template_used}")
+        layout = layout_from_template(project, template_path)
+        layout.setName(f"Atlas_{layout_suffix}")
+        configure_atlas(layout, layers[0], layers[1], crs, info, info_fields)
+        project.layoutManager().addLayout(layout)
+        feedback.setProgress(70)
+
+        start = time.perf_counter()
+        try:
+            if workers > 1:
+                feedback.pushInfo(f"Exportando {pages} páginas en {workers} procesos...")
+                project_path = QgsProcessingUtils.generateTempFilename("atlas.qgz")
+                if not project.write(project_path):
+                    raise QgsProcessingException(f"No se pudo guardar el proyecto temporal {project_path}")
+                if export_atlas_parallel(project_path, layout.name(), pdf_path, pages, workers, feedback) is None:
+                    return {}
+            else:
+                feedback.pushInfo(f"Exportando {pages} páginas...")
+                export_atlas_pdf(layout, pdf_path)
+        except (RuntimeError, ImportError) as e:
+            raise QgsProcessingException(str(e))
+        seconds = time.perf_counter() - start
+        feedback.pushInfo(f"PDF exportado en {seconds:.1f} s ({pages / max(seconds, 1e-9):.1f} páginas/s).")
+        feedback.setProgress(100)
+
+        results.update({self.OUTPUT_PDF: pdf_path, self.PAGES: pages})
+        return results
+
+    def _read_table(self, source, x_field, y_field, group_field, info_fields, expression, feedback):
+        """
+        Lee la tabla larga de coordenadas.
+
+        Returns:
+            tuple: (xs, ys, ids, {ID: valores de info_fields de su primera fila})
+        """
+        request = build_request(source.fields(), [x_field, y_field, group_field] + info_fields,
+                                geometry=False, expression=expression)
+        total = source.featureCount() or 1
+        xs, ys, keys, attributes = [], [], [], {}
+        for i, feature in enumerate(source.getFeatures(request)):
+            if feedback.isCanceled():
+                break
+            if i % 1000 == 0:
+                feedback.setProgress(int(i / total * 30))
+            group = feature[group_field]
+            if _is_null(group) or group == '':
+                feedback.reportError(f"Fila {i+1}: Sin valor en el campo de parcela (se omite).")
+                continue
+            try:
+                x, y = _to_float(feature[x_field]), _to_float(feature[y_field])
+            except (ValueError, TypeError):
+                feedback.reportError(f"Fila {i+1}: Valor inválido en coordenadas (se omite).")
+                continue
+            key = _parcel_key(group)
+            xs.append(x)
+            ys.append(y)
+            keys.append(key)
+            if key not in attributes:
+                attributes[key] = [None if _is_null(feature[name]) else str(feature[name]) for name in info_fields]
+
+        # IDs numéricos: páginas en orden numérico; si no, como texto
+        if keys and all(isinstance(key, int) for key in keys):
+            ids = np.array(keys, dtype=np.int64)
+        else:
+            attributes = {str(key): values for key, values in attributes.items()}
+            ids = np.array([str(key) for key in keys], dtype=str)
+        return np.array(xs, dtype=float), np.array(ys, dtype=float), ids, attributes
+
+    def name(self):
+        return 'generate_survey_atlas'
+
+    def displayName(self):
+        return self.tr('Generar Planos por Parcela (Atlas PDF)')
+
+    def group(self):
+        return self.tr('Levantamientos Topográficos')
+
+    def groupId(self):
+        return 'topography'
+
+    def shortHelpString(self):
+        return self.tr("""
+        <h3>Generar Planos por Parcela (Atlas)</h3>
+
+        <p>Genera un plano por parcela a partir de una tabla larga de coordenadas (una fila por
+        vértice y un <i>campo de parcela</i>, p. ej. <i>Poligono_ID</i>), con un único layout:
+        la plantilla se carga una vez y un <b>atlas</b> recorre la capa de parcelas. Cada página
+        centra el mapa en su parcela, filtra la tabla de coordenadas a sus vértices y muestra su
+        área. Todas las páginas se exportan a un solo PDF.</p>
+
+        <p><b>Datos del proyecto:</b> pares <i>ID=valor</i> separados por punto y coma, comunes a
+        todas las páginas. Un valor que empieza por <i>=</i> es una expresión evaluada en cada
+        parcela (p. ej. <i>TITULO==concat('Lote ', "parcela")</i>). Los <i>campos con datos de
+        cada parcela</i> (p. ej. PROPIETARIO) se copian a la capa de parcelas desde la primera
+        fila de cada una y rellenan la etiqueta con el mismo ID.</p>
+
+        <p><b>Procesos:</b> con más de uno, las páginas se reparten por rangos entre procesos y
+        los PDF parciales se unen al final. Requiere la librería <i>pypdf</i>; sin ella se exporta
+        en un solo proceso.</p>
+        """)
+
+    def tr(self, string):
+        return QCoreApplication.translate('Processing', string)
+
+    def createInstance(self):
+        return GenerateSurveyAtlasAlgorithm()
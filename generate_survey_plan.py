@@ -0,0 +1,331 @@
+"""
+Algoritmo para generar el plano de levantamiento sin el asistente
+Compatible con Qt5/Qt6 y QGIS 3.x/4.x
+
+Ejecuta el mismo proceso que el diálogo (capas Lote/Vértices/Medidas y layout
+desde plantilla) y exporta el layout a PDF. Funciona con qgis_process y con
+la interfaz de lotes de Processing.
+"""
+import os
+from datetime import date
+
+from qgis.PyQt.QtCore import QCoreApplication
+from qgis.core import (
+    Qgis,
+    QgsProject,
+    QgsProcessing,
+    QgsProcessingAlgorithm,
+    QgsProcessingException,
+    QgsProcessingParameterFeatureSource,
+    QgsProcessingParameterFeatureSink,
+    QgsProcessingParameterField,
+    QgsProcessingParameterExpression,
+    QgsProcessingParameterCrs,
+    QgsProcessingParameterString,
+    QgsProcessingParameterEnum,
+    QgsProcessingParameterFile,
+    QgsProcessingParameterNumber,
+    QgsProcessingParameterFileDestination,
+    QgsProcessingOutputNumber
+)
+
+from .topographic_calculator import TopographicCalculator
+from .feature_buffer import BufferedFeatureWriter
+from .feature_request import build_request
+from .create_polygon_from_csv import _to_float
+from .survey_plan_service import SurveyPlanService, PAPER_SIZES, ORIENTATIONS, parse_info, export_pdf
+
+try:
+    NO_THREADING = Qgis.ProcessingAlgorithmFlag.NoThreading
+except AttributeError:
+    NO_THREADING = QgsProcessingAlgorithm.FlagNoThreading
+
+
+class GenerateSurveyPlanAlgorithm(QgsProcessingAlgorithm):
+    """
+    Genera las capas y el plano en PDF de un levantamiento a partir de una tabla de coordenadas.
+    """
+
+    INPUT = 'INPUT'
+    X_FIELD = 'X_FIELD'
+    Y_FIELD = 'Y_FIELD'
+    FILTER = 'FILTER'
+    CRS = 'CRS'
+    NAME = 'NAME'
+    INFO = 'INFO'
+    PAPER_SIZE = 'PAPER_SIZE'
+    ORIENTATION = 'ORIENTATION'
+    TEMPLATE = 'TEMPLATE'
+    DECIMALS = 'DECIMALS'
+    OUTPUT_POLYGON = 'OUTPUT_POLYGON'
+    OUTPUT_VERTICES = 'OUTPUT_VERTICES'
+    OUTPUT_MEASURES = 'OUTPUT_MEASURES'
+    OUTPUT_PDF = 'OUTPUT_PDF'
+    AREA = 'AREA'
+    PERIMETER = 'PERIMETER'
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(
+            QgsProcessingParameterFeatureSource(
+                self.INPUT,
+                self.tr('Tabla de Coordenadas (CSV/Excel/Capa)'),
+                [QgsProcessing.TypeVector]
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.X_FIELD,
+                self.tr('Campo X (Este)'),
+                parentLayerParameterName=self.INPUT,
+                type=QgsProcessingParameterField.Any
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.Y_FIELD,
+                self.tr('Campo Y (Norte)'),
+                parentLayerParameterName=self.INPUT,
+                type=QgsProcessingParameterField.Any
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterExpression(
+                self.FILTER,
+                self.tr('Filtro de filas (expresión, opcional)'),
+                parentLayerParameterName=self.INPUT,
+                optional=True
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterCrs(
+                self.CRS,
+                self.tr('Sistema de Referencia de Coordenadas (CRS)'),
+                defaultValue='EPSG:32717'
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterString(
+                self.NAME,
+                self.tr('Nombre del levantamiento (vacío = nombre de la tabla)'),
+                optional=True
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterString(
+                self.INFO,
+                self.tr('Datos del proyecto (ID=valor separados por ";")'),
+                defaultValue='TITULO=LEVANTAMIENTO PLANIMÉTRICO;PROPIETARIO=;UBICACION=',
+                multiLine=True,
+                optional=True
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.PAPER_SIZE,
+                self.tr('Tamaño de papel'),
+                options=PAPER_SIZES,
+                defaultValue=0
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.ORIENTATION,
+                self.tr('Orientación'),
+                options=ORIENTATIONS,
+                defaultValue=0
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterFile(
+                self.TEMPLATE,
+                self.tr('Plantilla personalizada (.qpt, opcional)'),
+                extension='qpt',
+                optional=True
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.DECIMALS,
+                self.tr('Decimales en coordenadas'),
+                type=QgsProcessingParameterNumber.Integer,
+                defaultValue=2,
+                minValue=0,
+                maxValue=4
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.OUTPUT_POLYGON,
+                self.tr('Lote'),
+                QgsProcessing.TypeVectorPolygon
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.OUTPUT_VERTICES,
+                self.tr('Vértices'),
+                QgsProcessing.TypeVectorPoint
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.OUTPUT_MEASURES,
+                self.tr('Medidas'),
+                QgsProcessing.TypeVectorLine
+            )
+        )
+
+        self.addParameter(
+            QgsProcessingParameterFileDestination(
+                self.OUTPUT_PDF,
+                self.tr('Plano (PDF)'),
+                'PDF (*.pdf)'
+            )
+        )
+
+        self.addOutput(QgsProcessingOutputNumber(self.AREA, self.tr('Área (m²)')))
+        self.addOutput(QgsProcessingOutputNumber(self.PERIMETER, self.tr('Perímetro (m)')))
+
+    def flags(self):
+        # Layouts y exportación a PDF trabajan con objetos gráficos de Qt: hilo principal
+        return super().flags() | NO_THREADING
+
+    def processAlgorithm(self, parameters, context, feedback):
+        source = self.parameterAsSource(parameters, self.INPUT, context)
+        if source is None:
+            raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT))
+
+        x_field = self.parameterAsString(parameters, self.X_FIELD, context)
+        y_field = self.parameterAsString(parameters, self.Y_FIELD, context)
+        expression = self.parameterAsExpression(parameters, self.FILTER, context)
+        crs = self.parameterAsCrs(parameters, self.CRS, context)
+        if not crs.isValid():
+            raise QgsProcessingException(self.tr('Sistema de coordenadas no válido.'))
+
+        base_name = self.parameterAsString(parameters, self.NAME, context).strip() or source.sourceName() or 'Levantamiento'
+        info = parse_info(self.parameterAsString(parameters, self.INFO, context))
+        info.setdefault('FECHA', date.today().strftime('%Y-%m-%d'))
+        paper_size = PAPER_SIZES[self.parameterAsEnum(parameters, self.PAPER_SIZE, context)]
+        orientation = ORIENTATIONS[self.parameterAsEnum(parameters, self.ORIENTATION, context)]
+        template = self.parameterAsFile(parameters, self.TEMPLATE, context) or None
+        decimals = self.parameterAsInt(parameters, self.DECIMALS, context)
+        pdf_path = self.parameterAsFileOutput(parameters, self.OUTPUT_PDF, context)
+
+        feedback.pushInfo("Leyendo coordenadas...")
+        coordinates = self._read_coordinates(source, x_field, y_field, expression, feedback)
+        if feedback.isCanceled():
+            return {}
+        if len(coordinates) < 3:
+            raise QgsProcessingException(self.tr('Se requieren al menos 3 puntos válidos para crear un polígono.'))
+        feedback.setProgress(30)
+
+        survey_table, area = TopographicCalculator.generate_survey_table(coordinates)
+        perimeter = TopographicCalculator.calculate_perimeter(survey_table)
+        feedback.setProgress(40)
+
+        # Proyecto propio: el plano no depende del proyecto abierto ni lo modifica
+        project = QgsProject()
+        project.setCrs(crs)
+        service = SurveyPlanService(project, warn=lambda title, message: feedback.reportError(f"{title}: {message}"))
+
+        feedback.pushInfo(f"Creando capas ({len(coordinates)} vértices)...")
+        layers = service.create_layers(coordinates, crs, area, survey_table, decimals, base_name=base_name)
+
+        results = {}
+        for key, layer in zip((self.OUTPUT_POLYGON, self.OUTPUT_VERTICES, self.OUTPUT_MEASURES), layers):
+            sink, dest_id = self.parameterAsSink(parameters, key, context, layer.fields(), layer.wkbType(), crs)
+            if sink is None:
+                raise QgsProcessingException(self.invalidSinkError(parameters, key))
+            with BufferedFeatureWriter(sink, feedback=feedback) as writer:
+                writer.extend(layer.getFeatures())
+            results[key] = dest_id
+        if feedback.isCanceled():
+            return {}
+        feedback.setProgress(60)
+
+        feedback.pushInfo("Generando layout...")
+        try:
+            layout = service.create_layout(layers, area, crs, info, base_name, paper_size, orientation,
+                                           template, add_to_project=False)
+        except FileNotFoundError as e:
+            raise QgsProcessingException(str(e))
+        feedback.pushInfo(f"Plantilla: {service.last_template_used}")
+        feedback.setProgress(80)
+
+        feedback.pushInfo("Exportando PDF...")
+        try:
+            export_pdf(layout, pdf_path)
+        except RuntimeError as e:
+            raise QgsProcessingException(str(e))
+        feedback.setProgress(100)
+
+        results.update({self.OUTPUT_PDF: pdf_path, self.AREA: area, self.PERIMETER: perimeter})
+        return results
+
+    def _read_coordinates(self, source, x_field, y_field, expression, feedback):
+        """Lee los pares (x, y) en el orden de la tabla, omitiendo filas inválidas."""
+        request = build_request(source.fields(), [x_field, y_field], geometry=False, expression=expression)
+        total = source.featureCount() or 1
+        coordinates = []
+        for i, feature in enumerate(source.getFeatures(request)):
+            if feedback.isCanceled():
+                break
+            try:
+                coordinates.append((_to_float(feature[x_field]), _to_float(feature[y_field])))
+            except (ValueError, TypeError):
+                feedback.reportError(f"Fila {i+1}: Valor inválido en coordenadas (se omite).")
+            if i % 1000 == 0:
+                feedback.setProgress(int(i / total * 30))
+        return coordinates
+
+    def name(self):
+        return 'generate_survey_plan'
+
+    def displayName(self):
+        return self.tr('Generar Plano de Levantamiento (PDF)')
+
+    def group(self):
+        return self.tr('Levantamientos Topográficos')
+
+    def groupId(self):
+        return 'topography'
+
+    def shortHelpString(self):
+        return self.tr("""
+        <h3>Generar Plano de Levantamiento</h3>
+
+        <p>Hace lo mismo que el asistente <i>Generar Plano desde CSV/Excel</i>, sin interfaz:
+        a partir de una tabla de coordenadas X, Y en orden secuencial crea las capas
+        <b>Lote</b>, <b>Vértices</b> y <b>Medidas</b> (rumbos y distancias), rellena la
+        plantilla de impresión y exporta el plano a <b>PDF</b>.</p>
+
+        <p><b>Datos del proyecto:</b> pares <i>ID=valor</i> separados por punto y coma, p. ej.
+        <i>TITULO=Lote 12;PROPIETARIO=Juan Pérez;UBICACION=Loja</i>. El ID es el del elemento
+        en la plantilla o el marcador <i>{ID}</i> dentro de un texto. Si no se indica FECHA se
+        usa la fecha actual.</p>
+
+        <p><b>Plantilla:</b> se usa la del tamaño y orientación elegidos o, si falta, la de tamaño
+        más cercano. Una plantilla personalizada (.qpt) tiene prioridad.</p>
+
+        <p>Se puede ejecutar por lotes (un plano por tabla) desde la interfaz de procesos por lotes
+        o con <i>qgis_process run arcgeek_topo:generate_survey_plan</i>.</p>
+        """)
+
+    def tr(self, string):
+        return QCoreApplication.translate('Processing', string)
+
+    def createInstance(self):
+        return GenerateSurveyPlanAlgorithm()
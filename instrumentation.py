@@ -0,0 +1,133 @@
+"""
+Instrumentación por etapas: tiempo de reloj y pico de memoria
+Compatible con Qt5/Qt6 y QGIS 3.x/4.x
+"""
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class SurveyProfiler:
+    """
+    Registra el tiempo y el pico de memoria (tracemalloc) de cada etapa.
+
+    Uso:
+        profiler = SurveyProfiler("parcela.csv", log_path=".../profile.jsonl")
+        with profiler.stage("lectura_archivo"):
+            ...
+        profiler.finish()
+
+    El pico de cada etapa es la memoria adicional que llegó a reservar sobre la
+    existente al empezar. Las etapas pueden anidarse: el pico de una etapa
+    incluye el de sus hijas.
+    Con enabled=False todas las llamadas son no-op (sin coste de tracemalloc).
+    """
+
+    def __init__(self, label="", enabled=True, log_path=None, message_log=False):
+        """
+        Args:
+            label: Identificador de la ejecución (p. ej. nombre del archivo)
+            enabled: Activa la medición
+            log_path: Archivo JSONL donde se añade una línea por ejecución
+            message_log: Si es True, muestra el resumen en el registro de mensajes de QGIS
+        """
+        self.label = label
+        self.enabled = enabled
+        self.log_path = log_path
+        self.message_log = message_log
+        self.stages = []
+        self._stack = []
+        self._started_tracing = False
+        self._finished = False
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        """Mide el bloque 'with' como una etapa con el nombre indicado."""
+        if not self.enabled:
+            yield
+            return
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+        # Se registra al entrar para conservar el orden de inicio de las etapas
+        record = {'stage': name, 'depth': len(self._stack)}
+        self.stages.append(record)
+
+        # Pico de las etapas hijas: reset_peak() borra el de la etapa padre
+        self._stack.append(0)
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            peak = max(tracemalloc.get_traced_memory()[1], self._stack.pop())
+            if self._stack:
+                self._stack[-1] = max(self._stack[-1], peak)
+            record['seconds'] = round(elapsed, 6)
+            # Memoria adicional reservada por la etapa sobre la existente al iniciarla
+            record['peak_kb'] = round(max(peak - base, 0) / 1024.0, 1)
+
+    def finish(self, **extra):
+        """
+        Cierra la ejecución: escribe la línea JSONL y, si se pidió, el resumen
+        en el registro de mensajes.
+
+        Args:
+            **extra: Datos adicionales de la ejecución (vértices, estado, ...)
+
+        Returns:
+            dict: Registro de la ejecución (None si ya se había cerrado)
+        """
+        if not self.enabled or self._finished:
+            return None
+        self._finished = True
+
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+        record = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'label': self.label,
+            'total_seconds': round(time.perf_counter() - self._t0, 6),
+            'stages': self.stages
+        }
+        record.update(extra)
+
+        if self.log_path:
+            folder = os.path.dirname(self.log_path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        if self.message_log:
+            self._log_to_qgis(record)
+
+        return record
+
+    def summary(self):
+        """Texto con una línea por etapa."""
+        lines = [f"Perfil de '{self.label}':"]
+        for s in self.stages:
+            indent = "  " * (s['depth'] + 1)
+            lines.append(f"{indent}{s['stage']}: {s['seconds']:.3f} s, pico {s['peak_kb']:.0f} KB")
+        return "\n".join(lines)
+
+    def _log_to_qgis(self, record):
+        try:
+            from qgis.core import QgsMessageLog, Qgis
+        except ImportError:
+            return
+        QgsMessageLog.logMessage(
+            self.summary() + f"\n  total: {record['total_seconds']:.3f} s",
+            "ArcGeek Topo", Qgis.Info
+        )
@@ -0,0 +1,73 @@
+"""
+Utilidades para ejecutar cálculos en un pool de procesos
+Compatible con Qt5/Qt6 y QGIS 3.x/4.x
+"""
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+
+def default_workers():
+    """Número de procesos por defecto: todos los núcleos menos uno."""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def python_executable():
+    """
+    Devuelve el intérprete de Python con el que lanzar procesos hijos.
+
+    Dentro de QGIS, sys.executable apunta al binario de QGIS (qgis-bin.exe,
+    qgis...) y no a Python, por lo que multiprocessing no puede usarlo.
+    """
+    exe = sys.executable or ""
+    if os.path.basename(exe).lower().startswith("python"):
+        return exe
+
+    candidates = [
+        os.path.join(sys.exec_prefix, "pythonw.exe"),
+        os.path.join(sys.exec_prefix, "python.exe"),
+        os.path.join(sys.exec_prefix, "bin", "python3"),
+        os.path.join(sys.exec_prefix, "bin", "python"),
+    ]
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    return exe
+
+
+def create_process_pool(max_workers=None):
+    """
+    Crea un ProcessPoolExecutor seguro para usar desde QGIS.
+
+    Se usa siempre 'spawn' (fork no es seguro con Qt) y el intérprete de
+    Python real en lugar del ejecutable de QGIS.
+
+    Args:
+        max_workers: Número de procesos (None = default_workers())
+
+    Returns:
+        ProcessPoolExecutor
+    """
+    ctx = multiprocessing.get_context("spawn")
+    ctx.set_executable(python_executable())
+    return ProcessPoolExecutor(max_workers=max_workers or default_workers(), mp_context=ctx)
+
+
+def split_ranges(total, parts):
+    """
+    Divide el rango [0, total) en hasta 'parts' tramos contiguos de tamaño similar.
+
+    Returns:
+        list: Lista de tuplas (inicio, fin)
+    """
+    parts = max(1, min(parts, total))
+    step, extra = divmod(total, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        end = start + step + (1 if i < extra else 0)
+        if end > start:
+            ranges.append((start, end))
+        start = end
+    return ranges
@@ -0,0 +1,184 @@
+"""
+Orden y numeración de los vértices de un anillo
+Compatible con Qt5/Qt6 y QGIS 3.x/4.x
+
+Funciones sobre arreglos NumPy, sin dependencias de QGIS.
+"""
+import struct
+
+import numpy as np
+
+
+def nearest_vertex(xs, ys, x, y):
+    """
+    Vértice más cercano a un punto (búsqueda vectorizada).
+
+    Ante empates se devuelve el primero, como en un recorrido secuencial.
+
+    Args:
+        xs, ys: Coordenadas de los vértices
+        x, y: Punto de referencia
+
+    Returns:
+        tuple: (índice, distancia)
+    """
+    distances = np.hypot(np.asarray(xs, dtype=float) - x, np.asarray(ys, dtype=float) - y)
+    index = int(np.argmin(distances))
+    return index, float(distances[index])
+
+
+def northmost_vertex(ys):
+    """Índice del primer vértice con la mayor Y (punto más al norte)."""
+    return int(np.argmax(ys))
+
+
+def order_ring(xs, ys, start_index):
+    """
+    Numera los vértices de un anillo desde 'start_index'.
+
+    Recorre el anillo en su sentido original (Punto_ID_H) y calcula la
+    numeración inversa (Punto_ID_AH); el vértice inicial es el 1 en ambos
+    sentidos. Los vértices repetidos se omiten (se conserva el primero del
+    recorrido), pero la numeración inversa usa el total de vértices del anillo.
+
+    Args:
+        xs, ys: Coordenadas del anillo sin el vértice de cierre
+        start_index: Índice del vértice inicial
+
+    Returns:
+        tuple: (id_h, id_ah, x, y) como arreglos NumPy
+    """
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    num_points = len(xs)
+    if num_points == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, xs, ys
+
+    order = (start_index + np.arange(num_points)) % num_points
+    xs, ys = xs[order], ys[order]
+
+    # Primera aparición de cada par (x, y) en el recorrido
+    _, first = np.unique(xs + 1j * ys, return_index=True)
+    if len(first) < num_points:
+        first.sort()
+        xs, ys = xs[first], ys[first]
+
+    id_h = np.arange(1, len(xs) + 1, dtype=np.int64)
+    id_ah = num_points - id_h + 2
+    id_ah[0] = 1
+    return id_h, id_ah, xs, ys
+
+
+def exterior_rings(wkb):
+    """
+    Anillos exteriores de un Polygon o MultiPolygon en WKB (ISO o EWKB, 2D/Z/M/ZM).
+
+    Se descarta el vértice de cierre y se omiten los anillos vacíos.
+
+    Args:
+        wkb: bytes con la geometría
+
+    Returns:
+        list: Tuplas (xs, ys) de cada anillo exterior
+
+    Raises:
+        ValueError: Si la geometría no es un polígono o multipolígono
+    """
+    rings = []
+    _read_polygons(memoryview(wkb), 0, rings)
+    return rings
+
+
+def _wkb_header(buf, offset):
+    """Devuelve (tipo base, dimensiones, orden de bytes, desplazamiento tras la cabecera)."""
+    order = '<' if buf[offset] == 1 else '>'
+    (code,) = struct.unpack_from(order + 'I', buf, offset + 1)
+    offset += 5
+    dims = 2
+    if code & 0x80000000:  # EWKB con Z
+        dims += 1
+    if code & 0x40000000:  # EWKB con M
+        dims += 1
+    if code & 0x20000000:  # EWKB con SRID
+        offset += 4
+    code &= 0x0FFFFFFF
+    dims += {0: 0, 1: 1, 2: 1, 3: 2}.get(code // 1000, 0)
+    return code % 1000, dims, order, offset
+
+
+def _read_polygons(buf, offset, rings):
+    geom_type, dims, order, offset = _wkb_header(buf, offset)
+    if geom_type == 6:  # MultiPolygon
+        (parts,) = struct.unpack_from(order + 'I', buf, offset)
+        offset += 4
+        for _ in range(parts):
+            offset = _read_polygons(buf, offset, rings)
+        return offset
+    if geom_type != 3:
+        raise ValueError(f"Tipo WKB no soportado: {geom_type}")
+
+    (ring_count,) = struct.unpack_from(order + 'I', buf, offset)
+    offset += 4
+    for r in range(ring_count):
+        (n,) = struct.unpack_from(order + 'I', buf, offset)
+        offset += 4
+        if r == 0 and n:
+            coords = np.frombuffer(buf, dtype=order + 'f8', count=n * dims, offset=offset).reshape(n, dims)
+            xs, ys = coords[:, 0], coords[:, 1]
+            # Vértice de cierre (misma tolerancia que QgsPointXY ==)
+            if abs(xs[0] - xs[-1]) <= 1e-8 and abs(ys[0] - ys[-1]) <= 1e-8:
+                xs, ys = xs[:-1], ys[:-1]
+            if len(xs):
+                rings.append((xs.astype(float), ys.astype(float)))
+        offset += n * dims * 8
+    return offset
+
+
+def order_chunk(items):
+    """
+    Ordena y numera los anillos exteriores de un bloque de polígonos.
+
+    Es la tarea que se envía al pool de procesos: recibe WKB y devuelve
+    arreglos planos para que el intercambio entre procesos sea barato.
+
+    Args:
+        items: Lista de tuplas (geometría, inicio); geometría es el WKB del
+            polígono o una lista de anillos (xs, ys) ya leídos; inicio es
+            (x, y) para partir del vértice más cercano o None para partir
+            del más al norte
+
+    Returns:
+        dict: id_h, id_ah, x, y, x_round, y_round (todos los vértices,
+            concatenados; x_round/y_round redondeadas a 3 decimales),
+            counts (vértices por anillo), start_index y distance (NaN sin
+            punto de inicio) por anillo, y rings (anillos por polígono)
+    """
+    parts = {'id_h': [], 'id_ah': [], 'x': [], 'y': []}
+    counts, start_indexes, distances, ring_counts = [], [], [], []
+    for geometry, start in items:
+        rings = exterior_rings(geometry) if isinstance(geometry, (bytes, bytearray)) else geometry
+        ring_counts.append(len(rings))
+        for xs, ys in rings:
+            if start is not None:
+                start_index, distance = nearest_vertex(xs, ys, start[0], start[1])
+            else:
+                start_index, distance = northmost_vertex(ys), np.nan
+            for key, values in zip(('id_h', 'id_ah', 'x', 'y'), order_ring(xs, ys, start_index)):
+                parts[key].append(values)
+            counts.append(len(parts['x'][-1]))
+            start_indexes.append(start_index)
+            distances.append(distance)
+
+    result = {
+        key: np.concatenate(values) if values else np.empty(0, dtype=np.int64 if key.startswith('id') else float)
+        for key, values in parts.items()
+    }
+    # Coordenadas redondeadas a mm para los atributos (round de Python, como en serie)
+    result['x_round'] = np.array([round(v, 3) for v in result['x'].tolist()], dtype=float)
+    result['y_round'] = np.array([round(v, 3) for v in result['y'].tolist()], dtype=float)
+    result['counts'] = np.array(counts, dtype=np.int64)
+    result['start_index'] = np.array(start_indexes, dtype=np.int64)
+    result['distance'] = np.array(distances, dtype=float)
+    result['rings'] = np.array(ring_counts, dtype=np.int64)
+    return result
@@ -0,0 +1,167 @@
+"""
+Caché binaria en columnas junto al archivo de coordenadas
+Compatible con Qt5/Qt6 y QGIS 3.x/4.x
+"""
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+
+SIDECAR_SUFFIX = ".arcgeek"
+SIDECAR_VERSION = 1
+
+_MAGIC = b"ARCGEEK\x00"
+_ALIGN = 64
+_HASH_CHUNK = 1024 * 1024
+
+
+def sidecar_path(source):
+    """Ruta de la caché binaria de un archivo: 'datos.csv' -> 'datos.csv.arcgeek'."""
+    return source + SIDECAR_SUFFIX
+
+
+def file_hash(path):
+    """Hash blake2b (128 bits) del contenido del archivo."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _aligned(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _read_header(path):
+    """Devuelve (cabecera, inicio de los datos) o (None, None) si no es una caché válida."""
+    with open(path, 'rb') as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            return None, None
+        size = f.read(4)
+        if len(size) != 4:
+            return None, None
+        (length,) = struct.unpack('<I', size)
+        header = json.loads(f.read(length).decode('utf-8'))
+    if header.get('version') != SIDECAR_VERSION:
+        return None, None
+    return header, _aligned(len(_MAGIC) + 4 + length)
+
+
+def write_sidecar(source, columns, dialect=None, reader="", source_hash=None):
+    """
+    Escribe la caché binaria de las columnas ya leídas de 'source'.
+
+    Formato: firma, longitud y cabecera JSON (hash del origen, lector,
+    dialecto y posición de cada columna) y después los datos de cada columna
+    alineados a 64 bytes, en el orden de bytes de la máquina.
+
+    Args:
+        source: Ruta del archivo de origen (CSV/TXT/XLSX)
+        columns: dict nombre -> np.ndarray 1D (numérico o de texto 'U')
+        dialect: Datos del formato detectado (se guardan tal cual en la cabecera)
+        reader: Identificador del lector que produjo las columnas; una caché
+            solo se reutiliza con el mismo lector
+        source_hash: Hash de 'source' si ya se calculó
+
+    Returns:
+        str: Ruta de la caché, o None si no pudo escribirse
+    """
+    target = sidecar_path(source)
+    try:
+        source_hash = source_hash or file_hash(source)
+        arrays = {name: np.ascontiguousarray(values) for name, values in columns.items()}
+
+        entries = []
+        offset = 0
+        for name, values in arrays.items():
+            if values.dtype == object:
+                values = arrays[name] = values.astype(str)
+            entries.append({
+                'name': name,
+                'dtype': values.dtype.str,
+                'length': int(values.shape[0]),
+                'offset': offset
+            })
+            offset = _aligned(offset + values.nbytes)
+
+        header = json.dumps({
+            'version': SIDECAR_VERSION,
+            'source_hash': source_hash,
+            'source_size': os.path.getsize(source),
+            'reader': reader,
+            'dialect': dialect,
+            'columns': entries
+        }, ensure_ascii=False).encode('utf-8')
+        data_start = _aligned(len(_MAGIC) + 4 + len(header))
+
+        tmp = target + ".tmp"
+        with open(tmp, 'wb') as f:
+            f.write(_MAGIC)
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            for entry, values in zip(entries, arrays.values()):
+                f.seek(data_start + entry['offset'])
+                f.write(values.tobytes())
+            f.truncate(data_start + offset)
+        os.replace(tmp, target)
+        return target
+    except OSError:
+        # La caché es opcional: carpeta de solo lectura, archivo bloqueado, ...
+        try:
+            os.remove(target + ".tmp")
+        except OSError:
+            pass
+        return None
+
+
+def load_sidecar(source, columns=None, reader="", source_hash=None):
+    """
+    Carga la caché binaria de 'source' sin copiar los datos (np.memmap).
+
+    La caché solo es válida si el hash del archivo de origen coincide con el
+    registrado y fue escrita por el mismo lector.
+
+    Args:
+        source: Ruta del archivo de origen
+        columns: Columnas necesarias (None = todas las guardadas)
+        reader: Identificador del lector esperado
+        source_hash: Hash de 'source' si ya se calculó
+
+    Returns:
+        tuple: (dict nombre -> np.memmap de solo lectura, dialecto),
+            o None si no hay caché, está desactualizada o le faltan columnas
+    """
+    path = sidecar_path(source)
+    if not os.path.exists(path):
+        return None
+    try:
+        header, data_start = _read_header(path)
+        if header is None or header.get('reader') != reader:
+            return None
+        if header['source_size'] != os.path.getsize(source):
+            return None
+        if header['source_hash'] != (source_hash or file_hash(source)):
+            return None
+
+        entries = {entry['name']: entry for entry in header['columns']}
+        names = list(entries) if columns is None else list(columns)
+        if any(name not in entries for name in names):
+            return None
+
+        result = {}
+        for name in names:
+            entry = entries[name]
+            if entry['length'] == 0:
+                result[name] = np.empty(0, dtype=np.dtype(entry['dtype']))
+                continue
+            result[name] = np.memmap(
+                path, dtype=np.dtype(entry['dtype']), mode='r',
+                offset=data_start + entry['offset'], shape=(entry['length'],)
+            )
+        return result, header.get('dialect')
+    except (OSError, ValueError, KeyError):
+        return None
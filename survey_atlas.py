@@ -0,0 +1,338 @@
+"""
+Planos de muchas parcelas con un atlas de impresión
+Compatible con Qt5/Qt6 y QGIS 3.x/4.x
+
+En lugar de un layout y tres capas por parcela, las parcelas van en tres
+capas comunes (Parcelas, Vértices, Medidas) y un único layout con atlas
+recorre la capa de parcelas: el mapa sigue a cada parcela, la tabla de
+coordenadas se filtra por la parcela actual y las etiquetas son expresiones.
+"""
+import os
+import shutil
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from qgis.PyQt.QtCore import QVariant
+from qgis.core import (
+    QgsApplication, QgsProject, QgsVectorLayer, QgsFeature, QgsGeometry, QgsPointXY,
+    QgsField, QgsLayoutItemLabel, QgsLayoutItemMap, QgsLayoutExporter
+)
+
+from .topographic_calculator import TopographicCalculator
+from .feature_buffer import BufferedFeatureWriter
+from .parallel import create_process_pool, split_ranges
+from .survey_plan_service import (
+    vertex_features, measure_features, style_polygon_layer, style_vertex_layer,
+    style_measures_layer, set_crs_label, set_info_labels, set_vertex_table, link_scalebar_to_map
+)
+
+
+ID_FIELD = 'parcela'
+PAGE_FIELD = 'pagina'
+AREA_TEXT_FIELD = 'area_texto'
+
+# Campos propios de la capa de parcelas (los atributos copiados de la tabla no pueden repetirlos)
+PARCEL_FIELDS = [ID_FIELD, PAGE_FIELD, 'area_m2', 'perimetro', 'vertices', AREA_TEXT_FIELD]
+
+# Parte del mapa que rodea a cada parcela
+ATLAS_MARGIN = 0.1
+
+# QgsApplication de los procesos que exportan páginas
+_WORKER_APP = None
+
+
+def _import_pypdf():
+    """pypdf es opcional: sin él la exportación del atlas no se reparte entre procesos."""
+    try:
+        import pypdf
+    except ImportError:
+        return None
+    return pypdf
+
+
+def has_pdf_merge():
+    """True si se pueden unir PDF (exportación en paralelo)."""
+    return _import_pypdf() is not None
+
+
+def create_atlas_layers(batch, crs, decimals=2, attributes=None, feedback=None):
+    """
+    Crea las capas comunes de todas las parcelas.
+
+    Args:
+        batch: Resultado de TopographicCalculator.generate_batch_survey
+        crs: QgsCoordinateReferenceSystem
+        decimals: Decimales de las coordenadas en la capa de vértices
+        attributes: (nombres, {ID de parcela: valores}) que se copian a la
+            capa de parcelas para usarlos en las etiquetas (opcional)
+        feedback: QgsFeedback para el progreso y la cancelación (opcional)
+
+    Returns:
+        tuple: (parcelas, vértices, medidas, IDs omitidos por tener menos de 3 vértices)
+    """
+    names, values = attributes or ([], {})
+
+    parcels = QgsVectorLayer(f"Polygon?crs={crs.authid()}", "Parcelas", "memory")
+    parcels.dataProvider().addAttributes(
+        [QgsField(ID_FIELD, QVariant.String), QgsField(PAGE_FIELD, QVariant.Int),
+         QgsField("area_m2", QVariant.Double), QgsField("perimetro", QVariant.Double),
+         QgsField("vertices", QVariant.Int), QgsField(AREA_TEXT_FIELD, QVariant.String)]
+        + [QgsField(name, QVariant.String) for name in names]
+    )
+    parcels.updateFields()
+
+    vertices = QgsVectorLayer(f"Point?crs={crs.authid()}", "Vértices", "memory")
+    vertices.dataProvider().addAttributes([
+        QgsField(ID_FIELD, QVariant.String), QgsField("punto", QVariant.Int),
+        QgsField("x", QVariant.String), QgsField("y", QVariant.String)
+    ])
+    vertices.updateFields()
+
+    measures = QgsVectorLayer(f"LineString?crs={crs.authid()}", "Medidas", "memory")
+    measures.dataProvider().addAttributes([
+        QgsField(ID_FIELD, QVariant.String), QgsField("lado", QVariant.String), QgsField("rumbo", QVariant.String),
+        QgsField("distancia", QVariant.Double), QgsField("label", QVariant.String)
+    ])
+    measures.updateFields()
+
+    skipped = []
+    page = 0
+    total = len(batch['ids']) or 1
+    with BufferedFeatureWriter(parcels.dataProvider(), feedback=feedback) as parcel_writer, \
+            BufferedFeatureWriter(vertices.dataProvider(), feedback=feedback) as vertex_writer, \
+            BufferedFeatureWriter(measures.dataProvider(), feedback=feedback) as measure_writer:
+        for k, parcel_id in enumerate(batch['ids'].tolist()):
+            if feedback is not None and feedback.isCanceled():
+                break
+            r0, r1 = int(batch['offsets'][k]), int(batch['offsets'][k + 1])
+            if r1 - r0 < 3:
+                skipped.append(parcel_id)
+                continue
+            page += 1
+            survey_table, area = TopographicCalculator.batch_survey_table(batch, k)
+            xs, ys = batch['x'][r0:r1].tolist(), batch['y'][r0:r1].tolist()
+            key = str(parcel_id)
+
+            points = [QgsPointXY(x, y) for x, y in zip(xs, ys)]
+            if points[0] != points[-1]:
+                points.append(points[0])
+            feature = QgsFeature()
+            feature.setGeometry(QgsGeometry.fromPolygonXY([points]))
+            feature.setAttributes(
+                [key, page, area, survey_table.perimetro, r1 - r0, f"{area:.2f} m²"]
+                + list(values.get(parcel_id, [None] * len(names)))
+            )
+            parcel_writer.add(feature)
+            vertex_writer.extend(vertex_features(zip(xs, ys), decimals, extra=[key]))
+            measure_writer.extend(measure_features(survey_table, extra=[key]))
+            if feedback is not None:
+                feedback.setProgress(40 + int(k / total * 20))
+
+    for layer in (parcels, vertices, measures):
+        layer.updateExtents()
+    style_polygon_layer(parcels)
+    style_vertex_layer(vertices)
+    style_measures_layer(measures)
+    return parcels, vertices, measures, skipped
+
+
+def atlas_info(info, info_fields=()):
+    """
+    Convierte los datos del proyecto en textos para las etiquetas del atlas.
+
+    Un valor que empieza por '=' es una expresión (TITULO==concat('Lote ', "parcela"));
+    una clave que coincide con uno de info_fields (sin distinguir mayúsculas)
+    toma el valor de ese campo; el resto se escribe tal cual. Se añade
+    PARCELA con el ID de la parcela si no se indicó.
+
+    Solo se usan los campos indicados, no todos los de la capa: al guardar
+    las capas en disco el proveedor añade los suyos (fid en GeoPackage).
+
+    Args:
+        info: Diccionario {ID en plantilla: valor}
+        info_fields: Campos copiados de la tabla a la capa de parcelas
+
+    Returns:
+        dict: {ID en plantilla: texto con expresiones [% ... %]}
+    """
+    names = {name.lower(): name for name in info_fields}
+    result = {}
+    for key, value in info.items():
+        if value.startswith('='):
+            result[key] = f"[% {value[1:]} %]"
+        elif key.lower() in names and key.lower() not in (ID_FIELD, PAGE_FIELD):
+            result[key] = f'[% "{names[key.lower()]}" %]'
+        else:
+            result[key] = value
+    for name in info_fields:
+        # Atributos copiados de la tabla sin valor en los datos del proyecto
+        if name not in PARCEL_FIELDS and name.lower() not in (key.lower() for key in result):
+            result[name] = f'[% "{name}" %]'
+    result.setdefault('PARCELA', f'[% "{ID_FIELD}" %]')
+    return result
+
+
+def set_atlas_area_label(layout):
+    """Como set_area_label, con el área de la parcela actual del atlas."""
+    text = f'[% "{AREA_TEXT_FIELD}" %]'
+    item = layout.itemById('AREA')
+    if item and isinstance(item, QgsLayoutItemLabel):
+        item.setText(text)
+    else:
+        for item in layout.items():
+            if isinstance(item, QgsLayoutItemLabel) and "SUPERFICIE" in item.text():
+                item.setText(f"SUPERFICIE: {text}")
+
+
+def configure_atlas(layout, parcels, vertices, crs, info, info_fields=()):
+    """
+    Activa el atlas del layout sobre la capa de parcelas.
+
+    Args:
+        layout: QgsPrintLayout cargado desde la plantilla
+        parcels, vertices: Capas de create_atlas_layers
+        crs: QgsCoordinateReferenceSystem (etiqueta CRS)
+        info: Diccionario {ID en plantilla: valor}; ver atlas_info
+        info_fields: Campos copiados de la tabla a la capa de parcelas
+
+    Returns:
+        QgsLayoutAtlas
+    """
+    atlas = layout.atlas()
+    atlas.setCoverageLayer(parcels)
+    atlas.setEnabled(True)
+    atlas.setHideCoverage(False)
+    atlas.setPageNameExpression(f'"{ID_FIELD}"')
+    atlas.setSortFeatures(True)
+    atlas.setSortAscending(True)
+    atlas.setSortExpression(f'"{PAGE_FIELD}"')
+
+    map_item = layout.itemById('Mapa 1')
+    if map_item:
+        map_item.setAtlasDriven(True)
+        try:
+            map_item.setAtlasScalingMode(QgsLayoutItemMap.AtlasScalingMode.Auto)
+        except AttributeError:
+            map_item.setAtlasScalingMode(QgsLayoutItemMap.Auto)
+        map_item.setAtlasMargin(ATLAS_MARGIN)
+    link_scalebar_to_map(layout, map_item)
+
+    # Tabla de coordenadas: solo los vértices de la parcela de la página
+    set_vertex_table(layout, vertices, f"\"{ID_FIELD}\" = attribute(@atlas_feature, '{ID_FIELD}')")
+
+    set_atlas_area_label(layout)
+    set_crs_label(layout, crs)
+    set_info_labels(layout, atlas_info(info, info_fields))
+    return atlas
+
+
+def export_atlas_pdf(layout, path):
+    """
+    Exporta todas las páginas del atlas a un PDF.
+
+    Raises:
+        RuntimeError: Si el exportador devuelve un error
+    """
+    result, error = QgsLayoutExporter.exportToPdf(layout.atlas(), path, QgsLayoutExporter.PdfExportSettings())
+    if result != QgsLayoutExporter.Success:
+        raise RuntimeError(f"No se pudo exportar el atlas ({error or result}): {path}")
+    return path
+
+
+def _worker_app(prefix_path):
+    """Inicia QGIS sin interfaz en un proceso hijo (una vez por proceso)."""
+    global _WORKER_APP
+    if _WORKER_APP is None and QgsApplication.instance() is None:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        if prefix_path:
+            QgsApplication.setPrefixPath(prefix_path, True)
+        _WORKER_APP = QgsApplication([], False)
+        _WORKER_APP.initQgis()
+    return _WORKER_APP
+
+
+def export_page_range(project_path, layout_name, first_page, end_page, pdf_path, prefix_path=None):
+    """
+    Exporta las páginas [first_page, end_page) del atlas de un proyecto guardado.
+
+    Es la tarea de cada proceso en la exportación en paralelo: abre el
+    proyecto, filtra el atlas por el campo de página y escribe su PDF.
+
+    Returns:
+        str: Ruta del PDF parcial
+    """
+    _worker_app(prefix_path)
+    project = QgsProject.instance()
+    if project.fileName() != project_path and not project.read(project_path):
+        raise RuntimeError(f"No se pudo abrir el proyecto {project_path}")
+    layout = project.layoutManager().layoutByName(layout_name)
+    if layout is None:
+        raise RuntimeError(f"El proyecto no tiene el layout '{layout_name}'")
+
+    atlas = layout.atlas()
+    atlas.setFilterFeatures(True)
+    atlas.setFilterExpression(f'"{PAGE_FIELD}" >= {first_page} AND "{PAGE_FIELD}" < {end_page}')
+    return export_atlas_pdf(layout, pdf_path)
+
+
+def merge_pdfs(parts, path):
+    """Une los PDF parciales en 'path', en el orden dado."""
+    pypdf = _import_pypdf()
+    if pypdf is None:
+        raise ImportError("Unir los PDF del atlas requiere la librería 'pypdf'.")
+    writer = pypdf.PdfWriter()
+    for part in parts:
+        writer.append(part)
+    with open(path, 'wb') as f:
+        writer.write(f)
+    return path
+
+
+def export_atlas_parallel(project_path, layout_name, path, page_count, workers, feedback=None, poll_interval=0.1):
+    """
+    Exporta el atlas repartiendo rangos de páginas entre procesos y une el resultado.
+
+    El proyecto (capas en disco y layout) debe estar guardado en 'project_path':
+    cada proceso lo abre por su cuenta. Las partes se escriben en una carpeta
+    temporal; al cancelar, las páginas pendientes se descartan sin esperar a
+    los procesos que están exportando.
+
+    Args:
+        project_path: Proyecto .qgs/.qgz con el layout
+        layout_name: Nombre del layout con el atlas
+        path: PDF final
+        page_count: Número de páginas del atlas
+        workers: Número de procesos
+        feedback: QgsFeedback para el progreso y la cancelación (opcional)
+        poll_interval: Segundos máximos entre comprobaciones de la cancelación
+
+    Returns:
+        str: Ruta del PDF, o None si se canceló
+    """
+    ranges = split_ranges(page_count, workers)
+    folder = tempfile.mkdtemp(prefix="atlas_")
+    parts = [os.path.join(folder, f"parte{k + 1:03d}.pdf") for k in range(len(ranges))]
+    prefix_path = QgsApplication.prefixPath()
+    pool = None
+    try:
+        pool = create_process_pool(len(ranges))
+        jobs = [
+            pool.submit(export_page_range, project_path, layout_name, start + 1, end + 1, part, prefix_path)
+            for (start, end), part in zip(ranges, parts)
+        ]
+        pending = set(jobs)
+        while pending:
+            done, pending = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            for job in done:
+                job.result()
+            if feedback is not None:
+                if feedback.isCanceled():
+                    return None
+                feedback.setProgress(70 + int((len(jobs) - len(pending)) / len(jobs) * 25))
+        merge_pdfs(parts, path)
+    finally:
+        # Sin esperar: tras cancelar o fallar, los procesos en curso terminan por su cuenta
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        shutil.rmtree(folder, ignore_errors=True)
+    return path
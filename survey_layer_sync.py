@@ -0,0 +1,223 @@
+"""
+Sincronización incremental de las capas y el layout de un levantamiento
+Compatible con Qt5/Qt6 y QGIS 3.x/4.x
+"""
+from qgis.core import (
+    QgsFeature, QgsGeometry, QgsPointXY, QgsLayoutItemLabel,
+    QgsLayoutItemAttributeTable
+)
+
+from .topographic_calculator import IncrementalSurvey
+
+
+def set_area_label(layout, area):
+    """
+    Escribe el área en el layout: etiqueta con ID 'AREA' o, si no existe,
+    cualquier etiqueta que contenga el texto 'SUPERFICIE'.
+    """
+    item = layout.itemById('AREA')
+    if item and isinstance(item, QgsLayoutItemLabel):
+        item.setText(f"{area:.2f} m²")
+    else:
+        # Fallback búsqueda texto
+        for item in layout.items():
+            if isinstance(item, QgsLayoutItemLabel) and "SUPERFICIE" in item.text():
+                item.setText(f"SUPERFICIE: {area:.2f} m²")
+
+
+class SurveyLayerSync:
+    """
+    Mantiene sincronizadas las capas Lote/Vértices/Medidas con un IncrementalSurvey.
+
+    Cada edición de un vértice actualiza el modelo (área y perímetro en O(1)) y
+    parchea en el proveedor solo las entidades afectadas: el polígono, el
+    vértice y los dos lados que lo tocan. Los números de punto y de lado de los
+    vértices posteriores se renumeran solo al insertar o eliminar.
+    """
+
+    def __init__(self, coordinates, polygon_layer, vertex_layer, measures_layer, layout=None, decimals=2):
+        self.model = IncrementalSurvey(coordinates)
+        self.polygon_layer = polygon_layer
+        self.vertex_layer = vertex_layer
+        self.measures_layer = measures_layer
+        self.layout = layout
+        self.decimals = decimals
+        self._updating = False
+
+        polygon = next(polygon_layer.getFeatures())
+        self._poly_fid = polygon.id()
+        # Geometría del lote en caché: cada edición mueve, inserta o borra un vértice
+        self._polygon = QgsGeometry(polygon.geometry())
+
+        # Índices de entidades en orden de vértice/lado
+        vertices = sorted(vertex_layer.getFeatures(), key=lambda f: f['punto'])
+        self._vertex_fids = [f.id() for f in vertices]
+        sides = sorted(measures_layer.getFeatures(), key=lambda f: int(str(f['lado']).split('-')[0]))
+        self._side_fids = [f.id() for f in sides]
+
+        fields = measures_layer.fields()
+        self._side_idx = [fields.indexOf(name) for name in ('lado', 'rumbo', 'distancia', 'label')]
+        fields = vertex_layer.fields()
+        self._vertex_idx = [fields.indexOf(name) for name in ('punto', 'x', 'y')]
+        fields = polygon_layer.fields()
+        self._poly_idx = [fields.indexOf(name) for name in ('area_m2', 'perimetro')]
+
+    # --- API de edición ---
+
+    def move_vertex(self, index, x, y):
+        """Mueve el vértice 'index' (base 0) y parchea las capas."""
+        sides = self.model.move_vertex(index, x, y)
+        self._patch_vertices([index])
+        self._patch_sides(sides)
+        self._patch_polygon(self._polygon.moveVertex(x, y, index))
+
+    def insert_vertex(self, index, x, y):
+        """Inserta un vértice en la posición 'index' (base 0) y parchea las capas."""
+        sides = self.model.insert_vertex(index, x, y)
+
+        vertex = QgsFeature(self.vertex_layer.fields())
+        side = QgsFeature(self.measures_layer.fields())
+        _, (vertex,) = self.vertex_layer.dataProvider().addFeatures([vertex])
+        _, (side,) = self.measures_layer.dataProvider().addFeatures([side])
+        self._vertex_fids.insert(index, vertex.id())
+        self._side_fids.insert(index, side.id())
+
+        self._patch_vertices(range(index, len(self.model)))
+        self._patch_sides(sides)
+        self._renumber_sides(index + 1)
+        self._patch_polygon(self._polygon.insertVertex(x, y, index))
+
+    def delete_vertex(self, index):
+        """Elimina el vértice 'index' (base 0) y parchea las capas."""
+        if len(self.model) <= 3:
+            raise ValueError("Un polígono necesita al menos 3 vértices.")
+        sides = self.model.delete_vertex(index)
+
+        self.vertex_layer.dataProvider().deleteFeatures([self._vertex_fids.pop(index)])
+        self.measures_layer.dataProvider().deleteFeatures([self._side_fids.pop(index)])
+
+        self._patch_vertices(range(index, len(self.model)))
+        self._patch_sides(sides)
+        self._renumber_sides(index)
+        self._patch_polygon(self._polygon.deleteVertex(index))
+
+    def connect_vertex_edits(self):
+        """
+        Escucha las ediciones de geometría de la capa de vértices: al mover un
+        vértice con las herramientas de edición de QGIS se parchean el lote,
+        las medidas y el layout.
+        """
+        self.vertex_layer.geometryChanged.connect(self._on_vertex_geometry_changed)
+
+    def disconnect_vertex_edits(self):
+        try:
+            self.vertex_layer.geometryChanged.disconnect(self._on_vertex_geometry_changed)
+        except (TypeError, RuntimeError):
+            pass
+
+    def _on_vertex_geometry_changed(self, fid, geometry):
+        if self._updating or fid not in self._vertex_fids:
+            return
+        index = self._vertex_fids.index(fid)
+        point = geometry.asPoint()
+        sides = self.model.move_vertex(index, point.x(), point.y())
+
+        # La geometría ya está en el buffer de edición: solo faltan los atributos
+        self._updating = True
+        try:
+            _, ix, iy = self._vertex_idx
+            self.vertex_layer.changeAttributeValue(fid, ix, f"{point.x():.{self.decimals}f}")
+            self.vertex_layer.changeAttributeValue(fid, iy, f"{point.y():.{self.decimals}f}")
+        finally:
+            self._updating = False
+        self._patch_sides(sides)
+        self._patch_polygon(self._polygon.moveVertex(point.x(), point.y(), index))
+
+    # --- Parcheo de capas ---
+
+    def _patch_vertices(self, indices):
+        ip, ix, iy = self._vertex_idx
+        geometries = {}
+        attributes = {}
+        for i in indices:
+            fid = self._vertex_fids[i]
+            x, y = self.model.x[i], self.model.y[i]
+            geometries[fid] = QgsGeometry.fromPointXY(QgsPointXY(x, y))
+            attributes[fid] = {ip: i + 1, ix: f"{x:.{self.decimals}f}", iy: f"{y:.{self.decimals}f}"}
+
+        provider = self.vertex_layer.dataProvider()
+        provider.changeGeometryValues(geometries)
+        provider.changeAttributeValues(attributes)
+        self.vertex_layer.updateExtents()
+        self.vertex_layer.triggerRepaint()
+
+    def _patch_sides(self, sides):
+        i_lado, i_rumbo, i_dist, i_label = self._side_idx
+        n = len(self.model)
+        geometries = {}
+        attributes = {}
+        for i in sides:
+            fid = self._side_fids[i]
+            j = (i + 1) % n
+            row = self.model.side(i)
+            p1 = QgsPointXY(self.model.x[i], self.model.y[i])
+            p2 = QgsPointXY(self.model.x[j], self.model.y[j])
+            geometries[fid] = QgsGeometry.fromPolylineXY([p1, p2])
+            attributes[fid] = {
+                i_lado: row['lado'],
+                i_rumbo: row['rumbo'],
+                i_dist: row['distancia'],
+                i_label: f"{row['distancia']:.2f} m\n{row['rumbo']}"
+            }
+
+        provider = self.measures_layer.dataProvider()
+        provider.changeGeometryValues(geometries)
+        provider.changeAttributeValues(attributes)
+        self.measures_layer.updateExtents()
+        self.measures_layer.triggerRepaint()
+
+    def _renumber_sides(self, start):
+        """Actualiza el texto 'lado' de los lados posteriores a una inserción/eliminación."""
+        i_lado = self._side_idx[0]
+        n = len(self.model)
+        attributes = {
+            self._side_fids[i]: {i_lado: f"{i + 1} - {(i + 1) % n + 1}"}
+            for i in range(start, n)
+        }
+        if attributes:
+            self.measures_layer.dataProvider().changeAttributeValues(attributes)
+
+    def _patch_polygon(self, edited=True):
+        """
+        Escribe la geometría en caché del lote, su área y su perímetro.
+
+        Args:
+            edited: Resultado de la edición de la geometría en caché
+                (moveVertex/insertVertex/deleteVertex); si falló, el polígono
+                se reconstruye con todos los vértices del modelo
+        """
+        if not edited:
+            points = [QgsPointXY(x, y) for x, y in zip(self.model.x, self.model.y)]
+            points.append(points[0])
+            self._polygon = QgsGeometry.fromPolygonXY([points])
+        i_area, i_per = self._poly_idx
+
+        provider = self.polygon_layer.dataProvider()
+        provider.changeGeometryValues({self._poly_fid: QgsGeometry(self._polygon)})
+        provider.changeAttributeValues({
+            self._poly_fid: {i_area: self.model.area, i_per: self.model.perimetro}
+        })
+        self.polygon_layer.updateExtents()
+        self.polygon_layer.triggerRepaint()
+        self._refresh_layout()
+
+    def _refresh_layout(self):
+        if self.layout is None:
+            return
+        set_area_label(self.layout, self.model.area)
+        for item in self.layout.items():
+            if hasattr(item, 'multiFrame'):
+                multi_frame = item.multiFrame()
+                if isinstance(multi_frame, QgsLayoutItemAttributeTable):
+                    multi_frame.refreshAttributes()
+        self.layout.refresh()
@@ -0,0 +1,505 @@
+"""
+Generación de planos de levantamiento sin interfaz gráfica
+Compatible con Qt5/Qt6 y QGIS 3.x/4.x
+
+Crea las capas Lote/Vértices/Medidas y el layout a partir de la tabla de
+levantamiento. Lo usan el diálogo y el algoritmo de Processing, así que aquí
+no se importa nada de qgis.gui ni de los widgets: todas las opciones llegan
+como parámetros.
+"""
+import os
+from itertools import chain
+
+from qgis.PyQt.QtCore import QVariant
+from qgis.PyQt.QtGui import QColor, QFont
+from qgis.core import (
+    Qgis, QgsProject, QgsVectorLayer, QgsFeature, QgsGeometry, QgsPointXY, QgsField,
+    QgsPrintLayout, QgsLayoutItemLabel, QgsLayoutItemScaleBar, QgsLayoutItemAttributeTable,
+    QgsLayoutExporter, QgsFillSymbol, QgsMarkerSymbol, QgsLineSymbol, QgsTextFormat,
+    QgsVectorLayerSimpleLabeling, QgsPalLayerSettings, QgsReadWriteContext,
+    QgsVectorFileWriter
+)
+
+from .topographic_calculator import TopographicCalculator
+from .survey_layer_sync import set_area_label
+from .instrumentation import SurveyProfiler
+from .feature_buffer import BufferedFeatureWriter
+from .template_registry import TEMPLATE_REGISTRY
+
+
+PAPER_SIZES = ["A4", "A3", "A2", "A1", "CARTA", "OFICIO"]
+ORIENTATIONS = ["Horizontal", "Vertical"]
+
+# Campos que las plantillas ya traen en INFO_BOX (no se añaden al final)
+STANDARD_INFO_KEYS = ['TITULO', 'PROPIETARIO', 'UBICACION', 'FECHA']
+
+# Encabezados de la tabla de coordenadas del layout
+VERTEX_HEADINGS = {'punto': 'Punto', 'x': 'X (Este)', 'y': 'Y (Norte)'}
+
+
+def parse_info(text):
+    """
+    Convierte 'TITULO=Plano;PROPIETARIO=Juan' en un diccionario ordenado.
+
+    Acepta ';' o saltos de línea como separador. Las entradas sin '=' o sin
+    clave se ignoran; el valor puede contener '='.
+    """
+    info = {}
+    for entry in (text or '').replace('\n', ';').split(';'):
+        key, sep, value = entry.partition('=')
+        key = key.strip()
+        if sep and key:
+            info[key] = value.strip()
+    return info
+
+
+def layout_name(base_name, suffix):
+    """Nombre del layout de un levantamiento."""
+    return f"Levantamiento_{base_name}_{suffix}"
+
+
+def find_template(target_size, orientation):
+    """
+    Busca la plantilla solicitada o la más cercana disponible (plugin y carpetas del usuario).
+
+    Returns:
+        tuple: (ruta, nombre de archivo, tamaño encontrado) o (None, None, None)
+    """
+    return TEMPLATE_REGISTRY.find(target_size, orientation)
+
+
+def style_polygon_layer(layer):
+    """Relleno rosado translúcido con borde rojo."""
+    symbol = QgsFillSymbol.createSimple({'color': '255,200,200,100', 'outline_color': 'red', 'outline_width': '0.5'})
+    layer.renderer().setSymbol(symbol)
+
+
+def style_vertex_layer(layer, label_field='punto'):
+    """Punto negro pequeño con el número de punto como etiqueta."""
+    # Simbología simple (Punto pequeño)
+    symbol = QgsMarkerSymbol.createSimple({'name': 'circle', 'color': 'black', 'size': '1.5', 'outline_color': 'black', 'outline_width': '0'})
+    layer.renderer().setSymbol(symbol)
+
+    # Etiquetado Cartográfico Simple
+    settings = QgsPalLayerSettings()
+    settings.fieldName = label_field
+    settings.enabled = True
+
+    try:
+        settings.placement = QgsPalLayerSettings.Placement.OrderedPositionsAroundPoint
+        settings.quadOffset = QgsPalLayerSettings.QuadrantPosition.QuadrantAboveRight
+    except AttributeError:
+        settings.placement = QgsPalLayerSettings.OrderedPositionsAroundPoint
+        settings.quadOffset = QgsPalLayerSettings.QuadrantAboveRight
+
+    settings.dist = 2.0 # Separación del punto (mm)
+
+    txt_fmt = QgsTextFormat()
+    txt_fmt.setSize(9)
+    txt_fmt.setColor(QColor('black'))
+    font = QFont()
+    font.setBold(True)
+    txt_fmt.setFont(font)
+    settings.setFormat(txt_fmt)
+
+    layer.setLabeling(QgsVectorLayerSimpleLabeling(settings))
+    layer.setLabelsEnabled(True)
+
+
+def style_measures_layer(layer):
+    """Línea azul discontinua con distancia y rumbo sobre la línea."""
+    symbol = QgsLineSymbol.createSimple({'color': 'blue', 'width': '0.3', 'style': 'dash'})
+    layer.renderer().setSymbol(symbol)
+
+    settings = QgsPalLayerSettings()
+    settings.fieldName = 'label'
+    settings.enabled = True
+    try:
+        settings.placement = Qgis.LabelPlacement.Line
+    except AttributeError:
+        try:
+            settings.placement = QgsPalLayerSettings.Placement.Line
+        except AttributeError:
+            settings.placement = QgsPalLayerSettings.Line
+
+    txt_fmt = QgsTextFormat()
+    txt_fmt.setSize(8)
+    txt_fmt.setColor(QColor('blue'))
+    settings.setFormat(txt_fmt)
+
+    layer.setLabeling(QgsVectorLayerSimpleLabeling(settings))
+    layer.setLabelsEnabled(True)
+
+
+def vertex_features(coordinates, decimals=2, extra=()):
+    """
+    Entidades de vértice: [*extra, punto, x, y] con las coordenadas como texto.
+
+    Args:
+        coordinates: Iterable de tuplas (x, y) en orden
+        decimals: Decimales de las coordenadas
+        extra: Atributos que se anteponen (p. ej. el ID de parcela)
+    """
+    extra = list(extra)
+    for i, (x, y) in enumerate(coordinates):
+        f = QgsFeature()
+        f.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(x, y)))
+        f.setAttributes(extra + [i + 1, f"{x:.{decimals}f}", f"{y:.{decimals}f}"])
+        yield f
+
+
+def measure_features(survey_table, extra=()):
+    """
+    Entidades de lado: [*extra, lado, rumbo, distancia, label], una por fila.
+
+    Recorre la tabla por pares (fila, siguiente) cerrando el polígono, así que
+    acepta listas o tablas en streaming.
+    """
+    extra = list(extra)
+    rows = iter(survey_table)
+    first = row = next(rows, None)
+    if first is None:
+        return
+    for next_row in chain(rows, [first]):
+        p1, p2 = QgsPointXY(row['x'], row['y']), QgsPointXY(next_row['x'], next_row['y'])
+        f = QgsFeature()
+        f.setGeometry(QgsGeometry.fromPolylineXY([p1, p2]))
+        f.setAttributes(extra + [row['lado'], row['rumbo'], row['distancia'], f"{row['distancia']:.2f} m\n{row['rumbo']}"])
+        yield f
+        row = next_row
+
+
+def create_vertex_layer(coordinates, crs, decimals=2):
+    """Capa de memoria 'Vértices' con número de punto y coordenadas como texto."""
+    layer = QgsVectorLayer(f"Point?crs={crs.authid()}", "Vértices", "memory")
+    prov = layer.dataProvider()
+    prov.addAttributes([QgsField("punto", QVariant.Int), QgsField("x", QVariant.String), QgsField("y", QVariant.String)])
+    layer.updateFields()
+
+    with BufferedFeatureWriter(prov) as writer:
+        writer.extend(vertex_features(coordinates, decimals))
+    layer.updateExtents()
+    style_vertex_layer(layer)
+    return layer
+
+
+def create_measures_layer(survey_table, crs):
+    """Capa de memoria 'Medidas' con un segmento por lado (rumbo y distancia)."""
+    layer = QgsVectorLayer(f"LineString?crs={crs.authid()}", "Medidas", "memory")
+    prov = layer.dataProvider()
+    prov.addAttributes([QgsField("lado", QVariant.String), QgsField("rumbo", QVariant.String), QgsField("distancia", QVariant.Double), QgsField("label", QVariant.String)])
+    layer.updateFields()
+
+    with BufferedFeatureWriter(prov) as writer:
+        writer.extend(measure_features(survey_table))
+    layer.updateExtents()
+    style_measures_layer(layer)
+    return layer
+
+
+def update_layout_labels(layout, area, crs, info):
+    """
+    Rellena las etiquetas del layout.
+
+    Args:
+        layout: QgsPrintLayout
+        area: Área del lote
+        crs: QgsCoordinateReferenceSystem de las capas
+        info: Diccionario {ID en plantilla: valor}
+    """
+    # Valores calculados (Prioridad ID Específico, luego fallback texto)
+    set_area_label(layout, area)
+    set_crs_label(layout, crs)
+    set_info_labels(layout, info)
+
+
+def set_crs_label(layout, crs):
+    """Escribe el CRS en la etiqueta con ID 'CRS'."""
+    item = layout.itemById('CRS')
+    if item and isinstance(item, QgsLayoutItemLabel):
+        item.setText(f"{crs.authid()} - {crs.description()}")
+
+
+def set_info_labels(layout, info):
+    """
+    Escribe los datos del proyecto en las etiquetas del layout.
+
+    Cada valor se asigna a la etiqueta con ese ID, sustituye los marcadores
+    {ID} de cualquier etiqueta y, si la plantilla no lo incluye, se añade al
+    final de INFO_BOX. Los valores pueden ser expresiones [% ... %].
+    """
+    # 1. Elementos por ID directo (ej: TITULO)
+    for k, v in info.items():
+        layout_item = layout.itemById(k)
+        if layout_item and isinstance(layout_item, QgsLayoutItemLabel):
+            layout_item.setText(v)
+
+    # 2. Reemplazar variables {CLAVE} en TODAS las etiquetas
+    # Esto cubre el caso donde PROPIETARIO, UBICACION, FECHA están dentro de un cuadro de texto grande
+    for item in layout.items():
+        if isinstance(item, QgsLayoutItemLabel):
+            original_text = item.text()
+            new_text = original_text
+            for k, v in info.items():
+                placeholder = "{" + k + "}"
+                if placeholder in new_text:
+                    new_text = new_text.replace(placeholder, v)
+            if new_text != original_text:
+                item.setText(new_text)
+
+    # 3. Campos nuevos que no están en la plantilla (ej: 'CLIMA') se añaden a INFO_BOX
+    info_box = layout.itemById('INFO_BOX')
+    if info_box and isinstance(info_box, QgsLayoutItemLabel):
+        current_text = info_box.text()
+        extra_text = ""
+        for k, v in info.items():
+            # Verificar si ya está en el texto (por si el usuario sí puso {CLIMA})
+            if k not in STANDARD_INFO_KEYS and k not in current_text and v:
+                extra_text += f"\n{k}: {v}"
+        if extra_text:
+            info_box.setText(current_text + extra_text)
+
+
+def link_scalebar_to_map(layout, map_item):
+    """Vincula las escalas gráficas del layout al mapa principal."""
+    if not map_item:
+        return
+    for item in layout.items():
+        if isinstance(item, QgsLayoutItemScaleBar):
+            item.setLinkedMap(map_item)
+            item.update()
+
+
+def set_vertex_table(layout, vertex_layer, feature_filter=None):
+    """
+    Apunta las tablas de atributos del layout a la capa de vértices.
+
+    Args:
+        layout: QgsPrintLayout
+        vertex_layer: Capa de vértices (punto, x, y)
+        feature_filter: Expresión para mostrar solo algunos vértices (atlas)
+    """
+    for item in layout.items():
+        if not hasattr(item, 'multiFrame'):
+            continue
+        multi_frame = item.multiFrame()
+        if not isinstance(multi_frame, QgsLayoutItemAttributeTable) or not vertex_layer:
+            continue
+        multi_frame.setVectorLayer(vertex_layer)
+        multi_frame.refreshAttributes() # Importante actualizar atributos
+        if feature_filter:
+            multi_frame.setFilterFeatures(True)
+            multi_frame.setFeatureFilter(feature_filter)
+
+        # Solo las columnas de la tabla de coordenadas (la capa del atlas lleva además la parcela)
+        columns = [col for col in multi_frame.columns() if col.attribute() in VERTEX_HEADINGS]
+        for col in columns:
+            col.setHeading(VERTEX_HEADINGS[col.attribute()])
+        multi_frame.setColumns(columns)
+        multi_frame.update()
+
+
+def layout_from_template(project, template_path):
+    """Crea un QgsPrintLayout del proyecto a partir de una plantilla .qpt."""
+    layout = QgsPrintLayout(project)
+    # Documento ya analizado en caché (se vuelve a leer solo si cambia el archivo)
+    layout.loadFromTemplate(TEMPLATE_REGISTRY.document(template_path), QgsReadWriteContext())
+    return layout
+
+
+def export_pdf(layout, path):
+    """
+    Exporta el layout a PDF.
+
+    Raises:
+        RuntimeError: Si el exportador devuelve un error
+    """
+    exporter = QgsLayoutExporter(layout)
+    result = exporter.exportToPdf(path, QgsLayoutExporter.PdfExportSettings())
+    if result != QgsLayoutExporter.Success:
+        raise RuntimeError(f"No se pudo exportar el PDF ({exporter.errorMessage() or result}): {path}")
+    return path
+
+
+class SurveyPlanService:
+    """
+    Crea las capas y el layout de un levantamiento en un proyecto.
+
+    Uso:
+        service = SurveyPlanService(project)
+        layers = service.create_layers(coordinates, crs, area, survey_table, base_name='lote_12')
+        layout = service.create_layout(layers, area, crs, info, 'lote_12', 'A3', 'Horizontal')
+        export_pdf(layout, 'lote_12.pdf')
+
+    Los avisos (plantilla sustituida, GeoPackage que no se pudo guardar) se
+    entregan a 'warn(título, mensaje)': la barra de mensajes en el diálogo y
+    el feedback en Processing.
+    """
+
+    def __init__(self, project=None, profiler=None, warn=None):
+        """
+        Args:
+            project: QgsProject de destino (None = proyecto actual)
+            profiler: SurveyProfiler para medir las etapas (opcional)
+            warn: Función warn(título, mensaje) para los avisos (opcional)
+        """
+        self.project = project or QgsProject.instance()
+        self.profiler = profiler or SurveyProfiler(enabled=False)
+        self.warn = warn or (lambda title, message: None)
+        self.last_template_used = None
+
+    def create_layers(self, coordinates, crs, area, survey_table, decimals=2, output_folder=None,
+                      base_name='Levantamiento', group_name=None, add_to_project=True):
+        """
+        Crea las capas Lote, Vértices y Medidas.
+
+        Args:
+            coordinates: Lista de tuplas (x, y)
+            crs: QgsCoordinateReferenceSystem
+            area: Área del lote
+            survey_table: SurveyTable del levantamiento
+            decimals: Decimales de las coordenadas en la capa de vértices
+            output_folder: Carpeta para guardar GeoPackage (None = capas de memoria)
+            base_name: Prefijo de los GeoPackage
+            group_name: Grupo del árbol de capas (None = raíz)
+            add_to_project: Si es False las capas no se añaden al proyecto
+
+        Returns:
+            tuple: (lote, vértices, medidas)
+        """
+        with self.profiler.stage('creacion_capas'):
+            layer = QgsVectorLayer(f"Polygon?crs={crs.authid()}", "Lote", "memory")
+            prov = layer.dataProvider()
+            prov.addAttributes([QgsField("id", QVariant.Int), QgsField("area_m2", QVariant.Double), QgsField("perimetro", QVariant.Double)])
+            layer.updateFields()
+
+            points = [QgsPointXY(x, y) for x, y in coordinates]
+            if points[0] != points[-1]:
+                points.append(points[0])
+
+            feat = QgsFeature()
+            feat.setGeometry(QgsGeometry.fromPolygonXY([points]))
+            feat.setAttributes([1, area, TopographicCalculator.calculate_perimeter(survey_table)])
+            prov.addFeature(feat)
+            layer.updateExtents()
+
+            style_polygon_layer(layer)
+
+            v_layer = create_vertex_layer(coordinates, crs, decimals)
+            m_layer = create_measures_layer(survey_table, crs)
+
+        if output_folder:
+            with self.profiler.stage('escritura_geopackage'):
+                layer = self.save_and_load_layer(layer, os.path.join(output_folder, f"{base_name}_Lote.gpkg"))
+                v_layer = self.save_and_load_layer(v_layer, os.path.join(output_folder, f"{base_name}_Vertices.gpkg"))
+                m_layer = self.save_and_load_layer(m_layer, os.path.join(output_folder, f"{base_name}_Medidas.gpkg"))
+
+        if add_to_project:
+            if group_name:
+                # Lote: las capas de cada archivo van en su propio grupo
+                group = self.project.layerTreeRoot().addGroup(group_name)
+                for lyr in (layer, v_layer, m_layer):
+                    self.project.addMapLayer(lyr, False)
+                    group.addLayer(lyr)
+            else:
+                for lyr in (layer, v_layer, m_layer):
+                    self.project.addMapLayer(lyr)
+        return layer, v_layer, m_layer
+
+    def save_and_load_layer(self, memory_layer, output_path):
+        """Guarda una capa de memoria a disco y la recarga manteniendo estilo."""
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = "GPKG"
+        options.fileEncoding = "UTF-8"
+
+        error = QgsVectorFileWriter.writeAsVectorFormatV3(
+            memory_layer, output_path, self.project.transformContext(), options
+        )
+        if error[0] != QgsVectorFileWriter.NoError:
+            self.warn("Error al guardar", f"No se pudo guardar {output_path}: {error}")
+            return memory_layer # Fallback a memoria
+
+        new_layer = QgsVectorLayer(output_path, memory_layer.name(), "ogr")
+        if not new_layer.isValid():
+            return memory_layer
+
+        if memory_layer.renderer():
+            new_layer.setRenderer(memory_layer.renderer().clone())
+        if memory_layer.labeling():
+            new_layer.setLabeling(memory_layer.labeling().clone())
+        new_layer.setLabelsEnabled(memory_layer.labelsEnabled())
+        return new_layer
+
+    def resolve_template(self, paper_size, orientation, custom_template=None):
+        """
+        Elige la plantilla del layout.
+
+        Args:
+            paper_size: Tamaño de papel (PAPER_SIZES)
+            orientation: 'Horizontal' o 'Vertical'
+            custom_template: Ruta de una plantilla .qpt propia (tiene prioridad)
+
+        Returns:
+            tuple: (ruta, sufijo del nombre del layout)
+
+        Raises:
+            FileNotFoundError: Si no hay plantilla utilizable
+        """
+        if custom_template:
+            if not os.path.exists(custom_template):
+                raise FileNotFoundError("La ruta de la plantilla personalizada no es válida o el archivo no existe.")
+            self.last_template_used = f"{os.path.basename(custom_template)} (Usuario)"
+            return custom_template, "Personalizado"
+
+        template_path, template_name, found_size = find_template(paper_size, orientation)
+        if not template_path:
+            raise FileNotFoundError(f"No se encontró ninguna plantilla compatible para {paper_size} - {orientation}.\n"
+                                    f"Genere al menos 'plantilla_{paper_size}_{orientation}.qpt' o una de tamaño cercano (A4, A3, etc).")
+        if found_size != paper_size:
+            self.warn("Aviso de Plantilla", f"No se encontró plantilla {paper_size}. Usando {found_size} ({template_name}) en su lugar.")
+        self.last_template_used = template_name
+        return template_path, found_size
+
+    def create_layout(self, layers, area, crs, info, base_name, paper_size="A4", orientation="Horizontal",
+                      custom_template=None, add_to_project=True):
+        """
+        Crea el layout del levantamiento desde la plantilla.
+
+        Args:
+            layers: Tupla (lote, vértices, medidas) de create_layers
+            area: Área del lote
+            crs: QgsCoordinateReferenceSystem
+            info: Diccionario {ID en plantilla: valor} para las etiquetas
+            base_name: Nombre del levantamiento (parte del nombre del layout)
+            paper_size, orientation: Plantilla del sistema a usar
+            custom_template: Ruta de una plantilla .qpt propia (opcional)
+            add_to_project: Si es True se registra en el gestor de layouts
+
+        Returns:
+            QgsPrintLayout
+        """
+        layer, vertex_layer, _ = layers
+        template_path, layout_suffix = self.resolve_template(paper_size, orientation, custom_template)
+
+        with self.profiler.stage('carga_plantilla'):
+            layout = layout_from_template(self.project, template_path)
+        layout.setName(layout_name(base_name, layout_suffix))
+
+        map_item = layout.itemById('Mapa 1')
+        if map_item:
+            # Extensión inicial centrada en el lote (con margen)
+            extent = layer.extent()
+            extent.scale(1.1)
+            map_item.setExtent(extent)
+            map_item.refresh()
+
+        with self.profiler.stage('sustitucion_etiquetas'):
+            update_layout_labels(layout, area, crs, info)
+        link_scalebar_to_map(layout, map_item)
+
+        with self.profiler.stage('refresco_tabla_atributos'):
+            set_vertex_table(layout, vertex_layer)
+
+        if add_to_project:
+            self.project.layoutManager().addLayout(layout)
+        return layout
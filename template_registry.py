@@ -0,0 +1,183 @@
+"""
+Registro de plantillas de impresión (.qpt) con caché de documentos
+Compatible con Qt5/Qt6 y QGIS 3.x/4.x
+
+Las carpetas de plantillas se recorren una vez y las plantillas se indexan
+por (tamaño, orientación) según su nombre: plantilla_A3_Horizontal.qpt.
+Cada plantilla se analiza una sola vez; cada layout recibe una copia del
+QDomDocument, que es mucho más barata que volver a leer y analizar el XML.
+"""
+import os
+import re
+
+from qgis.PyQt.QtXml import QDomDocument
+from qgis.core import QgsApplication, QgsSettings
+
+
+PLUGIN_DIR = os.path.dirname(__file__)
+
+# Carpetas adicionales para servidores y lotes (separadas por os.pathsep)
+TEMPLATES_ENV = "ARCGEEK_TOPO_TEMPLATES"
+
+# Plantillas de tamaño cercano cuando falta la solicitada (en orden de preferencia)
+TEMPLATE_FALLBACKS = {
+    "A4": ["CARTA", "OFICIO", "A3", "A2", "A1"],
+    "A3": ["A4", "A2", "A1", "CARTA"],
+    "A2": ["A3", "A1", "A4"],
+    "A1": ["A2", "A3", "A4"],
+    "CARTA": ["A4", "OFICIO", "A3"],
+    "OFICIO": ["A4", "CARTA", "A3"]
+}
+
+_TEMPLATE_NAME = re.compile(r'^plantilla_([A-Za-z0-9]+)_(horizontal|vertical)\.qpt$', re.IGNORECASE)
+
+
+def user_template_folders():
+    """
+    Carpetas de plantillas del usuario, de menor a mayor prioridad.
+
+    La carpeta composer_templates del perfil, las rutas de búsqueda de
+    plantillas de la configuración de QGIS y las de ARCGEEK_TOPO_TEMPLATES.
+    """
+    folders = [os.path.join(QgsApplication.qgisSettingsDirPath(), 'composer_templates')]
+    try:
+        section = QgsSettings.Section.Core
+    except AttributeError:
+        section = QgsSettings.Core
+    paths = QgsSettings().value('Layout/searchPathsForTemplates', [], section=section) or []
+    if isinstance(paths, str):
+        paths = [paths]
+    folders.extend(paths)
+    folders.extend(path for path in os.environ.get(TEMPLATES_ENV, '').split(os.pathsep) if path)
+    return folders
+
+
+class TemplateRegistry:
+    """
+    Índice de plantillas por (tamaño, orientación) y caché de documentos analizados.
+
+    Con el mismo nombre, una plantilla de una carpeta del usuario sustituye a
+    la del plugin. El índice se rehace solo si cambia el contenido de alguna
+    carpeta (mtime de la carpeta); cada documento se vuelve a analizar solo si
+    cambia su archivo (tamaño o mtime). Usar desde el hilo principal: QDomDocument
+    no es seguro entre hilos.
+
+    Uso:
+        path, filename, size = TEMPLATE_REGISTRY.find('A3', 'Horizontal')
+        layout.loadFromTemplate(TEMPLATE_REGISTRY.document(path), QgsReadWriteContext())
+    """
+
+    def __init__(self, folders=None):
+        """
+        Args:
+            folders: Carpetas a recorrer, de menor a mayor prioridad
+                (None = carpeta del plugin + user_template_folders())
+        """
+        self._folders = folders
+        self._index = None
+        self._folder_stamps = None
+        self._documents = {}
+        self.parses = 0
+
+    def folders(self):
+        if self._folders is not None:
+            return list(self._folders)
+        return [PLUGIN_DIR] + user_template_folders()
+
+    def _stamps(self, folders):
+        stamps = []
+        for folder in folders:
+            try:
+                stamps.append((folder, os.stat(folder).st_mtime_ns))
+            except OSError:
+                stamps.append((folder, None))
+        return stamps
+
+    def refresh(self):
+        """Recorre las carpetas y rehace el índice."""
+        folders = self.folders()
+        index = {}
+        for folder in folders:
+            try:
+                names = os.listdir(folder)
+            except OSError:
+                continue
+            for name in sorted(names):
+                match = _TEMPLATE_NAME.match(name)
+                if match:
+                    index[(match.group(1).upper(), match.group(2).capitalize())] = os.path.join(folder, name)
+        self._index = index
+        self._folder_stamps = self._stamps(folders)
+        return index
+
+    def index(self):
+        """Diccionario {(tamaño, orientación): ruta}, actualizado si cambió alguna carpeta."""
+        if self._index is None or self._stamps(self.folders()) != self._folder_stamps:
+            self.refresh()
+        return self._index
+
+    def find(self, target_size, orientation):
+        """
+        Busca la plantilla solicitada o la más cercana disponible.
+
+        Returns:
+            tuple: (ruta, nombre de archivo, tamaño encontrado) o (None, None, None)
+        """
+        index = self.index()
+        orientation = orientation.capitalize()
+        for size in [target_size] + TEMPLATE_FALLBACKS.get(target_size, []):
+            path = index.get((size.upper(), orientation))
+            if path:
+                return path, os.path.basename(path), size
+        return None, None, None
+
+    def document(self, path):
+        """
+        Copia del documento de la plantilla, analizándola solo si cambió el archivo.
+
+        loadFromTemplate modifica el documento que recibe (quita los uuid de
+        los elementos), por eso se entrega siempre una copia.
+
+        Raises:
+            ValueError: Si el archivo no es XML válido
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        key = (stat.st_size, stat.st_mtime_ns)
+
+        cached = self._documents.get(path)
+        if cached is None or cached[0] != key:
+            doc = QDomDocument()
+            with open(path, 'rb') as f:
+                parsed = doc.setContent(f.read())
+            # PyQt5 devuelve (ok, mensaje, línea, columna); PyQt6, un objeto de resultado
+            ok = parsed[0] if isinstance(parsed, tuple) else bool(parsed)
+            if not ok:
+                raise ValueError(f"La plantilla no es un XML válido: {path}")
+            cached = (key, doc)
+            self._documents[path] = cached
+            self.parses += 1
+        return cached[1].cloneNode(True).toDocument()
+
+    def warm_up(self):
+        """
+        Analiza por adelantado todas las plantillas indexadas (para lotes).
+
+        Returns:
+            int: Número de plantillas en caché
+        """
+        for path in self.index().values():
+            try:
+                self.document(path)
+            except (OSError, ValueError):
+                continue
+        return len(self._documents)
+
+    def clear(self):
+        self._index = None
+        self._folder_stamps = None
+        self._documents.clear()
+
+
+# Registro compartido durante la sesión de QGIS (o del proceso de qgis_process)
+TEMPLATE_REGISTRY = TemplateRegistry()
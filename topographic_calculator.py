@@ -3,6 +3,57 @@ Módulo de cálculos topográficos
 Compatible con Qt5/Qt6 y QGIS 3.x/4.x
 """
 import math
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+
+# Formato de rumbo por cuadrante (índice = azimut // 90): (prefijo, sufijo)
+_BEARING_PARTS = (("N", "E"), ("S", "E"), ("S", "W"), ("N", "W"))
+
+
+def format_bearing(quadrant, degrees, minutes, seconds):
+    """
+    Formatea un rumbo topográfico a partir de sus componentes.
+    
+    Args:
+        quadrant: Índice de cuadrante (0=NE, 1=SE, 2=SW, 3=NW)
+        degrees, minutes, seconds: Componentes enteros del ángulo
+    
+    Returns:
+        str: Rumbo en formato 'N 45-30-15 E'
+    """
+    prefix, suffix = _BEARING_PARTS[quadrant]
+    return f"{prefix} {degrees}-{minutes}-{seconds} {suffix}"
+
+
+def bearing_from_azimuth(azimut):
+    """
+    Convierte un azimut (grados, 0-360) en rumbo topográfico.
+    
+    Args:
+        azimut: Azimut en grados decimales
+    
+    Returns:
+        str: Rumbo en formato 'N 45-30-15 E'
+    """
+    # Determinar cuadrante y ángulo reducido
+    if 0 <= azimut < 90:
+        quadrant, angle = 0, azimut
+    elif 90 <= azimut < 180:
+        quadrant, angle = 1, 180 - azimut
+    elif 180 <= azimut < 270:
+        quadrant, angle = 2, azimut - 180
+    else:
+        quadrant, angle = 3, 360 - azimut
+    
+    # Convertir a grados-minutos-segundos
+    degrees = int(angle)
+    minutes_decimal = (angle - degrees) * 60
+    minutes = int(minutes_decimal)
+    seconds = int((minutes_decimal - minutes) * 60)
+    
+    return format_bearing(quadrant, degrees, minutes, seconds)
 
 
 class TopographicCalculator:
@@ -29,37 +80,7 @@ class TopographicCalculator:
         if azimut_deg < 0:
             azimut_deg += 360
         
-        # Determinar cuadrante
-        if 0 <= azimut_deg < 90:
-            angle = azimut_deg
-            quadrant = "NE"
-        elif 90 <= azimut_deg < 180:
-            angle = 180 - azimut_deg
-            quadrant = "SE"
-        elif 180 <= azimut_deg < 270:
-            angle = azimut_deg - 180
-            quadrant = "SW"
-        else:
-            angle = 360 - azimut_deg
-            quadrant = "NW"
-        
-        # Convertir a grados-minutos-segundos
-        degrees = int(angle)
-        minutes_decimal = (angle - degrees) * 60
-        minutes = int(minutes_decimal)
-        seconds = int((minutes_decimal - minutes) * 60)
-        
-        # Formatear rumbo
-        if quadrant == "NE":
-            bearing = f"N {degrees}-{minutes}-{seconds} E"
-        elif quadrant == "SE":
-            bearing = f"S {degrees}-{minutes}-{seconds} E"
-        elif quadrant == "SW":
-            bearing = f"S {degrees}-{minutes}-{seconds} W"
-        else:
-            bearing = f"N {degrees}-{minutes}-{seconds} W"
-        
-        return bearing, azimut_deg
+        return bearing_from_azimuth(azimut_deg), azimut_deg
     
     @staticmethod
     def calculate_distance(x1, y1, x2, y2):
@@ -86,13 +107,10 @@ class TopographicCalculator:
         Returns:
             float: Área en unidades cuadradas
         """
-        n = len(coordinates)
-        area = 0.0
-        for i in range(n):
-            j = (i + 1) % n
-            area += coordinates[i][0] * coordinates[j][1]
-            area -= coordinates[j][0] * coordinates[i][1]
-        return abs(area) / 2.0
+        x, y = TopographicCalculator._as_arrays(coordinates)
+        if len(x) == 0:
+            return 0.0
+        return TopographicCalculator._shoelace_area(x, y, np.roll(x, -1), np.roll(y, -1))
     
     @staticmethod
     def calculate_perimeter(survey_table):
@@ -100,12 +118,105 @@ class TopographicCalculator:
         Calcula el perímetro sumando las distancias.
         
         Args:
-            survey_table: Lista de diccionarios con campo 'distancia'
+            survey_table: SurveyTable o lista de diccionarios con campo 'distancia'
         
         Returns:
             float: Perímetro total
         """
-        return sum([row['distancia'] for row in survey_table])
+        if isinstance(survey_table, SurveyTable):
+            return survey_table.perimetro
+        return sum(row['distancia'] for row in survey_table)
+    
+    @staticmethod
+    def _as_arrays(coordinates):
+        """Convierte una lista de tuplas (x, y) en dos arreglos float64."""
+        coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        return coords[:, 0], coords[:, 1]
+    
+    @staticmethod
+    def _shoelace_area(x, y, x2, y2):
+        """
+        Área de Gauss sobre arreglos de lados (inicio y fin de cada lado).
+        
+        Las coordenadas se desplazan al primer vértice antes de multiplicar:
+        con coordenadas UTM (~1e6-1e7) los productos cruzados pierden
+        precisión por cancelación si se suman sin centrar.
+        """
+        x0, y0 = x[0], y[0]
+        cross = (x - x0) * (y2 - y0) - (x2 - x0) * (y - y0)
+        return abs(float(cross.sum())) / 2.0
+    
+    @staticmethod
+    def _side_arrays(x, y, x2, y2):
+        """
+        Calcula en bloque azimut, distancia y componentes del rumbo de cada lado.
+        
+        Args:
+            x, y: Arreglos con el vértice inicial de cada lado
+            x2, y2: Arreglos con el vértice final de cada lado
+        
+        Returns:
+            dict: Arreglos 'azimut', 'distancia', 'cuadrante', 'grados',
+                'minutos' y 'segundos' (uno por lado)
+        """
+        dx = x2 - x
+        dy = y2 - y
+        
+        azimut = np.degrees(np.arctan2(dx, dy))
+        azimut[azimut < 0] += 360
+        
+        distancia = np.sqrt(dx * dx + dy * dy)
+        
+        # Cuadrante y ángulo reducido (mismas reglas que calculate_bearing)
+        cuadrante = np.minimum(azimut // 90, 3).astype(np.int8)
+        angle = np.choose(cuadrante, (azimut, 180 - azimut, azimut - 180, 360 - azimut))
+        
+        grados = angle.astype(np.int32)
+        minutes_decimal = (angle - grados) * 60
+        minutos = minutes_decimal.astype(np.int32)
+        segundos = ((minutes_decimal - minutos) * 60).astype(np.int32)
+        
+        return {
+            'azimut': azimut,
+            'distancia': distancia,
+            'cuadrante': cuadrante,
+            'grados': grados,
+            'minutos': minutos,
+            'segundos': segundos
+        }
+    
+    @staticmethod
+    def compute_survey_arrays(x, y):
+        """
+        Motor vectorizado: calcula la tabla de levantamiento de un anillo en bloque.
+        
+        Cada lado i une el vértice i con el i+1 (el último cierra con el primero).
+        
+        Args:
+            x, y: Secuencias o arreglos con las coordenadas de los vértices
+        
+        Returns:
+            dict: Arreglos 'x', 'y', 'azimut', 'distancia', 'cuadrante', 'grados',
+                'minutos', 'segundos' y los totales 'area' y 'perimetro'
+        """
+        x = np.ascontiguousarray(x, dtype=np.float64)
+        y = np.ascontiguousarray(y, dtype=np.float64)
+        
+        if len(x) == 0:
+            empty = TopographicCalculator._side_arrays(x, y, x, y)
+            empty.update({'x': x, 'y': y, 'area': 0.0, 'perimetro': 0.0})
+            return empty
+        
+        x2 = np.roll(x, -1)
+        y2 = np.roll(y, -1)
+        
+        result = TopographicCalculator._side_arrays(x, y, x2, y2)
+        result['x'] = x
+        result['y'] = y
+        result['area'] = TopographicCalculator._shoelace_area(x, y, x2, y2)
+        # El perímetro histórico suma las distancias redondeadas de la tabla
+        result['perimetro'] = float(np.round(result['distancia'], 2).sum())
+        return result
     
     @staticmethod
     def generate_survey_table(coordinates):
@@ -117,31 +228,510 @@ class TopographicCalculator:
         
         Returns:
             tuple: (survey_table, area)
-                - survey_table: Lista de diccionarios con punto, x, y, lado, rumbo, distancia, azimut
+                - survey_table: SurveyTable; cada fila se comporta como un
+                  diccionario con punto, x, y, lado, rumbo, distancia, azimut
                 - area: Área del polígono
         """
-        calc = TopographicCalculator()
-        area = calc.calculate_area(coordinates)
+        x, y = TopographicCalculator._as_arrays(coordinates)
+        arrays = TopographicCalculator.compute_survey_arrays(x, y)
+        survey_table = SurveyTable.from_arrays(arrays)
         
-        survey_table = []
-        n = len(coordinates)
+        return survey_table, arrays['area']
+    
+    @staticmethod
+    def iter_survey_table(coordinates, chunk_size=None):
+        """
+        Genera la tabla de levantamiento fila a fila con memoria constante.
         
-        for i in range(n):
-            j = (i + 1) % n
-            x1, y1 = coordinates[i]
-            x2, y2 = coordinates[j]
-            
-            bearing, azimut = calc.calculate_bearing(x1, y1, x2, y2)
-            distance = calc.calculate_distance(x1, y1, x2, y2)
+        Args:
+            coordinates: Iterable de tuplas (x, y); puede ser un generador
+            chunk_size: Si se indica, produce bloques (SurveyTable) de hasta
+                chunk_size filas
+        
+        Returns:
+            SurveyStream: Iterable de filas (o de bloques de filas) que
+                acumula área y perímetro mientras se consume
+        """
+        return SurveyStream(coordinates, chunk_size)
+    
+    @staticmethod
+    def generate_batch_survey(x, y, parcel_ids, workers=None):
+        """
+        Calcula las tablas de levantamiento de muchas parcelas en una sola pasada.
+        
+        Las filas se agrupan por ID con un ordenamiento estable (se conserva el
+        orden de los vértices dentro de cada parcela) y todos los lados se
+        calculan en bloque, sin bucles por parcela.
+        
+        Args:
+            x, y: Coordenadas de todos los vértices (tabla larga)
+            parcel_ids: ID de parcela de cada vértice (p. ej. columna Poligono_ID)
+            workers: Si es mayor que 1, reparte el cálculo de lados entre un
+                pool de procesos (útil solo con millones de vértices)
+        
+        Returns:
+            dict: Resultado columnar con
+                - 'ids', 'offsets': ID de cada parcela y los límites de sus filas
+                  (las filas de la parcela k son offsets[k]:offsets[k+1])
+                - 'n_vertices', 'area', 'perimetro': un valor por parcela
+                - 'order': índice de cada fila en la tabla de entrada
+                - 'punto', 'x', 'y', 'azimut', 'distancia', 'cuadrante',
+                  'grados', 'minutos', 'segundos': un valor por fila
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        ids = np.asarray(parcel_ids)
+        if ids.dtype == object:
+            ids = ids.astype(str)
+        
+        if not (len(x) == len(y) == len(ids)):
+            raise ValueError("Las columnas X, Y e ID deben tener la misma longitud.")
+        
+        order = np.argsort(ids, kind='stable')
+        sorted_ids = ids[order]
+        xs = x[order]
+        ys = y[order]
+        n = len(xs)
+        
+        if n == 0:
+            starts = np.zeros(0, dtype=np.int64)
+        else:
+            starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+        offsets = np.r_[starts, n].astype(np.int64)
+        
+        if workers and workers > 1 and len(starts) > 1:
+            from .parallel import create_process_pool, split_ranges
             
-            survey_table.append({
-                'punto': i + 1,
-                'x': x1,
-                'y': y1,
-                'lado': f"{i + 1} - {j + 1}",
-                'rumbo': bearing,
-                'distancia': round(distance, 2),
-                'azimut': azimut
-            })
-        
-        return survey_table, area
\ No newline at end of file
+            # Tramos de parcelas completas con un número similar de filas
+            bounds = np.searchsorted(starts, [a for a, _ in split_ranges(n, workers)])
+            bounds = np.unique(np.r_[bounds, len(starts)])
+            jobs = []
+            with create_process_pool(len(bounds) - 1) as pool:
+                for g0, g1 in zip(bounds[:-1], bounds[1:]):
+                    r0, r1 = offsets[g0], offsets[g1]
+                    jobs.append(pool.submit(_batch_chunk, xs[r0:r1], ys[r0:r1], starts[g0:g1] - r0))
+                parts = [job.result() for job in jobs]
+            result = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+        else:
+            result = _batch_chunk(xs, ys, starts)
+        
+        result['ids'] = sorted_ids[starts]
+        result['offsets'] = offsets
+        result['n_vertices'] = np.diff(offsets)
+        result['order'] = order
+        result['x'] = xs
+        result['y'] = ys
+        return result
+    
+    @staticmethod
+    def batch_survey_table(batch, index):
+        """
+        Devuelve la tabla de una parcela del resultado de generate_batch_survey.
+        
+        Args:
+            batch: Diccionario devuelto por generate_batch_survey
+            index: Posición de la parcela en batch['ids']
+        
+        Returns:
+            tuple: (SurveyTable, area) con el mismo formato que generate_survey_table
+        """
+        r0, r1 = int(batch['offsets'][index]), int(batch['offsets'][index + 1])
+        # Vistas sobre los arreglos del lote: no se copian datos
+        survey_table = SurveyTable(
+            batch['x'][r0:r1], batch['y'][r0:r1],
+            batch['azimut'][r0:r1], batch['distancia'][r0:r1],
+            punto=batch['punto'][r0:r1]
+        )
+        
+        return survey_table, float(batch['area'][index])
+
+
+class SurveyRow(Mapping):
+    """
+    Fila de una SurveyTable con interfaz de diccionario de solo lectura.
+    
+    No almacena datos propios: lee del arreglo de la tabla al acceder a cada
+    clave, y 'lado' y 'rumbo' se formatean en ese momento.
+    """
+    
+    __slots__ = ('_table', '_index')
+    
+    KEYS = ('punto', 'x', 'y', 'lado', 'rumbo', 'distancia', 'azimut')
+    
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+    
+    def __getitem__(self, key):
+        table, i = self._table, self._index
+        if key == 'punto':
+            return int(table.punto[i])
+        if key == 'x':
+            return float(table.x[i])
+        if key == 'y':
+            return float(table.y[i])
+        if key == 'distancia':
+            return round(float(table.distancia[i]), 2)
+        if key == 'azimut':
+            return float(table.azimut[i])
+        if key == 'rumbo':
+            return bearing_from_azimuth(float(table.azimut[i]))
+        if key == 'lado':
+            return table.side_label(i)
+        raise KeyError(key)
+    
+    def __iter__(self):
+        return iter(self.KEYS)
+    
+    def __len__(self):
+        return len(self.KEYS)
+    
+    def __repr__(self):
+        return f"SurveyRow({dict(self)!r})"
+
+
+class SurveyTable(Sequence):
+    """
+    Tabla de levantamiento respaldada por arreglos tipados.
+    
+    Guarda x/y/azimut/distancia como float64 y el número de punto como
+    int32. Las filas (SurveyRow) se crean al acceder y se comportan como los
+    diccionarios de la versión anterior (row['distancia'], row['rumbo'], ...).
+    Los cortes (table[a:b]) devuelven otra SurveyTable sobre vistas de los
+    mismos arreglos, sin copiar.
+    """
+    
+    __slots__ = ('punto', 'x', 'y', 'azimut', 'distancia', 'ring_size')
+    
+    def __init__(self, x, y, azimut, distancia, punto=None, n=None, closed=True):
+        """
+        Args:
+            x, y: Coordenadas del vértice inicial de cada lado
+            azimut, distancia: Azimut (grados) y distancia de cada lado
+            punto: Número de cada punto (por defecto 1..len)
+            n: Vértices del anillo completo, para numerar el lado de cierre
+                (por defecto len)
+            closed: False en bloques intermedios de un stream, donde ningún
+                lado cierra el anillo
+        """
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.azimut = np.asarray(azimut, dtype=np.float64)
+        self.distancia = np.asarray(distancia, dtype=np.float64)
+        if punto is None:
+            punto = np.arange(1, len(self.x) + 1, dtype=np.int32)
+        self.punto = np.asarray(punto, dtype=np.int32)
+        self.ring_size = (n or len(self.x)) if closed else None
+    
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Crea la tabla a partir del resultado de compute_survey_arrays."""
+        return cls(arrays['x'], arrays['y'], arrays['azimut'], arrays['distancia'], n=len(arrays['x']))
+    
+    def __len__(self):
+        return len(self.x)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SurveyTable(
+                self.x[index], self.y[index], self.azimut[index], self.distancia[index],
+                punto=self.punto[index], n=self.ring_size, closed=self.ring_size is not None
+            )
+        n = len(self.x)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("Índice de fila fuera de rango")
+        return SurveyRow(self, index)
+    
+    def __iter__(self):
+        for i in range(len(self.x)):
+            yield SurveyRow(self, i)
+    
+    def side_label(self, index):
+        """Texto del lado de la fila (ej. '3 - 4'; el lado de cierre termina en 1)."""
+        p = int(self.punto[index])
+        n = self.ring_size
+        return f"{p} - {p % n + 1 if n else p + 1}"
+    
+    @property
+    def perimetro(self):
+        """Perímetro: suma de las distancias redondeadas a 2 decimales."""
+        return float(np.round(self.distancia, 2).sum())
+    
+    @property
+    def nbytes(self):
+        """Memoria ocupada por los arreglos de la tabla."""
+        return sum(getattr(self, name).nbytes for name in ('punto', 'x', 'y', 'azimut', 'distancia'))
+    
+    def to_dicts(self):
+        """Materializa la tabla como lista de diccionarios (formato anterior)."""
+        return [dict(row) for row in self]
+
+
+class SurveyStream:
+    """
+    Tabla de levantamiento en modo streaming.
+    
+    Lee las coordenadas en bloques, calcula cada bloque con el motor
+    vectorizado y entrega las filas sin conservar la tabla completa. El área
+    y el perímetro se acumulan sobre la marcha y son definitivos cuando
+    'finished' es True.
+    """
+    
+    DEFAULT_CHUNK = 4096
+    
+    def __init__(self, coordinates, chunk_size=None):
+        self._coordinates = coordinates
+        self.chunk_size = chunk_size
+        self.n_vertices = 0
+        self.perimetro = 0.0
+        self.finished = False
+        self._cross_sum = 0.0
+    
+    @property
+    def area(self):
+        """Área acumulada hasta el momento (final al terminar la iteración)."""
+        return abs(self._cross_sum) / 2.0
+    
+    def __iter__(self):
+        if self.chunk_size:
+            return self._iter_chunks(self.chunk_size)
+        return (row for chunk in self._iter_chunks(self.DEFAULT_CHUNK) for row in chunk)
+    
+    def _iter_chunks(self, chunk_size):
+        if self.finished:
+            raise RuntimeError("La tabla en streaming solo puede recorrerse una vez.")
+        
+        first = None
+        buffer = []
+        for point in self._coordinates:
+            if first is None:
+                first = (float(point[0]), float(point[1]))
+            buffer.append(point)
+            # El último punto del bloque queda pendiente: su lado depende del siguiente
+            if len(buffer) > chunk_size:
+                yield self._process(buffer, first, closing=False)
+                buffer = buffer[-1:]
+        
+        if first is not None:
+            buffer.append(first)
+            yield self._process(buffer, first, closing=True)
+        self.finished = True
+    
+    def _process(self, buffer, first, closing):
+        """Calcula los lados entre puntos consecutivos del bloque."""
+        coords = np.asarray(buffer, dtype=np.float64).reshape(-1, 2)
+        x, y = coords[:-1, 0], coords[:-1, 1]
+        x2, y2 = coords[1:, 0], coords[1:, 1]
+        
+        arrays = TopographicCalculator._side_arrays(x, y, x2, y2)
+        
+        x0, y0 = first
+        cross = (x - x0) * (y2 - y0) - (x2 - x0) * (y - y0)
+        self._cross_sum += float(cross.sum())
+        self.perimetro += float(np.round(arrays['distancia'], 2).sum())
+        
+        start = self.n_vertices + 1
+        self.n_vertices += len(x)
+        return SurveyTable(
+            x, y, arrays['azimut'], arrays['distancia'],
+            punto=np.arange(start, start + len(x), dtype=np.int32),
+            n=self.n_vertices, closed=closing
+        )
+
+
+class IncrementalSurvey:
+    """
+    Modelo de levantamiento con recálculo incremental.
+    
+    Mantiene las sumas de Gauss (Shoelace) y del perímetro. Mover, insertar
+    o eliminar un vértice solo recalcula los dos lados afectados, de modo que
+    área y perímetro se actualizan en O(1) sin recorrer el anillo.
+    """
+    
+    def __init__(self, coordinates):
+        """
+        Args:
+            coordinates: Lista de tuplas (x, y) del anillo (sin repetir el primero)
+        """
+        self.x = [float(x) for x, _ in coordinates]
+        self.y = [float(y) for _, y in coordinates]
+        # Origen fijo para centrar los productos cruzados (cualquier punto sirve)
+        self._ox = self.x[0] if self.x else 0.0
+        self._oy = self.y[0] if self.y else 0.0
+        self.recompute()
+    
+    def __len__(self):
+        return len(self.x)
+    
+    @property
+    def area(self):
+        """Área actual del polígono."""
+        return abs(self._cross_sum) / 2.0
+    
+    @property
+    def perimetro(self):
+        """Perímetro actual (suma de distancias redondeadas, como en la tabla)."""
+        return self._perimetro
+    
+    @property
+    def coordinates(self):
+        """Lista de tuplas (x, y) actual."""
+        return list(zip(self.x, self.y))
+    
+    def recompute(self):
+        """Recalcula las sumas desde cero (elimina la deriva de redondeo acumulada)."""
+        n = len(self.x)
+        if n == 0:
+            self._cross_sum = 0.0
+            self._perimetro = 0.0
+            return
+        x = np.asarray(self.x) - self._ox
+        y = np.asarray(self.y) - self._oy
+        x2 = np.roll(x, -1)
+        y2 = np.roll(y, -1)
+        self._cross_sum = float((x * y2 - x2 * y).sum())
+        self._perimetro = float(np.round(np.sqrt((x2 - x) ** 2 + (y2 - y) ** 2), 2).sum())
+    
+    def _side_terms(self, i):
+        """Producto cruzado y distancia redondeada del lado i -> i+1."""
+        j = (i + 1) % len(self.x)
+        x1, y1 = self.x[i] - self._ox, self.y[i] - self._oy
+        x2, y2 = self.x[j] - self._ox, self.y[j] - self._oy
+        distance = TopographicCalculator.calculate_distance(x1, y1, x2, y2)
+        return x1 * y2 - x2 * y1, round(distance, 2)
+    
+    def _remove_sides(self, sides):
+        for i in sides:
+            cross, distance = self._side_terms(i)
+            self._cross_sum -= cross
+            self._perimetro -= distance
+    
+    def _add_sides(self, sides):
+        for i in sides:
+            cross, distance = self._side_terms(i)
+            self._cross_sum += cross
+            self._perimetro += distance
+    
+    def move_vertex(self, index, x, y):
+        """
+        Mueve el vértice 'index' (base 0) a (x, y).
+        
+        Returns:
+            list: Índices de los lados modificados
+        """
+        n = len(self.x)
+        sides = sorted({(index - 1) % n, index})
+        self._remove_sides(sides)
+        self.x[index] = float(x)
+        self.y[index] = float(y)
+        self._add_sides(sides)
+        return sides
+    
+    def insert_vertex(self, index, x, y):
+        """
+        Inserta un vértice en la posición 'index' (base 0), antes del actual.
+        
+        El lado anterior (index-1 -> index) se sustituye por dos lados nuevos.
+        
+        Returns:
+            list: Índices de los lados modificados o nuevos (numeración nueva)
+        """
+        n = len(self.x)
+        if n:
+            self._remove_sides([(index - 1) % n])
+        self.x.insert(index, float(x))
+        self.y.insert(index, float(y))
+        sides = sorted({(index - 1) % (n + 1), index})
+        self._add_sides(sides)
+        return sides
+    
+    def delete_vertex(self, index):
+        """
+        Elimina el vértice 'index' (base 0); sus dos lados se unen en uno.
+        
+        Returns:
+            list: Índice del lado resultante (vacío si el anillo queda vacío)
+        """
+        n = len(self.x)
+        self._remove_sides(sorted({(index - 1) % n, index}))
+        del self.x[index]
+        del self.y[index]
+        if n == 1:
+            self.recompute()
+            return []
+        sides = [(index - 1) % (n - 1)]
+        self._add_sides(sides)
+        return sides
+    
+    def side(self, index):
+        """
+        Fila de la tabla de levantamiento para el lado 'index'.
+        
+        Returns:
+            dict: punto, x, y, lado, rumbo, distancia, azimut
+        """
+        n = len(self.x)
+        j = (index + 1) % n
+        x1, y1, x2, y2 = self.x[index], self.y[index], self.x[j], self.y[j]
+        bearing, azimut = TopographicCalculator.calculate_bearing(x1, y1, x2, y2)
+        return {
+            'punto': index + 1,
+            'x': x1,
+            'y': y1,
+            'lado': f"{index + 1} - {j + 1}",
+            'rumbo': bearing,
+            'distancia': round(TopographicCalculator.calculate_distance(x1, y1, x2, y2), 2),
+            'azimut': azimut
+        }
+    
+    def survey_table(self):
+        """Tabla completa del estado actual (SurveyTable)."""
+        return TopographicCalculator.generate_survey_table(self.coordinates)[0]
+
+
+def _batch_chunk(x, y, starts):
+    """
+    Calcula los lados, áreas y perímetros de un bloque de parcelas contiguas.
+    
+    Función de módulo para poder enviarla a un pool de procesos.
+    
+    Args:
+        x, y: Coordenadas ya agrupadas por parcela
+        starts: Fila inicial de cada parcela dentro del bloque
+    
+    Returns:
+        dict: Arreglos por fila ('punto', 'azimut', 'distancia', 'cuadrante',
+            'grados', 'minutos', 'segundos') y por parcela ('area', 'perimetro')
+    """
+    n = len(x)
+    if n == 0:
+        result = TopographicCalculator._side_arrays(x, y, x, y)
+        result.update({
+            'punto': np.zeros(0, dtype=np.int32),
+            'area': np.zeros(0, dtype=np.float64),
+            'perimetro': np.zeros(0, dtype=np.float64)
+        })
+        return result
+    
+    counts = np.diff(np.r_[starts, n])
+    group = np.repeat(np.arange(len(starts)), counts)
+    rows = np.arange(n)
+    
+    # Índice del vértice siguiente: el último de cada parcela cierra con el primero
+    nxt = rows + 1
+    nxt[starts + counts - 1] = starts
+    x2 = x[nxt]
+    y2 = y[nxt]
+    
+    result = TopographicCalculator._side_arrays(x, y, x2, y2)
+    result['punto'] = (rows - starts[group] + 1).astype(np.int32)
+    
+    # Shoelace centrado en el primer vértice de cada parcela
+    x0 = x[starts][group]
+    y0 = y[starts][group]
+    cross = (x - x0) * (y2 - y0) - (x2 - x0) * (y - y0)
+    result['area'] = np.abs(np.add.reduceat(cross, starts)) / 2.0
+    result['perimetro'] = np.add.reduceat(np.round(result['distancia'], 2), starts)
+    return result
@@ -0,0 +1,41 @@
+"""
+Proveedor de Processing de ArcGeek Topo
+Compatible con Qt5/Qt6 y QGIS 3.x/4.x
+"""
+import os
+
+from qgis.PyQt.QtGui import QIcon
+from qgis.core import QgsProcessingProvider
+
+
+class TopographicProvider(QgsProcessingProvider):
+    """
+    Registra los algoritmos del plugin en la Caja de Herramientas y en qgis_process.
+
+    Los módulos de los algoritmos (NumPy, capas, layouts) se importan en
+    loadAlgorithms, no al importar este módulo.
+    """
+
+    def loadAlgorithms(self):
+        from .create_polygon_from_csv import CreatePolygonFromTableAlgorithm
+        from .from_polygon_to_points import PolygonToPointsAlgorithm
+        from .export_to_csv import ExportToCSVAlgorithm
+        from .generate_survey_plan import GenerateSurveyPlanAlgorithm
+        from .generate_survey_atlas import GenerateSurveyAtlasAlgorithm
+
+        for algorithm in (CreatePolygonFromTableAlgorithm, PolygonToPointsAlgorithm,
+                          ExportToCSVAlgorithm, GenerateSurveyPlanAlgorithm,
+                          GenerateSurveyAtlasAlgorithm):
+            self.addAlgorithm(algorithm())
+
+    def id(self):
+        return 'arcgeek_topo'
+
+    def name(self):
+        return 'ArcGeek Topo'
+
+    def longName(self):
+        return self.name()
+
+    def icon(self):
+        return QIcon(os.path.join(os.path.dirname(__file__), 'icon.png'))
@@ -0,0 +1,865 @@
+"""
+Diálogo asistente de Levantamientos Topográficos
+Versión 1.0.0 - Compatible con Qt5/Qt6 y QGIS 3.x/4.x
+"""
+from qgis.PyQt.QtCore import Qt, QCoreApplication
+from qgis.PyQt.QtGui import QIcon
+from qgis.PyQt.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QLineEdit, QComboBox, QFileDialog, QMessageBox, QProgressBar,
+    QGroupBox, QFormLayout, QTabWidget, QWidget, QTableWidget,
+    QTableWidgetItem, QHeaderView, QAbstractItemView, QSpinBox,
+    QCheckBox
+)
+from qgis.core import (
+    QgsProject, QgsCoordinateReferenceSystem, Qgis, QgsApplication
+)
+from qgis.gui import QgsProjectionSelectionWidget
+import os
+import time
+import numpy as np
+from datetime import date
+
+from .topographic_calculator import TopographicCalculator, SurveyTable
+from .survey_layer_sync import SurveyLayerSync
+from .survey_plan_service import (
+    SurveyPlanService, PAPER_SIZES, ORIENTATIONS, layout_name as plan_layout_name
+)
+from .template_registry import TEMPLATE_REGISTRY
+from .instrumentation import SurveyProfiler
+from .coordinate_reader import (
+    INPUT_CACHE, read_csv_columns, has_excel_streaming, excel_columns, read_excel_columns,
+    guess_xy_columns
+)
+from .sidecar_cache import file_hash, load_sidecar, write_sidecar
+from .batch_survey import (
+    list_survey_files, iter_batch_results, batch_summary, write_batch_report
+)
+
+
+# Lector que escribe las cachés binarias del diálogo
+SIDECAR_READER = "arcgeek_topo"
+
+
+def _import_pandas():
+    """pandas solo se necesita para Excel y su importación tarda cientos de ms."""
+    try:
+        import pandas as pd
+    except ImportError:
+        return None
+    return pd
+
+
+class TopographicSurveyDialog(QDialog):
+    """Diálogo principal para generar levantamientos topográficos"""
+    
+    def __init__(self, iface, parent=None):
+        super().__init__(parent)
+        self.iface = iface
+        self.setWindowTitle("ArcGeek Topo - Asistente")
+        self.setMinimumWidth(700)
+        self.setMinimumHeight(550)
+        self.csv_path = ""
+        self.csv_columns = []
+        self.survey_sync = None
+        self.profiler = SurveyProfiler(enabled=False)
+        self.init_ui()
+    
+    def init_ui(self):
+        main_layout = QVBoxLayout()
+        
+        # WIDGET DE PESTAÑAS (Estilo Asistente)
+        self.tabs = QTabWidget()
+        try:
+            self.tabs.setTabPosition(QTabWidget.TabPosition.North)
+        except AttributeError:
+            self.tabs.setTabPosition(QTabWidget.North)
+        # Deshabilitar clic en pestañas para forzar flujo secuencial (opcional, pero da más sensación de asistente)
+        # self.tabs.tabBar().setEnabled(False) 
+        
+        # --- TAB 1: DATOS ---
+        self.tab_data = QWidget()
+        self.init_tab_data()
+        self.tabs.addTab(self.tab_data, "1. Datos")
+        
+        # --- TAB 2: INFORMACIÓN ---
+        self.tab_info = QWidget()
+        self.init_tab_info()
+        self.tabs.addTab(self.tab_info, "2. Información")
+        
+        # --- TAB 3: CONFIGURACIÓN IMPRESIÓN ---
+        self.tab_config = QWidget()
+        self.init_tab_config()
+        self.tabs.addTab(self.tab_config, "3. Impresión")
+        
+        # --- TAB 4: GENERAR ---
+        self.tab_run = QWidget()
+        self.init_tab_run()
+        self.tabs.addTab(self.tab_run, "4. Generar")
+        
+        main_layout.addWidget(self.tabs)
+        
+        # --- BARRA DE NAVEGACIÓN ---
+        nav_layout = QHBoxLayout()
+        
+        self.btn_back = QPushButton("< Anterior")
+        self.btn_back.clicked.connect(self.go_back)
+        self.btn_back.setEnabled(False)
+        
+        self.btn_next = QPushButton("Siguiente >")
+        self.btn_next.clicked.connect(self.go_next)
+        
+        self.btn_cancel = QPushButton("Cancelar")
+        self.btn_cancel.clicked.connect(self.close)
+        
+        nav_layout.addWidget(self.btn_cancel)
+        nav_layout.addStretch()
+        nav_layout.addWidget(self.btn_back)
+        nav_layout.addWidget(self.btn_next)
+        
+        main_layout.addLayout(nav_layout)
+        self.setLayout(main_layout)
+        
+        # Conectar cambio de pestañas para actualizar estado de botones
+        self.tabs.currentChanged.connect(self.update_nav_buttons)
+
+    def init_tab_data(self):
+        layout = QVBoxLayout()
+        
+        # Grupo Archivo
+        file_group = QGroupBox("Origen de Datos")
+        file_layout = QFormLayout()
+        
+        csv_layout = QHBoxLayout()
+        self.csv_edit = QLineEdit()
+        self.csv_edit.setPlaceholderText("Seleccione archivo CSV, TXT o Excel...")
+        self.csv_edit.setReadOnly(True)
+        csv_button = QPushButton("Examinar...")
+        csv_button.clicked.connect(self.select_csv)
+        csv_layout.addWidget(self.csv_edit)
+        csv_layout.addWidget(csv_button)
+        file_layout.addRow("Archivo:", csv_layout)
+        
+        self.x_combo = QComboBox()
+        self.x_combo.setEnabled(False)
+        file_layout.addRow("Columna X (Este):", self.x_combo)
+        
+        self.y_combo = QComboBox()
+        self.y_combo.setEnabled(False)
+        file_layout.addRow("Columna Y (Norte):", self.y_combo)
+        
+        file_group.setLayout(file_layout)
+        layout.addWidget(file_group)
+        
+        # Grupo CRS
+        crs_group = QGroupBox("Sistema de Referencia")
+        crs_layout = QVBoxLayout()
+        self.crs_selector = QgsProjectionSelectionWidget()
+        self.crs_selector.setCrs(QgsCoordinateReferenceSystem("EPSG:32717"))
+        self._setup_crs_options()
+        crs_layout.addWidget(self.crs_selector)
+        crs_group.setLayout(crs_layout)
+        layout.addWidget(crs_group)
+        
+        layout.addStretch()
+        self.tab_data.setLayout(layout)
+
+    def init_tab_info(self):
+        layout = QVBoxLayout()
+        info_group = QGroupBox("Datos del Proyecto (Dinámico)")
+        info_layout = QVBoxLayout()
+        
+        # Tabla de campos
+        self.info_table = QTableWidget(0, 2)
+        self.info_table.setHorizontalHeaderLabels(["ID en Plantilla", "Valor"])
+        try:
+            self.info_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        except AttributeError:
+            self.info_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+            
+        try:
+            self.info_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        except AttributeError:
+            self.info_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        
+        # Info
+        help_lbl = QLabel("Agregue campos. El 'ID en Plantilla' debe coincidir con el 'ID del Elemento' en el diseño de impresión.")
+        help_lbl.setStyleSheet("color: #555; font-size: 10px; font-style: italic;")
+        info_layout.addWidget(help_lbl)
+        
+        info_layout.addWidget(self.info_table)
+        
+        # Botones de tabla
+        btn_layout = QHBoxLayout()
+        
+        add_btn = QPushButton("Agregar Campo")
+        add_btn.setIcon(QIcon(QgsApplication.iconPath("mActionAdd.svg")))
+        add_btn.clicked.connect(lambda: self._add_info_row("NUEVO_ITEM", ""))
+        
+        del_btn = QPushButton("Eliminar Campo")
+        del_btn.setIcon(QIcon(QgsApplication.iconPath("mActionRemove.svg")))
+        del_btn.clicked.connect(self._del_info_row)
+        
+        btn_layout.addWidget(add_btn)
+        btn_layout.addWidget(del_btn)
+        info_layout.addLayout(btn_layout)
+        
+        # Cargar valores por defecto
+        defaults = [
+            ("TITULO", "LEVANTAMIENTO PLANIMÉTRICO"),
+            ("PROPIETARIO", ""),
+            ("UBICACION", "Loja, Ecuador"),
+            ("FECHA", date.today().strftime('%Y-%m-%d'))
+        ]
+        for k, v in defaults:
+            self._add_info_row(k, v)
+        
+        info_group.setLayout(info_layout)
+        layout.addWidget(info_group)
+        self.tab_info.setLayout(layout)
+
+    def _add_info_row(self, key, val):
+        r = self.info_table.rowCount()
+        self.info_table.insertRow(r)
+        self.info_table.setItem(r, 0, QTableWidgetItem(key))
+        self.info_table.setItem(r, 1, QTableWidgetItem(val))
+
+    def _del_info_row(self):
+        r = self.info_table.currentRow()
+        if r >= 0:
+            self.info_table.removeRow(r)
+        else:
+            # Si no hay selección, eliminar el último
+            rc = self.info_table.rowCount()
+            if rc > 0:
+                self.info_table.removeRow(rc - 1)
+
+    def init_tab_config(self):
+        layout = QVBoxLayout()
+        
+        # --- OPCIÓN PLANTILLA PERSONALIZADA ---
+        custom_group = QGroupBox("Plantilla Personalizada")
+        custom_layout = QVBoxLayout()
+        
+        self.chk_custom_template = QCheckBox("Usar plantilla externa (.qpt)")
+        self.chk_custom_template.toggled.connect(self._toggle_custom_template)
+        custom_layout.addWidget(self.chk_custom_template)
+        
+        file_layout = QHBoxLayout()
+        self.edit_custom_template = QLineEdit()
+        self.edit_custom_template.setPlaceholderText("Seleccione un archivo .qpt...")
+        self.edit_custom_template.setReadOnly(True)
+        self.edit_custom_template.setEnabled(False)
+        
+        self.btn_custom_template = QPushButton("Examinar...")
+        self.btn_custom_template.setEnabled(False)
+        self.btn_custom_template.clicked.connect(self.select_custom_template)
+        
+        file_layout.addWidget(self.edit_custom_template)
+        file_layout.addWidget(self.btn_custom_template)
+        custom_layout.addLayout(file_layout)
+        
+        custom_group.setLayout(custom_layout)
+        layout.addWidget(custom_group)
+        
+        # --- CONFIGURACIÓN ESTÁNDAR ---
+        self.page_group = QGroupBox("Configuración de Página (Sistema)")
+        page_layout = QFormLayout()
+        
+        self.combo_size = QComboBox()
+        self.combo_size.addItems(PAPER_SIZES)
+        page_layout.addRow("Tamaño de Papel:", self.combo_size)
+        
+        self.combo_orientation = QComboBox()
+        self.combo_orientation.addItems(ORIENTATIONS)
+        page_layout.addRow("Orientación:", self.combo_orientation)
+        
+        self.page_group.setLayout(page_layout)
+        layout.addWidget(self.page_group)
+        
+        # Grupo Configuración de Datos
+        data_config_group = QGroupBox("Formato de Datos")
+        data_config_layout = QFormLayout()
+        
+        self.decimals_spin = QSpinBox()
+        self.decimals_spin.setRange(0, 4)
+        self.decimals_spin.setValue(2)
+        data_config_layout.addRow("Decimales en Coordenadas:", self.decimals_spin)
+        
+        self.chk_sidecar = QCheckBox("Guardar caché binaria junto al archivo (.arcgeek)")
+        self.chk_sidecar.setToolTip(
+            "Guarda las columnas X/Y leídas en un archivo binario junto al original.\n"
+            "Las siguientes ejecuciones lo cargan directamente mientras el archivo no cambie."
+        )
+        data_config_layout.addRow(self.chk_sidecar)
+        
+        data_config_group.setLayout(data_config_layout)
+        layout.addWidget(data_config_group)
+        
+        # Info label
+        self.template_info_label = QLabel("Nota: Asegúrese de tener creada la plantilla correspondiente en la carpeta del plugin.\nEj: plantilla_A4_Horizontal.qpt")
+        self.template_info_label.setStyleSheet("color: #666; font-style: italic; margin-top: 10px;")
+        layout.addWidget(self.template_info_label)
+        
+        layout.addStretch()
+        self.tab_config.setLayout(layout)
+
+    def init_tab_run(self):
+        layout = QVBoxLayout()
+        
+        self.summary_label = QLabel("Listo para generar el levantamiento.\n\nRevise los datos en las pestañas anteriores si es necesario.")
+        try:
+            self.summary_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        except AttributeError:
+             self.summary_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.summary_label)
+
+        # Opciones de Salida
+        out_group = QGroupBox("Opciones de Salida")
+        out_layout = QVBoxLayout()
+        
+        self.chk_save_files = QCheckBox("Guardar capas en carpeta (GeoPackage)")
+        self.chk_save_files.stateChanged.connect(lambda: self.out_dir_widget.setEnabled(self.chk_save_files.isChecked()))
+        out_layout.addWidget(self.chk_save_files)
+        
+        file_layout = QHBoxLayout()
+        self.out_dir_edit = QLineEdit()
+        self.out_dir_edit.setPlaceholderText("Seleccione carpeta de destino...")
+        self.out_dir_edit.setReadOnly(True)
+        
+        self.btn_out_dir = QPushButton("...")
+        self.btn_out_dir.clicked.connect(self.select_output_dir)
+        
+        file_layout.addWidget(self.out_dir_edit)
+        file_layout.addWidget(self.btn_out_dir)
+        
+        self.out_dir_widget = QWidget()
+        self.out_dir_widget.setLayout(file_layout)
+        self.out_dir_widget.setEnabled(False)
+        out_layout.addWidget(self.out_dir_widget)
+        
+        out_group.setLayout(out_layout)
+        layout.addWidget(out_group)
+        
+        # Diagnóstico de rendimiento
+        diag_group = QGroupBox("Diagnóstico")
+        diag_layout = QVBoxLayout()
+        
+        self.chk_profile = QCheckBox("Registrar tiempo y memoria por etapa (perfil_etapas.jsonl)")
+        self.chk_profile.toggled.connect(lambda checked: self.chk_profile_log.setEnabled(checked))
+        diag_layout.addWidget(self.chk_profile)
+        
+        self.chk_profile_log = QCheckBox("Mostrar también en el registro de mensajes de QGIS")
+        self.chk_profile_log.setEnabled(False)
+        diag_layout.addWidget(self.chk_profile_log)
+        
+        diag_group.setLayout(diag_layout)
+        layout.addWidget(diag_group)
+        
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar)
+        
+        self.status_label = QLabel("")
+        try:
+            self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        except AttributeError:
+            self.status_label.setAlignment(Qt.AlignCenter)
+
+        self.status_label.setStyleSheet("color: #1976D2; font-weight: bold;")
+        layout.addWidget(self.status_label)
+        
+        self.generate_button = QPushButton("GENERAR PLANO")
+        self.generate_button.setMinimumHeight(50)
+        self.generate_button.setStyleSheet("""
+            QPushButton { background-color: #2196F3; color: white; font-size: 14px; font-weight: bold; border-radius: 5px; }
+            QPushButton:hover { background-color: #1976D2; }
+            QPushButton:disabled { background-color: #BDBDBD; }
+        """)
+        self.generate_button.clicked.connect(self.generate_survey)
+        self.generate_button.setEnabled(False) # Se activa al validar
+        layout.addWidget(self.generate_button)
+        
+        self.batch_button = QPushButton("Generar lote desde carpeta...")
+        self.batch_button.setToolTip(
+            "Genera un plano por cada archivo CSV/TXT/Excel de una carpeta con la misma\n"
+            "información y configuración de impresión. Las columnas X/Y seleccionadas se\n"
+            "usan si existen; si no, se detectan por nombre en cada archivo."
+        )
+        self.batch_button.clicked.connect(self.generate_batch)
+        layout.addWidget(self.batch_button)
+        
+        layout.addStretch()
+        self.tab_run.setLayout(layout)
+
+    def go_next(self):
+        curr = self.tabs.currentIndex()
+        if curr < self.tabs.count() - 1:
+            self.tabs.setCurrentIndex(curr + 1)
+
+    def go_back(self):
+        curr = self.tabs.currentIndex()
+        if curr > 0:
+            self.tabs.setCurrentIndex(curr - 1)
+
+    def update_nav_buttons(self):
+        curr = self.tabs.currentIndex()
+        max_idx = self.tabs.count() - 1
+        
+        self.btn_back.setEnabled(curr > 0)
+        
+        if curr == max_idx:
+            self.btn_next.setVisible(False)
+            # Validar si se puede generar
+            if self.x_combo.isEnabled():
+                self.generate_button.setEnabled(True)
+                self.summary_label.setText(f"Configuración:\nPapel: {self.combo_size.currentText()} - {self.combo_orientation.currentText()}\nCRS: {self.crs_selector.crs().authid()}")
+            else:
+                self.generate_button.setEnabled(False)
+                self.summary_label.setText("⚠ Faltan datos. Por favor cargue un archivo CSV en la pestaña 1.")
+        else:
+            self.btn_next.setVisible(True)
+            self.btn_next.setText("Siguiente >")
+
+    def _setup_crs_options(self):
+        try:
+            self.crs_selector.setOptionVisible(QgsProjectionSelectionWidget.CrsOption.LayerCrs, False)
+            self.crs_selector.setOptionVisible(QgsProjectionSelectionWidget.CrsOption.ProjectCrs, True)
+            self.crs_selector.setOptionVisible(QgsProjectionSelectionWidget.CrsOption.CurrentCrs, True)
+            self.crs_selector.setOptionVisible(QgsProjectionSelectionWidget.CrsOption.DefaultCrs, True)
+            self.crs_selector.setOptionVisible(QgsProjectionSelectionWidget.CrsOption.RecentCrs, True)
+        except AttributeError:
+            self.crs_selector.setOptionVisible(QgsProjectionSelectionWidget.LayerCrs, False)
+            self.crs_selector.setOptionVisible(QgsProjectionSelectionWidget.ProjectCrs, True)
+            self.crs_selector.setOptionVisible(QgsProjectionSelectionWidget.CurrentCrs, True)
+            self.crs_selector.setOptionVisible(QgsProjectionSelectionWidget.DefaultCrs, True)
+            self.crs_selector.setOptionVisible(QgsProjectionSelectionWidget.RecentCrs, True)
+    
+    def _create_profiler(self):
+        """Crea el perfilador de etapas según las opciones de diagnóstico."""
+        log_path = os.path.join(QgsApplication.qgisSettingsDirPath(), "arcgeek_topo", "perfil_etapas.jsonl")
+        return SurveyProfiler(
+            os.path.basename(self.csv_path),
+            enabled=self.chk_profile.isChecked(),
+            log_path=log_path,
+            message_log=self.chk_profile_log.isChecked()
+        )
+    
+    def select_output_dir(self):
+        folder = QFileDialog.getExistingDirectory(self, "Seleccionar carpeta de salida")
+        if folder:
+            self.out_dir_edit.setText(folder)
+
+    def _toggle_custom_template(self, checked):
+        self.edit_custom_template.setEnabled(checked)
+        self.btn_custom_template.setEnabled(checked)
+        self.page_group.setEnabled(not checked)
+
+    def select_custom_template(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Seleccionar plantilla de impresión", "",
+            "Archivos QGIS Composer (*.qpt);;Todos los archivos (*)"
+        )
+        if file_path:
+            self.edit_custom_template.setText(file_path)
+
+    def select_csv(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Seleccionar archivo de coordenadas", "",
+            "Archivos de texto (*.csv *.txt);;Archivos Excel (*.xlsx *.xls);;Todos los archivos (*)"
+        )
+        if file_path:
+            self.csv_path = file_path
+            self.csv_edit.setText(file_path)
+            self.load_csv_columns()
+    
+    def load_csv_columns(self):
+        try:
+            if has_excel_streaming(self.csv_path):
+                self.csv_columns = excel_columns(self.csv_path)
+            elif self.csv_path.lower().endswith(('.xlsx', '.xls')):
+                pd = _import_pandas()
+                if pd is None:
+                    QMessageBox.critical(self, "Error", "La librería 'pandas' no está instalada.")
+                    return
+                df = pd.read_excel(self.csv_path, nrows=0)
+                self.csv_columns = [str(c) for c in df.columns]
+            else:
+                # Delimitador, separador decimal y encabezado en una sola lectura
+                self.csv_columns = INPUT_CACHE.get_dialect(self.csv_path)['columns']
+            
+            self.x_combo.clear()
+            self.y_combo.clear()
+            self.x_combo.addItems(self.csv_columns)
+            self.y_combo.addItems(self.csv_columns)
+            
+            x_col, y_col = guess_xy_columns(self.csv_columns)
+            if x_col is not None:
+                self.x_combo.setCurrentIndex(self.csv_columns.index(x_col))
+            if y_col is not None:
+                self.y_combo.setCurrentIndex(self.csv_columns.index(y_col))
+            
+            self.x_combo.setEnabled(True)
+            self.y_combo.setEnabled(True)
+            self.status_label.setText(f"✔ Archivo cargado: {len(self.csv_columns)} columnas")
+            
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error al leer el archivo:\n{str(e)}")
+    
+    def _read_excel_columns(self, columns):
+        if has_excel_streaming(self.csv_path):
+            # Streaming de solo las columnas X/Y, con avance en la barra (0-20%)
+            return read_excel_columns(self.csv_path, columns, progress=self._report_read_progress)
+        pd = _import_pandas()
+        if pd is None:
+            raise ImportError("La librería 'pandas' no está instalada.")
+        df = pd.read_excel(self.csv_path, usecols=columns)
+        return {c: df[c].to_numpy(dtype=float) for c in columns}
+    
+    def _load_columns(self, columns):
+        """Lee las columnas del archivo o, si está activada, de su caché binaria."""
+        use_sidecar = self.chk_sidecar.isChecked()
+        if use_sidecar:
+            source_hash = file_hash(self.csv_path)
+            cached = load_sidecar(self.csv_path, columns, SIDECAR_READER, source_hash)
+            if cached is not None:
+                return cached[0]
+        
+        dialect = None
+        if self.csv_path.lower().endswith(('.xlsx', '.xls')):
+            data = self._read_excel_columns(columns)
+        else:
+            dialect = INPUT_CACHE.get_dialect(self.csv_path)
+            data = read_csv_columns(self.csv_path, columns, dialect)
+        
+        if use_sidecar:
+            write_sidecar(self.csv_path, data, dialect, SIDECAR_READER, source_hash)
+        return data
+    
+    def _report_read_progress(self, fraction):
+        if fraction is not None:
+            self.progress_bar.setValue(int(20 * fraction))
+        QCoreApplication.processEvents()
+    
+    def generate_survey(self):
+        # Validar estado limpio del proyecto (Opcional)
+        if QgsProject.instance().mapLayers():
+             try:
+                 yes_btn = QMessageBox.Yes
+                 no_btn = QMessageBox.No
+             except AttributeError:
+                 yes_btn = QMessageBox.StandardButton.Yes
+                 no_btn = QMessageBox.StandardButton.No
+
+             resp = QMessageBox.question(
+                 self, 
+                 "Proyecto no vacío", 
+                 "El proyecto actual ya tiene capas cargadas.\n\nPara evitar conflictos con layouts anteriores, se recomienda usar un proyecto nuevo.\n¿Desea continuar de todos modos (se añadirán nuevas capas)?",
+                 yes_btn | no_btn, 
+                 no_btn
+             )
+             if resp == no_btn:
+                 return
+
+        self.profiler = self._create_profiler()
+        status = "cancelado"
+        result = None
+        try:
+            self.progress_bar.setVisible(True)
+            self.progress_bar.setValue(0)
+            self.status_label.setText("Procesando datos...")
+            self.generate_button.setEnabled(False)
+            self.btn_cancel.setEnabled(False)
+            
+            x_col = self.x_combo.currentText()
+            y_col = self.y_combo.currentText()
+            
+            with self.profiler.stage('lectura_archivo'):
+                # Si el archivo no cambió desde la última lectura no se toca el disco
+                columns = INPUT_CACHE.get_columns(self.csv_path, [x_col, y_col], self._load_columns)
+                x, y = columns[x_col], columns[y_col]
+            
+            self.progress_bar.setValue(20)
+            
+            with self.profiler.stage('calculo_levantamiento'):
+                survey_table, area = TopographicCalculator.generate_survey_table(np.column_stack((x, y)))
+            coordinates = list(zip(x.tolist(), y.tolist()))
+            
+            self.progress_bar.setValue(40)
+            
+            crs = self.crs_selector.crs()
+            if not crs.isValid():
+                QMessageBox.warning(self, "Advertencia", "Sistema de coordenadas no válido.")
+                return
+
+            # Validar si ya existe layout con este nombre
+            base_name = os.path.splitext(os.path.basename(self.csv_path))[0]
+            layout_name = plan_layout_name(base_name, self.combo_size.currentText())
+            if QgsProject.instance().layoutManager().layoutByName(layout_name):
+                QMessageBox.warning(self, "Error", f"Ya existe un diseño llamado '{layout_name}'.\nElimínelo o use un archivo con otro nombre.")
+                return
+            
+            self.status_label.setText("Creando capas...")
+            decimals = self.decimals_spin.value()
+            output_folder = self._get_output_folder()
+            
+            layer = self._create_layers(coordinates, crs, area, survey_table, decimals, output_folder)
+            
+            self.progress_bar.setValue(60)
+            
+            self.status_label.setText("Generando layout...")
+            layout = self._create_layout(layer, survey_table, area, crs)
+            
+            # Modelo incremental: mover un vértice en la capa parchea lote, medidas y layout
+            if self.survey_sync:
+                self.survey_sync.disconnect_vertex_edits()
+            self.survey_sync = SurveyLayerSync(coordinates, layer, self.vertex_layer, self.measures_layer, layout, decimals)
+            self.survey_sync.connect_vertex_edits()
+            
+            self.progress_bar.setValue(80)
+            
+            self.iface.openLayoutDesigner(layout)
+            
+            self.progress_bar.setValue(100)
+            self.status_label.setText("✔ Layout creado exitosamente")
+            
+            status = "ok"
+            result = (area, len(coordinates), crs)
+            
+        except Exception as e:
+            status = "error"
+            QMessageBox.critical(self, "Error", f"Error:\n{str(e)}")
+            self.status_label.setText("✗ Error")
+            import traceback
+            traceback.print_exc()
+        finally:
+            self._finish_profile(archivo=self.csv_path, estado=status,
+                                 vertices=result[1] if result else None)
+            self.progress_bar.setVisible(False)
+            self.generate_button.setEnabled(True)
+            self.btn_cancel.setEnabled(True)
+        
+        # Después de cerrar el perfil, para no medir la espera del usuario en el mensaje
+        if result is not None:
+            self._show_success_message(*result)
+    
+    def _get_output_folder(self):
+        """Carpeta para guardar los GeoPackage, o None si se usan capas temporales."""
+        if not self.chk_save_files.isChecked():
+            return None
+        output_folder = self.out_dir_edit.text()
+        if not output_folder or not os.path.isdir(output_folder):
+            QMessageBox.warning(self, "Advertencia", "Carpeta de salida no válida. Se usarán capas temporales.")
+            return None
+        return output_folder
+    
+    def generate_batch(self):
+        """
+        Genera un plano por archivo de una carpeta.
+        
+        La lectura y el cálculo de cada archivo se hacen en un pool de procesos;
+        las capas y layouts se crean aquí, en el hilo principal, a medida que
+        llegan los resultados. Un archivo con errores no detiene el lote.
+        """
+        folder = QFileDialog.getExistingDirectory(self, "Seleccionar carpeta con archivos de coordenadas")
+        if not folder:
+            return
+        paths = list_survey_files(folder)
+        if not paths:
+            QMessageBox.warning(self, "Lote", "La carpeta no contiene archivos CSV, TXT o Excel.")
+            return
+        
+        crs = self.crs_selector.crs()
+        if not crs.isValid():
+            QMessageBox.warning(self, "Advertencia", "Sistema de coordenadas no válido.")
+            return
+        
+        x_col = self.x_combo.currentText() or None
+        y_col = self.y_combo.currentText() or None
+        decimals = self.decimals_spin.value()
+        output_folder = self._get_output_folder()
+        
+        self.profiler = self._create_profiler()
+        self.profiler.label = os.path.basename(folder)
+        # Todas las plantillas se analizan una vez antes del lote
+        TEMPLATE_REGISTRY.warm_up()
+        statuses = []
+        batch_error = None
+        start = time.perf_counter()
+        try:
+            self.progress_bar.setVisible(True)
+            self.progress_bar.setValue(0)
+            self.status_label.setText(f"Lote: procesando {len(paths)} archivos...")
+            self.generate_button.setEnabled(False)
+            self.batch_button.setEnabled(False)
+            self.btn_cancel.setEnabled(False)
+            
+            results = iter_batch_results(paths, x_col, y_col, poll=QCoreApplication.processEvents)
+            for done, (path, result, error) in enumerate(results, start=1):
+                status = {
+                    'archivo': os.path.basename(path), 'estado': 'error', 'vertices': None,
+                    'area_m2': None, 'perimetro_m': None, 'segundos': None, 'mensaje': ''
+                }
+                if error is None:
+                    build_start = time.perf_counter()
+                    try:
+                        self._build_batch_outputs(result, crs, decimals, output_folder)
+                        arrays = result['arrays']
+                        status.update(
+                            estado='ok',
+                            vertices=len(arrays['x']),
+                            area_m2=round(arrays['area'], 2),
+                            perimetro_m=round(arrays['perimetro'], 2),
+                            segundos=round(result['seconds'] + time.perf_counter() - build_start, 3)
+                        )
+                    except Exception as e:
+                        status['mensaje'] = str(e)
+                else:
+                    status['mensaje'] = str(error)
+                statuses.append(status)
+                
+                errors = sum(1 for s in statuses if s['estado'] != 'ok')
+                self.progress_bar.setValue(int(done / len(paths) * 100))
+                self.status_label.setText(f"Lote: {done}/{len(paths)} archivos ({errors} con errores)")
+                QCoreApplication.processEvents()
+        except Exception as e:
+            # Fallo del lote en sí (no de un archivo): se conserva lo ya procesado
+            batch_error = e
+            reported = {s['archivo'] for s in statuses}
+            statuses.extend({
+                'archivo': os.path.basename(path), 'estado': 'error', 'vertices': None,
+                'area_m2': None, 'perimetro_m': None, 'segundos': None, 'mensaje': 'No procesado'
+            } for path in paths if os.path.basename(path) not in reported)
+        finally:
+            self.progress_bar.setVisible(False)
+            self.generate_button.setEnabled(bool(self.csv_path))
+            self.batch_button.setEnabled(True)
+            self.btn_cancel.setEnabled(True)
+            summary = batch_summary(statuses, time.perf_counter() - start)
+            self._finish_profile(archivo=folder, estado="lote" if batch_error is None else "error",
+                                 archivos=summary['files'], errores=summary['errors'])
+        
+        report_path = os.path.join(output_folder or folder, "informe_lote.csv")
+        try:
+            write_batch_report(report_path, statuses)
+        except OSError:
+            report_path = None
+        
+        if batch_error is not None:
+            self.status_label.setText("❌ Lote interrumpido")
+            message = f"El lote se detuvo tras procesar {summary['ok']} de {summary['files']} archivos:\n{batch_error}"
+            if report_path:
+                message += f"\n\nInforme parcial: {report_path}"
+            QMessageBox.critical(self, "Error en el lote", message)
+            return
+        
+        self.status_label.setText(f"✔ Lote terminado: {summary['ok']} de {summary['files']} planos")
+        self._show_batch_summary(summary, statuses, report_path)
+    
+    def _build_batch_outputs(self, result, crs, decimals, output_folder):
+        """Crea capas (en un grupo con el nombre del archivo) y layout de un archivo del lote."""
+        base_name = os.path.splitext(os.path.basename(result['path']))[0]
+        layout_name = plan_layout_name(base_name, self.combo_size.currentText())
+        if QgsProject.instance().layoutManager().layoutByName(layout_name):
+            raise ValueError(f"Ya existe un diseño llamado '{layout_name}'.")
+        
+        arrays = result['arrays']
+        survey_table = SurveyTable.from_arrays(arrays)
+        coordinates = list(zip(arrays['x'].tolist(), arrays['y'].tolist()))
+        layer = self._create_layers(
+            coordinates, crs, arrays['area'], survey_table, decimals, output_folder,
+            base_name=base_name, group_name=base_name
+        )
+        self._create_layout(layer, survey_table, arrays['area'], crs, base_name=base_name)
+    
+    def _show_batch_summary(self, summary, statuses, report_path):
+        msg = QMessageBox(self)
+        try:
+            msg.setIcon(QMessageBox.Icon.Information)
+        except AttributeError:
+            msg.setIcon(QMessageBox.Information)
+        msg.setWindowTitle("Lote Terminado")
+        msg.setText(f"Se generaron {summary['ok']} de {summary['files']} planos.")
+        info = (
+            f"Errores: {summary['errors']}\n"
+            f"Tiempo total: {summary['seconds']:.1f} s\n"
+            f"Rendimiento: {summary['files_per_second']:.2f} archivos/s, "
+            f"{summary['vertices_per_second']:.0f} vértices/s"
+        )
+        if report_path:
+            info += f"\nInforme: {report_path}"
+        msg.setInformativeText(info)
+        failed = [s for s in statuses if s['estado'] != 'ok']
+        if failed:
+            msg.setDetailedText("\n".join(f"{s['archivo']}: {s['mensaje']}" for s in failed))
+        try:
+            msg.exec()
+        except AttributeError:
+            msg.exec_()
+    
+    def _show_success_message(self, area, n_vertices, crs):
+        msg = QMessageBox()
+        try:
+            msg.setIcon(QMessageBox.Icon.Information)
+        except AttributeError:
+            msg.setIcon(QMessageBox.Information)
+        msg.setWindowTitle("¡Levantamiento Generado!")
+        msg.setText("El levantamiento topográfico se ha creado correctamente.")
+        template_msg = getattr(self, 'last_template_used', 'Desconocida')
+        msg.setInformativeText(f"Área: {area:.2f} m²\nVértices: {n_vertices}\nCRS: {crs.authid()}\nPlantilla: {template_msg}")
+        try:
+            msg.exec()
+        except AttributeError:
+            msg.exec_()
+            
+
+
+    
+    def _finish_profile(self, **extra):
+        """Cierra el perfil; si no se puede escribir el registro JSONL solo se avisa."""
+        try:
+            self.profiler.finish(**extra)
+        except OSError as e:
+            self.iface.messageBar().pushMessage("Perfil", f"No se pudo escribir el registro: {e}", Qgis.Warning)
+    
+    def _plan_service(self):
+        """Servicio de generación sobre el proyecto actual, con los avisos en la barra de mensajes."""
+        def warn(title, message):
+            self.iface.messageBar().pushMessage(title, message, Qgis.Warning)
+        return SurveyPlanService(QgsProject.instance(), self.profiler, warn)
+    
+    def _info_values(self):
+        """Pares clave-valor de la pestaña Información."""
+        info = {}
+        for r in range(self.info_table.rowCount()):
+            key_item = self.info_table.item(r, 0)
+            val_item = self.info_table.item(r, 1)
+            if key_item and val_item:
+                info[key_item.text().strip()] = val_item.text().strip()
+        return info
+    
+    def _create_layers(self, coordinates, crs, area, survey_table, decimals=2, output_folder=None,
+                       base_name=None, group_name=None):
+        base_name = base_name or os.path.splitext(os.path.basename(self.csv_path))[0]
+        layer, self.vertex_layer, self.measures_layer = self._plan_service().create_layers(
+            coordinates, crs, area, survey_table, decimals, output_folder,
+            base_name=base_name, group_name=group_name
+        )
+        return layer
+    
+    def _create_layout(self, layer, survey_table, area, crs, base_name=None):
+        base_name = base_name or os.path.splitext(os.path.basename(self.csv_path))[0]
+        custom_template = None
+        if self.chk_custom_template.isChecked():
+            custom_template = self.edit_custom_template.text()
+            # Una ruta vacía también es un error: no se cae a las plantillas del sistema
+            if not custom_template or not os.path.isfile(custom_template):
+                raise FileNotFoundError("La ruta de la plantilla personalizada no es válida o el archivo no existe.")
+
+        service = self._plan_service()
+        layout = service.create_layout(
+            (layer, self.vertex_layer, self.measures_layer), area, crs, self._info_values(), base_name,
+            self.combo_size.currentText(), self.combo_orientation.currentText(), custom_template
+        )
+        self.last_template_used = service.last_template_used
+        return layout
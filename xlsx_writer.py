@@ -0,0 +1,236 @@
+"""
+Escritura de libros .xlsx en streaming
+Compatible con Qt5/Qt6 y QGIS 3.x/4.x
+
+Escribe directamente el XML de SpreadsheetML dentro del ZIP, fila a fila:
+la memoria no depende del número de filas y no necesita librerías externas.
+"""
+import math
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+
+# Filas por hoja en Excel (incluida la cabecera)
+EXCEL_MAX_ROWS = 1048576
+# Caracteres por celda en Excel
+EXCEL_MAX_CHARS = 32767
+
+# Textos cortos cuyo XML se reutiliza (valores repetidos: categorías, códigos...)
+TEXT_CACHE_SIZE = 65536
+TEXT_CACHE_MAX_CHARS = 128
+
+# Caracteres de control que XML 1.0 no admite
+_ILLEGAL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '{sheets}'
+    '</Types>'
+)
+_SHEET_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{n}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>{sheets}</sheets></workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '{sheets}</Relationships>'
+)
+_SHEET_REL = (
+    '<Relationship Id="rId{n}" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet{n}.xml"/>'
+)
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetData>'
+)
+_SHEET_END = '</sheetData></worksheet>'
+
+
+def _text_cell(text):
+    text = _ILLEGAL_XML.sub('', text)[:EXCEL_MAX_CHARS]
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+def _cell(value):
+    """XML de una celda: números y booleanos con tipo, el resto como texto."""
+    if value is None:
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, int):
+        # Excel guarda los números como doble: los enteros grandes pierden precisión
+        return f'<c><v>{value}</v></c>' if abs(value) < 2 ** 53 else _text_cell(str(value))
+    if isinstance(value, float):
+        return f'<c><v>{value!r}</v></c>' if math.isfinite(value) else _text_cell(str(value))
+    if isinstance(value, str):
+        return _text_cell(value)
+    return _text_cell(_as_text(value))
+
+
+def _cell_function():
+    """
+    Versión rápida de _cell para un libro: despacha por tipo exacto y
+    reutiliza el XML de los textos cortos repetidos.
+    """
+    cache = {}
+    isfinite = math.isfinite
+
+    def cell(value):
+        kind = type(value)
+        if kind is str:
+            xml = cache.get(value)
+            if xml is None:
+                xml = _text_cell(value)
+                if len(value) <= TEXT_CACHE_MAX_CHARS:
+                    if len(cache) >= TEXT_CACHE_SIZE:
+                        cache.clear()
+                    cache[value] = xml
+            return xml
+        if kind is float and isfinite(value):
+            return f'<c><v>{value!r}</v></c>'
+        if value is None:
+            return '<c/>'
+        return _cell(value)
+
+    return cell
+
+
+def _as_text(value):
+    """Texto de valores de QGIS/Qt (NULL, fechas) sin importar Qt."""
+    is_null = getattr(value, 'isNull', None)
+    if callable(is_null) and is_null():
+        return ''
+    for method in ('toPyDateTime', 'toPyDate', 'toPyTime'):
+        convert = getattr(value, method, None)
+        if callable(convert):
+            return convert().isoformat()
+    isoformat = getattr(value, 'isoformat', None)
+    if callable(isoformat):
+        return isoformat()
+    return str(value)
+
+
+class XlsxStreamWriter:
+    """
+    Escribe un libro .xlsx fila a fila con celdas tipadas.
+
+    Los textos se guardan como cadenas en línea (inlineStr), así no hace
+    falta la tabla de cadenas compartidas en memoria. Al llenarse una hoja
+    (1.048.576 filas en Excel) se continúa en otra con la misma cabecera.
+
+    Uso:
+        with XlsxStreamWriter('parcelas.xlsx', header) as writer:
+            writer.write_rows(rows)
+        writer.shards  # [{'file', 'sheet', 'rows'}, ...] una entrada por hoja
+    """
+
+    def __init__(self, path, header, sheet_name='Datos', max_rows=EXCEL_MAX_ROWS, compresslevel=1):
+        """
+        Args:
+            path: Ruta del libro
+            header: Nombres de las columnas (primera fila de cada hoja)
+            sheet_name: Nombre de la primera hoja; las siguientes llevan '_2', '_3'...
+            max_rows: Filas por hoja, incluida la cabecera
+            compresslevel: Nivel de compresión deflate (1 = rápido)
+        """
+        self.path = path
+        self.header = list(header)
+        self.sheet_name = sheet_name
+        self.max_rows = max(int(max_rows), 2)
+        self.shards = []
+        self._zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+        self._sheet = None
+        self._cell = _cell_function()
+
+    def _open_sheet(self):
+        n = len(self.shards) + 1
+        name = self.sheet_name if n == 1 else f"{self.sheet_name}_{n}"
+        # force_zip64: las hojas grandes pueden superar los 2 GiB sin comprimir
+        self._sheet = self._zip.open(f'xl/worksheets/sheet{n}.xml', 'w', force_zip64=True)
+        self._sheet.write(_SHEET_START.encode('utf-8'))
+        self._write_xml([self.header])
+        self.shards.append({'file': self.path, 'sheet': name, 'rows': 0})
+
+    def _close_sheet(self):
+        if self._sheet is None:
+            return
+        self._sheet.write(_SHEET_END.encode('utf-8'))
+        self._sheet.close()
+        self._sheet = None
+
+    def _write_xml(self, rows):
+        self._sheet.write(''.join(
+            '<row>' + ''.join(map(self._cell, row)) + '</row>' for row in rows
+        ).encode('utf-8'))
+
+    def write_rows(self, rows):
+        """Escribe una lista de filas, pasando a una hoja nueva cuando se llena."""
+        start = 0
+        while start < len(rows):
+            if self._sheet is None:
+                self._open_sheet()
+            sheet = self.shards[-1]
+            end = min(len(rows), start + self.max_rows - 1 - sheet['rows'])
+            self._write_xml(rows[start:end] if start or end < len(rows) else rows)
+            sheet['rows'] += end - start
+            start = end
+            if sheet['rows'] >= self.max_rows - 1:
+                self._close_sheet()
+
+    def close(self):
+        """Cierra la hoja abierta y escribe las partes del libro."""
+        if self._zip is None:
+            return self.shards
+        if not self.shards:
+            self._open_sheet()
+        self._close_sheet()
+
+        count = len(self.shards)
+        sheets = ''.join(
+            f'<sheet name="{escape(shard["sheet"], {chr(34): "&quot;"})}" sheetId="{n}" r:id="rId{n}"/>'
+            for n, shard in enumerate(self.shards, 1)
+        )
+        self._zip.writestr('[Content_Types].xml', _CONTENT_TYPES.format(
+            sheets=''.join(_SHEET_TYPE.format(n=n) for n in range(1, count + 1))))
+        self._zip.writestr('_rels/.rels', _ROOT_RELS)
+        self._zip.writestr('xl/workbook.xml', _WORKBOOK.format(sheets=sheets))
+        self._zip.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS.format(
+            sheets=''.join(_SHEET_REL.format(n=n) for n in range(1, count + 1))))
+        self._zip.close()
+        self._zip = None
+        return self.shards
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._close_sheet()
+            self._zip.close()
+            self._zip = None
+        return False